@@ -4,13 +4,20 @@
 
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Flavor, DailySelection
+from .models import Shop, Flavor, DailySelection
+
+
+@admin.register(Shop)
+class ShopAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'domain', 'created_at']
+    prepopulated_fields = {'slug': ('name',)}
+    filter_horizontal = ['owners']
 
 
 @admin.register(Flavor)
 class FlavorAdmin(admin.ModelAdmin):
-    list_display = ['photo_thumbnail', 'name', 'flavor_type', 'is_seasonal', 'status', 'created_at']
-    list_filter = ['status', 'flavor_type', 'is_seasonal']
+    list_display = ['photo_thumbnail', 'name', 'shop', 'flavor_type', 'is_seasonal', 'status', 'created_at']
+    list_filter = ['shop', 'status', 'flavor_type', 'is_seasonal']
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
 
@@ -26,6 +33,7 @@ class FlavorAdmin(admin.ModelAdmin):
 
 @admin.register(DailySelection)
 class DailySelectionAdmin(admin.ModelAdmin):
-    list_display = ['date', 'hit_of_the_day', 'updated_at']
+    list_display = ['date', 'shop', 'hit_of_the_day', 'updated_at']
+    list_filter = ['shop']
     filter_horizontal = ['flavors']
     date_hierarchy = 'date'
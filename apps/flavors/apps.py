@@ -5,3 +5,7 @@ class FlavorsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.flavors'
     verbose_name = 'Smaki lodów'
+
+    def ready(self):
+        # Register cache invalidation signal handlers
+        from . import signals, tenancy  # noqa: F401
@@ -0,0 +1,87 @@
+"""
+Stampede-safe fragment caching on top of the configured cache (settings.CACHES).
+
+get_or_build() stores values in an envelope with a logical expiry. Shortly
+before that expiry a few requests recompute early (probabilistic early
+expiration, so one of them usually refreshes the value before anyone misses).
+On a real miss only the request holding a short cache.add() lock builds the
+value (best-effort on the file cache, see get_or_build); the others serve the stale copy kept past expiry, or wait briefly for
+the builder. Invalidation is done with versioned keys, see tenancy.tenant_version();
+a fallback key lets requests keep serving the previous version while the new
+one is built (e.g. at the midnight menu switch).
+"""
+import math
+import random
+import time
+
+from django.core.cache import cache
+
+from . import perf
+
+LOCK_TIMEOUT = 30  # seconds, upper bound for one build
+LOCK_WAIT = 2  # seconds a request without the lock waits for the builder
+LOCK_POLL_INTERVAL = 0.05
+STALE_GRACE = 60 * 60  # seconds a value outlives its expiry to be served during rebuilds
+EARLY_RECOMPUTE_BETA = 1.0  # >1 recomputes earlier, 0 disables early recompute
+
+
+def _should_recompute_early(expires_at, build_time):
+    # XFetch: recompute when now - build_time * beta * ln(rand) passes the expiry
+    return time.time() - build_time * EARLY_RECOMPUTE_BETA * math.log(random.random() or 1e-12) >= expires_at
+
+
+def store(key, value, timeout, build_time=0.0):
+    """Store a value built elsewhere (e.g. by a warmup command) in get_or_build's format."""
+    cache.set(key, (value, time.time() + timeout, build_time), timeout + STALE_GRACE)
+
+
+def _build(key, build, timeout, fallback_key):
+    started = time.monotonic()
+    value = build()
+    store(key, value, timeout, time.monotonic() - started)
+    if fallback_key is not None:
+        cache.set(fallback_key, value, timeout + STALE_GRACE)
+    return value
+
+
+def get_or_build(key, build, timeout, fallback_key=None):
+    """
+    Return the cached value for key, calling build() to (re)create it.
+    The build lock is cache.add(): strict only on backends where add() is
+    atomic (Redis, Memcached, locmem within a process). FileBasedCache checks
+    and then sets, so there it's best-effort and two processes may both build.
+
+    fallback_key names a "last good" value shared by a family of versioned keys:
+    every build refreshes it, and while a new key is being built the other
+    requests get it immediately instead of waiting for the builder.
+    """
+    envelope = cache.get(key)
+    if envelope is not None:
+        value, expires_at, build_time = envelope
+        if not _should_recompute_early(expires_at, build_time):
+            perf.record_cache(True)
+            return value
+    perf.record_cache(False)
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            return _build(key, build, timeout, fallback_key)
+        finally:
+            cache.delete(lock_key)
+
+    # Someone else is building: serve the stale or last good value if there is one...
+    if envelope is not None:
+        return envelope[0]
+    if fallback_key is not None:
+        value = cache.get(fallback_key)
+        if value is not None:
+            return value
+    # ...or wait for theirs, and build ourselves only if it doesn't show up
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        envelope = cache.get(key)
+        if envelope is not None:
+            return envelope[0]
+    return _build(key, build, timeout, fallback_key)
@@ -0,0 +1,37 @@
+"""
+The shop's local date (TIME_ZONE, Europe/Warsaw), computed once per day per process.
+
+local_today() caches the current date together with the instants the day
+starts and ends, so requests only compare two datetimes; the date is
+recomputed when a request falls outside that window (midnight rollover).
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+_day = None  # (date, day start, next midnight), replaced as one tuple
+
+
+def _local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def local_today(now=None):
+    """Return the local date for now (default: the current time)."""
+    return _current_day(now)[0]
+
+
+def next_midnight(now=None):
+    """Return when the local day containing now ends."""
+    return _current_day(now)[2]
+
+
+def _current_day(now):
+    global _day
+    now = now or timezone.now()
+    day = _day
+    if day is None or not day[1] <= now < day[2]:
+        today = timezone.localdate(now)
+        day = (today, _local_midnight(today), _local_midnight(today + timedelta(days=1)))
+        _day = day
+    return day
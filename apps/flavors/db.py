@@ -0,0 +1,74 @@
+"""
+Write-path helpers for SQLite.
+
+Panel mutations run as one IMMEDIATE transaction each. The write lock is taken
+at BEGIN, so the time spent entering the transaction is the lock wait.
+"""
+import logging
+import random
+import time
+
+from django.db import OperationalError, transaction
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+WRITE_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.05  # seconds, doubled per attempt and jittered
+SLOW_LOCK_WAIT = 0.1  # seconds, lock waits above this are logged as warnings
+
+
+def is_locked_error(exc):
+    """Check whether an OperationalError is SQLite's busy/locked error."""
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+def run_write(endpoint, func, *args, **kwargs):
+    """
+    Run func(*args, **kwargs) in a single atomic write transaction.
+
+    Retries with jittered exponential backoff when SQLite reports the database
+    as locked, and logs the lock wait per endpoint. func must be safe to re-run:
+    side effects like flash messages belong after this call.
+    """
+    if transaction.get_connection().in_atomic_block:
+        # Already inside a transaction - a retry can't restart it, so just run
+        return func(*args, **kwargs)
+
+    for attempt in range(1, WRITE_ATTEMPTS + 1):
+        started = time.monotonic()
+        lock_wait = None
+        try:
+            with transaction.atomic():
+                lock_wait = time.monotonic() - started
+                result = func(*args, **kwargs)
+        except OperationalError as e:
+            if not is_locked_error(e):
+                raise
+            waited = time.monotonic() - started
+            metrics.inc('flavors_sqlite_busy_total', endpoint=endpoint)
+            if attempt == WRITE_ATTEMPTS:
+                metrics.inc('flavors_sqlite_write_failures_total', endpoint=endpoint)
+                logger.error(
+                    f"write endpoint={endpoint} gave up after {attempt} attempts, "
+                    f"last lock_wait_ms={waited * 1000:.1f}"
+                )
+                raise
+            delay = RETRY_BASE_DELAY * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            logger.warning(
+                f"write endpoint={endpoint} locked (attempt {attempt}, waited {waited * 1000:.1f} ms), "
+                f"retrying in {delay * 1000:.0f} ms"
+            )
+            time.sleep(delay)
+            continue
+
+        total = time.monotonic() - started
+        metrics.observe('flavors_sqlite_lock_wait_seconds', lock_wait, endpoint=endpoint)
+        log = logger.warning if lock_wait > SLOW_LOCK_WAIT else logger.info
+        log(
+            f"write endpoint={endpoint} lock_wait_ms={lock_wait * 1000:.1f} "
+            f"total_ms={total * 1000:.1f} attempts={attempt}"
+        )
+        return result
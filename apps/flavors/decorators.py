@@ -0,0 +1,49 @@
+from functools import wraps
+
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse
+
+
+def shop_owner_required(view_func):
+    """
+    Panel access: the user must be logged in and own the shop resolved for this host.
+    """
+    @wraps(view_func)
+    @login_required
+    def _wrapped(request, *args, **kwargs):
+        if request.shop is None:
+            raise Http404('Brak sklepu dla tej domeny.')
+        if not request.shop.is_owner(request.user):
+            raise PermissionDenied
+        return view_func(request, *args, **kwargs)
+    return _wrapped
+
+
+def shop_owner_required_json(view_func):
+    """
+    shop_owner_required for endpoints called from scripts (fetch, the service worker):
+    an expired session gets a JSON 401 instead of a redirect to the login page,
+    which fetch would follow and report as a 200 HTML page.
+    """
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Sesja wygasła. Zaloguj się ponownie.'}, status=401)
+        if request.shop is None:
+            raise Http404('Brak sklepu dla tej domeny.')
+        if not request.shop.is_owner(request.user):
+            return JsonResponse({'error': 'Brak dostępu do tego sklepu.'}, status=403)
+        return view_func(request, *args, **kwargs)
+    return _wrapped
+
+
+def staff_required(view_func):
+    """Logged-in staff only - for server-wide tools that aren't scoped to a shop."""
+    @wraps(view_func)
+    @login_required
+    def _wrapped(request, *args, **kwargs):
+        if not request.user.is_staff:
+            raise PermissionDenied
+        return view_func(request, *args, **kwargs)
+    return _wrapped
@@ -0,0 +1,253 @@
+"""
+Live menu updates for the homepage (Server-Sent Events).
+
+After a commit that changes a shop's menu, publish_menu_event() compares the
+published menu with the last state written to MENU_EVENTS_DIR and appends a
+compact diff (new order, hit, removed cards, HTML of changed cards) to the
+shop's state file. The file is the notification channel between worker
+processes: each ASGI process runs one poller that stats the files of shops
+with open connections and fans new events out to its in-process subscribers,
+so an idle connection costs one queue and no database queries.
+
+A staged selection going live changes the menu without any save, so the state
+also records the next publish time; pollers publish the event once it passes.
+The latest version is mirrored in a small file for current_version().
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .menu import get_menu_flavors, get_published_selection
+from .models import DailySelection
+
+try:
+    import fcntl
+except ImportError:  # Windows - single-process development only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+EVENTS_KEPT = 20  # per shop, lets a poller that fell behind catch up
+POLL_INTERVAL = 1  # seconds
+KEEPALIVE_INTERVAL = 25  # seconds, below common proxy idle timeouts
+SUBSCRIBER_QUEUE_SIZE = 10  # a client this far behind will see a version gap and reload
+
+
+def _state_path(shop_id):
+    return os.path.join(settings.MENU_EVENTS_DIR, f'shop-{shop_id}.json')
+
+
+def _version_path(shop_id):
+    return os.path.join(settings.MENU_EVENTS_DIR, f'shop-{shop_id}.version')
+
+
+def _read_state(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_file(path, write):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _write_state(path, state):
+    _write_file(path, lambda f: json.dump(state, f))
+
+
+def get_state(shop):
+    """Return the shop's last published menu state (version, order, hit, kept events), or None."""
+    return _read_state(_state_path(shop.pk))
+
+
+def current_version(shop):
+    """Return the shop's latest menu event version (0 before the first event)."""
+    try:
+        with open(_version_path(shop.pk), encoding='utf-8') as f:
+            return int(f.read())
+    except (FileNotFoundError, ValueError):
+        state = get_state(shop)
+        return state['version'] if state else 0
+
+
+def _next_publish_at(shop_id, now):
+    """Timestamp at which the shop's next staged selection goes live, or None."""
+    published_at = DailySelection.objects.for_shop(shop_id).filter(published_at__gt=now).order_by(
+        'published_at').values_list('published_at', flat=True).first()
+    return published_at.timestamp() if published_at else None
+
+
+def _card_fingerprint(flavor, is_hit):
+    """Cheap stand-in for the card HTML: changes whenever flavor_card.html would."""
+    data = json.dumps([flavor.name, flavor.photo.name, flavor.flavor_type, flavor.tags, is_hit])
+    return hashlib.md5(data.encode(), usedforsecurity=False).hexdigest()
+
+
+def publish_menu_event(shop_id):
+    """
+    Append a diff event if the shop's published menu differs from the last one.
+    Called from transaction.on_commit, possibly several times per transaction,
+    and by pollers when a staged selection goes live; calls that find nothing
+    changed only update the next publish time.
+    """
+    now = timezone.now()
+    selection = get_published_selection(shop_id, now)
+    next_publish_at = _next_publish_at(shop_id, now)
+    flavors, hit_of_the_day = get_menu_flavors(shop_id, selection)
+    hit_id = hit_of_the_day.pk if hit_of_the_day else None
+    cards = {str(f.pk): _card_fingerprint(f, f.pk == hit_id) for f in flavors}
+
+    os.makedirs(settings.MENU_EVENTS_DIR, exist_ok=True)
+    path = _state_path(shop_id)
+    with open(f'{path}.lock', 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+        state = _read_state(path) or {'version': 0, 'order': [], 'hit': None, 'cards': {}, 'events': []}
+        order = [f.pk for f in flavors]
+        changed = [f for f in flavors if state['cards'].get(str(f.pk)) != cards[str(f.pk)]]
+        removed = [int(pk) for pk in state['cards'] if pk not in cards]
+        if order == state['order'] and hit_id == state['hit'] and not changed and not removed:
+            if state.get('next_publish_at') != next_publish_at:
+                _write_state(path, dict(state, next_publish_at=next_publish_at))
+            return None
+
+        event = {
+            'version': state['version'] + 1,
+            'prev': state['version'],
+            'order': order,
+            'hit': hit_id,
+            'removed': removed,
+            'cards': {
+                f.pk: render_to_string('flavors/partials/flavor_card.html', {
+                    'flavor': f,
+                    'hit_of_the_day': hit_of_the_day,
+                })
+                for f in changed
+            },
+        }
+        _write_state(path, {
+            'version': event['version'],
+            'order': order,
+            'hit': hit_id,
+            'cards': cards,
+            'events': (state['events'] + [event])[-EVENTS_KEPT:],
+            'next_publish_at': next_publish_at,
+        })
+        _write_file(_version_path(shop_id), lambda f: f.write(str(event['version'])))
+    logger.info(f"menu event shop={shop_id} version={event['version']} changed={len(changed)} removed={len(removed)}")
+    return event
+
+
+class MenuBroker:
+    """In-process fan-out of menu events to SSE connections, fed by one file poller."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)  # shop id -> {asyncio.Queue}
+        self._seen = {}  # shop id -> (mtime_ns, last version delivered, next publish timestamp)
+        self._task = None
+
+    def subscribe(self, shop_id):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        if not self._subscribers[shop_id]:
+            state = _read_state(_state_path(shop_id)) or {}
+            self._seen[shop_id] = self._stat(shop_id), state.get('version', 0), state.get('next_publish_at')
+        self._subscribers[shop_id].add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._poll())
+        return queue
+
+    def unsubscribe(self, shop_id, queue):
+        self._subscribers[shop_id].discard(queue)
+        if not self._subscribers[shop_id]:
+            del self._subscribers[shop_id]
+            self._seen.pop(shop_id, None)
+
+    def _stat(self, shop_id):
+        try:
+            return os.stat(_state_path(shop_id)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    async def _poll(self):
+        while self._subscribers:
+            await asyncio.sleep(POLL_INTERVAL)
+            for shop_id in list(self._subscribers):
+                mtime, last_version, next_publish_at = self._seen.get(shop_id, (None, 0, None))
+                if next_publish_at is not None and timezone.now().timestamp() >= next_publish_at:
+                    # A staged selection just went live; pollers in other processes may
+                    # race here, and all but the first find the menu unchanged
+                    self._seen[shop_id] = mtime, last_version, None
+                    await sync_to_async(_publish_and_close, thread_sensitive=False)(shop_id)
+                new_mtime = self._stat(shop_id)
+                if new_mtime == mtime:
+                    continue
+                state = _read_state(_state_path(shop_id)) or {'events': []}
+                self._seen[shop_id] = new_mtime, state.get('version', last_version), state.get('next_publish_at')
+                for event in state['events']:
+                    if event['version'] > last_version:
+                        self._broadcast(shop_id, event)
+
+    def _broadcast(self, shop_id, event):
+        for queue in list(self._subscribers.get(shop_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Skipped events leave a version gap, and the client reloads the page
+                pass
+
+
+def _publish_and_close(shop_id):
+    try:
+        publish_menu_event(shop_id)
+    except Exception:
+        logger.exception(f'Publishing the menu of shop {shop_id} failed')
+    finally:
+        # Runs in an executor thread outside any request, so nothing else closes it
+        connection.close()
+
+
+broker = MenuBroker()
+
+
+def format_event(event):
+    """Serialize an event in the text/event-stream format."""
+    return f"id: {event['version']}\nevent: menu\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(shop_id, last_event_id=None):
+    """
+    Yield SSE messages for one connection until the client disconnects.
+    On reconnect (Last-Event-ID) the kept events the client missed are replayed.
+    """
+    queue = broker.subscribe(shop_id)
+    try:
+        yield f'retry: {POLL_INTERVAL * 5 * 1000}\n\n'
+        if last_event_id is not None:
+            state = _read_state(_state_path(shop_id)) or {'events': []}
+            for event in state['events']:
+                if event['version'] > last_event_id:
+                    yield format_event(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(shop_id, queue)
@@ -1,16 +1,56 @@
 from django import forms
 from django.core.exceptions import ValidationError
 import json
+from . import uploads
 from .models import Flavor
 
+MIN_PHOTO_SIZE = 200  # px, shortest side
+MAX_UPLOAD_DIMENSION = 10000  # px, longest side; originals are resized to 1200px anyway
+
 
 class FlavorForm(forms.ModelForm):
     tags = forms.CharField(required=False, widget=forms.HiddenInput())
+    # Id of a completed resumable upload (uploads.py), sent instead of the photo itself
+    upload_id = forms.CharField(required=False, max_length=32, widget=forms.HiddenInput())
 
     class Meta:
         model = Flavor
         fields = ['name', 'photo', 'description', 'flavor_type', 'tags', 'is_seasonal']
 
+    def __init__(self, *args, shop=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if shop is not None:
+            self.instance.shop = shop
+
+    def clean_name(self):
+        # (shop, name) uniqueness isn't validated by the form since shop isn't a form field
+        name = self.cleaned_data.get('name')
+        if name and self.instance.shop_id:
+            duplicates = Flavor.objects.for_shop(self.instance.shop_id).filter(name=name)
+            if self.instance.pk:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise ValidationError('Smak o tej nazwie już istnieje.')
+        return name
+
+    def _check_photo_size(self, photo):
+        # ImageField leaves the opened (not decoded) image on new uploads
+        image = getattr(photo, 'image', None)
+        if image is not None:
+            width, height = image.size
+            if min(width, height) < MIN_PHOTO_SIZE:
+                raise ValidationError(
+                    f'Zdjęcie jest za małe ({width}×{height} px). Minimum to {MIN_PHOTO_SIZE} px.'
+                )
+            if max(width, height) > MAX_UPLOAD_DIMENSION:
+                raise ValidationError(
+                    f'Zdjęcie jest za duże ({width}×{height} px). Maksimum to {MAX_UPLOAD_DIMENSION} px.'
+                )
+        return photo
+
+    def clean_photo(self):
+        return self._check_photo_size(self.cleaned_data.get('photo'))
+
     def clean_tags(self):
         tags_json = self.cleaned_data.get('tags', '[]')
         try:
@@ -25,3 +65,29 @@ class FlavorForm(forms.ModelForm):
             raise ValidationError('Możesz wybrać maksymalnie 5 tagów')
 
         return tags
+
+    def clean(self):
+        cleaned_data = super().clean()
+        upload_id = cleaned_data.get('upload_id')
+        if upload_id and not self.files.get('photo') and self.instance.shop_id:
+            photo = uploads.open_completed(upload_id, self.instance.shop)
+            if photo is None:
+                self.add_error('photo', 'Przesyłanie zdjęcia nie zostało ukończone. Wybierz zdjęcie ponownie.')
+                return cleaned_data
+            try:
+                # Same checks as a photo sent with the form
+                photo = self.fields['photo'].clean(photo, self.initial.get('photo'))
+                cleaned_data['photo'] = self._check_photo_size(photo)
+            except ValidationError as e:
+                photo.close()
+                self.add_error('photo', e)
+        return cleaned_data
+
+    def save(self, commit=True):
+        flavor = super().save(commit)
+        upload_id = self.cleaned_data.get('upload_id')
+        if commit and upload_id:
+            # Flavor.save has stored the optimized copy; the spooled original can go
+            self.cleaned_data['photo'].close()
+            uploads.discard(upload_id)
+        return flavor
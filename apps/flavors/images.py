@@ -0,0 +1,72 @@
+"""
+Photo processing pipeline shared by Flavor.save and the bulk import.
+
+Functions here take and return plain bytes so they can run in a process pool.
+Pillow is imported on first use: it is only needed when a photo is saved, and
+importing it at startup would slow down every worker boot (see `manage.py importtime`).
+"""
+import posixpath
+import time
+from io import BytesIO
+
+from . import metrics
+from .perf import timed
+
+MAX_PHOTO_SIZE = (1200, 1200)
+WEBP_QUALITY = 85
+# WebP already within MAX_PHOTO_SIZE (resized in the browser) is stored as uploaded below this size
+PASSTHROUGH_MAX_BYTES = 1024 * 1024
+THUMBNAIL_SIZE = (160, 160)  # panel list thumbnails are 48-56 CSS px, so ~3x DPR
+THUMBNAIL_QUALITY = 75
+
+
+def optimize_photo(data):
+    """
+    Resize an image to max 1200px (keeping aspect ratio) and encode it as WebP.
+    Takes the original file bytes, returns the WebP bytes.
+    """
+    from PIL import Image
+
+    started = time.perf_counter()
+    with timed('img'):
+        img = Image.open(BytesIO(data))
+
+        # The flavor form already resizes and encodes photos in the browser; don't re-encode those
+        if (img.format == 'WEBP' and len(data) <= PASSTHROUGH_MAX_BYTES
+                and img.width <= MAX_PHOTO_SIZE[0] and img.height <= MAX_PHOTO_SIZE[1]):
+            return data
+
+        # Let the JPEG decoder downscale by a power of two while decoding (much cheaper for phone photos)
+        img.draft('RGB', MAX_PHOTO_SIZE)
+
+        # Convert RGBA/P to RGB for WebP compatibility
+        if img.mode in ('RGBA', 'P'):
+            img = img.convert('RGB')
+
+        img.thumbnail(MAX_PHOTO_SIZE, Image.BICUBIC)
+
+        buffer = BytesIO()
+        img.save(buffer, format='WEBP', quality=WEBP_QUALITY)
+    metrics.observe('flavors_image_processing_seconds', time.perf_counter() - started)
+    return buffer.getvalue()
+
+
+def make_thumbnail(data):
+    """Small WebP for panel lists, made from the (already optimized) photo bytes."""
+    from PIL import Image
+
+    with timed('img'):
+        img = Image.open(BytesIO(data))
+        if img.mode in ('RGBA', 'P'):
+            img = img.convert('RGB')
+        img.thumbnail(THUMBNAIL_SIZE, Image.BICUBIC)
+
+        buffer = BytesIO()
+        img.save(buffer, format='WEBP', quality=THUMBNAIL_QUALITY)
+    return buffer.getvalue()
+
+
+def thumbnail_name(photo_name):
+    """Storage name of a photo's thumbnail: flavors/2025/01/<uuid>.webp -> flavors/2025/01/thumbs/<uuid>.webp"""
+    head, tail = posixpath.split(photo_name)
+    return posixpath.join(head, 'thumbs', posixpath.splitext(tail)[0] + '.webp')
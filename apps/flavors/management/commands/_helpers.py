@@ -0,0 +1,17 @@
+from django.core.management.base import CommandError
+
+from apps.flavors.models import Shop
+
+
+def get_shop(slug=None):
+    """Return the shop with the given slug, or the default (first) shop."""
+    if slug:
+        try:
+            return Shop.objects.get(slug=slug)
+        except Shop.DoesNotExist:
+            raise CommandError(f"Shop '{slug}' does not exist.")
+
+    shop = Shop.objects.order_by('pk').first()
+    if shop is None:
+        raise CommandError('No shop exists yet. Create one with `manage.py create_shop`.')
+    return shop
@@ -0,0 +1,125 @@
+import os
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from apps.flavors.clock import local_today
+from apps.flavors.menu import get_published_selection
+from apps.flavors.models import DailySelection, Flavor, MenuHistory, Shop
+from apps.flavors.signals import deferred_menu_changes
+
+DB_SESSION_ENGINES = ('django.contrib.sessions.backends.db', 'django.contrib.sessions.backends.cached_db')
+POSTGRES_VACUUMED_TABLES = (
+    DailySelection._meta.db_table,
+    DailySelection.flavors.through._meta.db_table,
+    MenuHistory._meta.db_table,
+    Session._meta.db_table,
+)
+
+
+def _mb(size):
+    return f'{size / (1024 * 1024):.1f} MB'
+
+
+class Command(BaseCommand):
+    help = (
+        "Database housekeeping. Moves daily selections older than --keep-days into MenuHistory "
+        "(one compact row per day instead of a selection plus a row per flavor), deletes expired "
+        "sessions, then reclaims space: ANALYZE, VACUUM and wal_checkpoint(TRUNCATE) on SQLite, "
+        "VACUUM ANALYZE on PostgreSQL. Run from cron, e.g. nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type=int, default=90, help='Keep this many days of full selections')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--no-vacuum', action='store_true', help='Skip VACUUM (it rewrites the whole file)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be compacted')
+
+    def handle(self, *args, **options):
+        cutoff = local_today() - timedelta(days=options['keep_days'])
+        # A shop that hasn't published anything since the cutoff still shows its last menu
+        live = [selection.pk for selection in map(get_published_selection, Shop.objects.all()) if selection]
+        old = DailySelection.objects.filter(date__lt=cutoff).exclude(pk__in=live)
+        expired_sessions = Session.objects.filter(expire_date__lt=timezone.now())
+
+        if options['dry_run']:
+            self.stdout.write(
+                f'Would compact {old.count()} selections before {cutoff} '
+                f'and delete {expired_sessions.count()} expired sessions.'
+            )
+            return
+
+        size_before = self.database_size()
+        # Each deleted selection and flavor link sends a menu signal; bump and publish once per shop
+        with deferred_menu_changes():
+            compacted = self.compact(old, options['batch_size'])
+        self.stdout.write(f'Compacted {compacted} selections before {cutoff} into menu history.')
+
+        if settings.SESSION_ENGINE in DB_SESSION_ENGINES:
+            deleted, _ = expired_sessions.delete()
+            self.stdout.write(f'Deleted {deleted} expired sessions.')
+        else:
+            import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
+
+        self.reclaim(vacuum=not options['no_vacuum'])
+        size_after = self.database_size()
+        if size_before is not None:
+            self.stdout.write(self.style.SUCCESS(
+                f'Database {_mb(size_before)} -> {_mb(size_after)} '
+                f'(reclaimed {_mb(max(size_before - size_after, 0))}).'
+            ))
+
+    def compact(self, selections, batch_size):
+        flavors = Prefetch('flavors', queryset=Flavor.objects.only('pk', 'name'))
+        total = 0
+        while True:
+            batch = list(selections.order_by('pk').prefetch_related(flavors)[:batch_size])
+            if not batch:
+                return total
+            history = [
+                MenuHistory(
+                    shop_id=selection.shop_id,
+                    date=selection.date,
+                    flavors=[[flavor.pk, flavor.name] for flavor in selection.get_ordered_flavors()],
+                    hit_of_the_day=selection.hit_of_the_day_id,
+                )
+                for selection in batch
+            ]
+            with transaction.atomic():
+                # ignore_conflicts: a batch interrupted after this insert is simply redone
+                MenuHistory.objects.bulk_create(history, ignore_conflicts=True)
+                DailySelection.objects.filter(pk__in=[selection.pk for selection in batch]).delete()
+            total += len(batch)
+
+    def database_size(self):
+        """Size of the database in bytes (SQLite: file + WAL), or None if unknown."""
+        if connection.vendor == 'sqlite':
+            path = str(connection.settings_dict['NAME'])
+            return sum(os.path.getsize(p) for p in (path, f'{path}-wal') if os.path.exists(p))
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_database_size(current_database())')
+                return cursor.fetchone()[0]
+        return None
+
+    def reclaim(self, vacuum=True):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+                if vacuum:
+                    cursor.execute('VACUUM')
+                # VACUUM goes through the WAL; fold it back into the file and truncate the log
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                busy, _, _ = cursor.fetchone()
+                if busy:
+                    self.stdout.write(self.style.WARNING('WAL not truncated: readers were active, it will shrink later.'))
+            elif connection.vendor == 'postgresql':
+                for table in POSTGRES_VACUUMED_TABLES:
+                    cursor.execute(f'VACUUM (ANALYZE) {connection.ops.quote_name(table)}' if vacuum
+                                   else f'ANALYZE {connection.ops.quote_name(table)}')
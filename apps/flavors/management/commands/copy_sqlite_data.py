@@ -0,0 +1,89 @@
+import os
+import tempfile
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+
+# Recreated by `migrate` on the target, so they are matched by natural keys instead of copied
+EXCLUDED_MODELS = ['contenttypes', 'auth.permission']
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy all data from the SQLite database (the 'sqlite' alias) into the default "
+        "database, then verify row counts. Run `migrate` on the target first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default='sqlite', help="Source database alias (default: sqlite)")
+        parser.add_argument('--verify-only', action='store_true', help='Only compare row counts')
+
+    def handle(self, *args, **options):
+        source = options['source']
+        self.verbosity = options['verbosity']
+        if source not in connections.settings:
+            raise CommandError(
+                f"Database alias '{source}' is not configured. "
+                "Set DATABASE_URL with DJANGO_SETTINGS_MODULE=config.settings_production."
+            )
+        if connections[source].vendor != 'sqlite' or connections['default'].vendor == 'sqlite':
+            raise CommandError('Expected a SQLite source and a non-SQLite default database.')
+
+        if not options['verify_only']:
+            self._check_target_ready()
+            self._copy(source)
+
+        mismatches = self._verify(source)
+        if mismatches:
+            raise CommandError(f"Verification failed for {mismatches} model(s).")
+        self.stdout.write(self.style.SUCCESS('All row counts match.'))
+
+    def _check_target_ready(self):
+        connection = connections['default']
+        executor = MigrationExecutor(connection)
+        if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+            raise CommandError('Target database has unapplied migrations. Run `manage.py migrate` first.')
+
+        # The default shop created by migrations is fine: it's overwritten by the source row
+        Flavor = apps.get_model('flavors', 'Flavor')
+        User = apps.get_model('auth', 'User')
+        if Flavor.objects.using('default').exists() or User.objects.using('default').exists():
+            raise CommandError('Target database already contains data. Refusing to overwrite it.')
+
+    def _copy(self, source):
+        fd, dump_path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            self.stdout.write(f"Dumping '{source}'...")
+            call_command(
+                'dumpdata',
+                database=source,
+                natural_foreign=True,
+                natural_primary=True,
+                exclude=EXCLUDED_MODELS,
+                output=dump_path,
+                verbosity=0,
+            )
+            # loaddata runs in one transaction and resets PostgreSQL sequences afterwards
+            self.stdout.write('Loading into default...')
+            call_command('loaddata', dump_path, database='default', verbosity=self.verbosity)
+        finally:
+            os.remove(dump_path)
+
+    def _verify(self, source):
+        mismatches = 0
+        for model in apps.get_models(include_auto_created=True):
+            label = model._meta.label_lower
+            if label.split('.')[0] in EXCLUDED_MODELS or label in EXCLUDED_MODELS:
+                continue
+            source_count = model._base_manager.using(source).count()
+            target_count = model._base_manager.using('default').count()
+            if source_count != target_count:
+                mismatches += 1
+                self.stdout.write(self.style.ERROR(f'{label}: {source_count} -> {target_count}'))
+            elif self.verbosity >= 2:
+                self.stdout.write(f'{label}: {source_count}')
+        return mismatches
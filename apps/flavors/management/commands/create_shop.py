@@ -0,0 +1,36 @@
+from datetime import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.flavors.models import Shop
+
+
+class Command(BaseCommand):
+    help = "Create a shop (tenant) served on the given domain."
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug')
+        parser.add_argument('name')
+        parser.add_argument('--domain', help='Host name serving this shop, e.g. smaki-lodow.pl')
+        parser.add_argument('--publish-time', type=time.fromisoformat, default=time(0, 0),
+                            help="Local time a day's selection goes live, e.g. 11:00 (default: 00:00)")
+        parser.add_argument('--owner', action='append', default=[], help='Username allowed to manage the shop (repeatable)')
+
+    def handle(self, *args, **options):
+        if Shop.objects.filter(slug=options['slug']).exists():
+            raise CommandError(f"Shop '{options['slug']}' already exists.")
+
+        users = list(get_user_model().objects.filter(username__in=options['owner']))
+        missing = set(options['owner']) - {user.username for user in users}
+        if missing:
+            raise CommandError(f"Unknown users: {', '.join(sorted(missing))}")
+
+        shop = Shop.objects.create(
+            slug=options['slug'],
+            name=options['name'],
+            domain=(options['domain'] or '').lower() or None,
+            publish_time=options['publish_time'],
+        )
+        shop.owners.set(users)
+        self.stdout.write(self.style.SUCCESS(f"Created shop '{shop.name}' ({shop.domain or 'no domain'})."))
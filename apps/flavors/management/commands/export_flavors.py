@@ -0,0 +1,77 @@
+import csv
+import json
+import shutil
+import zipfile
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from apps.flavors.models import Flavor
+
+from ._helpers import get_shop
+
+EXPORT_FIELDS = ['name', 'slug', 'description', 'flavor_type', 'tags', 'is_seasonal', 'status', 'photo']
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a shop's flavors as CSV or JSON lines, optionally with a ZIP of photos. "
+        "Memory use stays flat regardless of catalogue size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-', help="Output file (default: stdout)")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+        parser.add_argument('--photos', help='Write photos into this ZIP file')
+        parser.add_argument('--shop', help='Shop slug (default: first shop)')
+        parser.add_argument('--status', choices=['active', 'archived', 'all'], default='all')
+
+    def handle(self, *args, **options):
+        shop = get_shop(options['shop'])
+
+        flavors = Flavor.objects.for_shop(shop).only(*EXPORT_FIELDS).order_by('pk')
+        if options['status'] != 'all':
+            flavors = flavors.filter(status=options['status'])
+
+        out = self.stdout if options['output'] == '-' else open(options['output'], 'w', newline='', encoding='utf-8')
+        # Photos are already WebP-compressed, so store them without deflating again
+        photos_zip = zipfile.ZipFile(options['photos'], 'w', zipfile.ZIP_STORED) if options['photos'] else None
+
+        try:
+            if options['format'] == 'csv':
+                writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS)
+                writer.writeheader()
+                write_row = writer.writerow
+            else:
+                def write_row(row):
+                    out.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+            count = 0
+            for flavor in flavors.iterator(chunk_size=500):
+                photo_name = ''
+                if flavor.photo and photos_zip is not None:
+                    photo_name = f'{flavor.slug}.webp'
+                    with default_storage.open(flavor.photo.name) as src, photos_zip.open(photo_name, 'w') as dst:
+                        shutil.copyfileobj(src, dst)
+
+                row = {
+                    'name': flavor.name,
+                    'slug': flavor.slug,
+                    'description': flavor.description,
+                    'flavor_type': flavor.flavor_type,
+                    'tags': flavor.tags,
+                    'is_seasonal': flavor.is_seasonal,
+                    'status': flavor.status,
+                    'photo': photo_name,
+                }
+                if options['format'] == 'csv':
+                    row['tags'] = json.dumps(flavor.tags, ensure_ascii=False)
+                write_row(row)
+                count += 1
+        finally:
+            if photos_zip is not None:
+                photos_zip.close()
+            if out is not self.stdout:
+                out.close()
+
+        self.stderr.write(self.style.SUCCESS(f'Exported {count} flavors from {shop}.'))
@@ -0,0 +1,187 @@
+import csv
+import json
+import logging
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+
+from apps.flavors.events import publish_menu_event
+from apps.flavors.images import make_thumbnail, optimize_photo, thumbnail_name
+from apps.flavors.models import Flavor, uuid_upload_to
+from apps.flavors.tenancy import bump_tenant_version
+
+from ._helpers import get_shop
+
+logger = logging.getLogger(__name__)
+
+FLAVOR_TYPES = {value for value, _ in Flavor.FLAVOR_TYPES}
+STATUSES = {value for value, _ in Flavor.STATUS_CHOICES}
+TRUE_VALUES = ('true', '1', 'yes', 'tak')
+
+
+class Command(BaseCommand):
+    help = (
+        "Import flavors from CSV or JSON lines (as written by export_flavors), "
+        "with photos from a ZIP. Rows are inserted with bulk_create in batches and "
+        "photos are processed in a process pool with the same pipeline as Flavor.save."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='CSV or .jsonl file')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Default: from file extension')
+        parser.add_argument('--photos', help='ZIP file with the photos referenced in the "photo" column')
+        parser.add_argument('--shop', help='Shop slug (default: first shop)')
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Image processing processes')
+
+    def handle(self, *args, **options):
+        shop = get_shop(options['shop'])
+        fmt = options['format'] or ('jsonl' if options['input'].endswith(('.jsonl', '.json')) else 'csv')
+        photos_zip = zipfile.ZipFile(options['photos']) if options['photos'] else None
+
+        self.shop = shop
+        self.photos_zip = photos_zip
+        self.zip_names = set(photos_zip.namelist()) if photos_zip else set()
+        self.seen_names = set()
+        self.seen_slugs = set()
+        created = skipped = 0
+
+        try:
+            with open(options['input'], newline='', encoding='utf-8') as f, \
+                    ProcessPoolExecutor(max_workers=options['workers']) as pool:
+                rows = self._read_rows(f, fmt)
+                while batch := list(islice(rows, options['batch_size'])):
+                    flavors = self._build_batch(batch)
+                    skipped += len(batch) - len(flavors)
+                    self._attach_photos(flavors, pool)
+                    try:
+                        with transaction.atomic():
+                            Flavor.objects.bulk_create([flavor for flavor, _ in flavors])
+                    except Exception:
+                        # Don't leave orphaned photo files behind for a failed batch
+                        for flavor, _ in flavors:
+                            if flavor.photo:
+                                default_storage.delete(flavor.photo.name)
+                                default_storage.delete(thumbnail_name(flavor.photo.name))
+                        raise
+                    created += len(flavors)
+                    self.stdout.write(f'  {created} imported...')
+        finally:
+            if created:
+                # bulk_create sends no signals: invalidate the menu and publish it as the panel
+                # would, also when a later batch failed after earlier ones were committed
+                transaction.on_commit(lambda: self._menu_changed(shop))
+
+        if photos_zip is not None:
+            photos_zip.close()
+        self.stdout.write(self.style.SUCCESS(f'Imported {created} flavors into {shop}, skipped {skipped}.'))
+
+    def _menu_changed(self, shop):
+        bump_tenant_version(shop, 'menu')
+        publish_menu_event(shop.pk)
+
+    def _read_rows(self, f, fmt):
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+            return
+        for line_no, line in enumerate(f, start=1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise CommandError(f'Line {line_no}: invalid JSON ({e})')
+
+    def _build_batch(self, batch):
+        """Validate rows and build unsaved Flavors. Returns [(flavor, photo_name)]."""
+        names = [(row.get('name') or '').strip() for row in batch]
+        slugs = [row.get('slug') or slugify(name) for row, name in zip(batch, names)]
+        # One query per batch for both (shop, name) and (shop, slug) uniqueness
+        existing = Flavor.objects.for_shop(self.shop).filter(name__in=names) | \
+            Flavor.objects.for_shop(self.shop).filter(slug__in=slugs)
+        existing_names, existing_slugs = set(), set()
+        for existing_name, existing_slug in existing.values_list('name', 'slug'):
+            existing_names.add(existing_name)
+            existing_slugs.add(existing_slug)
+
+        flavors = []
+        for row, name, slug in zip(batch, names, slugs):
+            tags = row.get('tags') or []
+            if isinstance(tags, str):
+                try:
+                    tags = json.loads(tags) if tags.startswith('[') else [t.strip() for t in tags.split('|') if t.strip()]
+                except json.JSONDecodeError:
+                    tags = None
+
+            error = self._validate(row, name, tags)
+            if not error and (name in existing_names or name in self.seen_names):
+                error = 'already exists'
+            if not error and (slug in existing_slugs or slug in self.seen_slugs):
+                error = f"slug '{slug}' already taken"
+            if error:
+                self.stderr.write(f'Skipping "{name}": {error}')
+                continue
+            self.seen_names.add(name)
+            self.seen_slugs.add(slug)
+
+            is_seasonal = row.get('is_seasonal')
+            if isinstance(is_seasonal, str):
+                is_seasonal = is_seasonal.strip().lower() in TRUE_VALUES
+
+            flavors.append((Flavor(
+                shop=self.shop,
+                name=name,
+                slug=slug,
+                description=row.get('description') or '',
+                flavor_type=row.get('flavor_type') or 'milk',
+                tags=tags,
+                is_seasonal=bool(is_seasonal),
+                status=row.get('status') or 'active',
+            ), row.get('photo') or ''))
+        return flavors
+
+    def _validate(self, row, name, tags):
+        if not name:
+            return 'missing name'
+        if not isinstance(tags, list) or len(tags) > 5:
+            return 'tags must be a list of at most 5 tags'
+        if (row.get('flavor_type') or 'milk') not in FLAVOR_TYPES:
+            return f"unknown flavor_type '{row.get('flavor_type')}'"
+        if (row.get('status') or 'active') not in STATUSES:
+            return f"unknown status '{row.get('status')}'"
+        photo = row.get('photo')
+        if photo and photo not in self.zip_names:
+            return f"photo '{photo}' not found in ZIP"
+        return None
+
+    def _attach_photos(self, flavors, pool):
+        """Optimize the batch's photos in parallel and store them under UUID names."""
+        with_photos = [(flavor, photo) for flavor, photo in flavors if photo]
+        if not with_photos:
+            return
+
+        originals = [self.photos_zip.read(photo) for _, photo in with_photos]
+        results = pool.map(_optimize_or_none, originals)
+        for (flavor, photo), result in zip(with_photos, results):
+            if result is None:
+                self.stderr.write(f'Photo "{photo}" for "{flavor.name}" could not be processed, skipping it')
+                continue
+            data, thumbnail = result
+            flavor.photo.name = default_storage.save(uuid_upload_to(flavor, photo), ContentFile(data))
+            default_storage.save(thumbnail_name(flavor.photo.name), ContentFile(thumbnail))
+
+
+def _optimize_or_none(data):
+    """Process pool worker: returns (photo, thumbnail) WebP bytes, or None if the image is unreadable."""
+    try:
+        optimized = optimize_photo(data)
+        return optimized, make_thumbnail(optimized)
+    except Exception as e:
+        logger.warning(f'Image processing failed: {e}')
+        return None
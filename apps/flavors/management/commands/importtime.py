@@ -0,0 +1,83 @@
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a fresh worker process imports before it can answer its first request
+TARGETS = {
+    'wsgi': 'import config.wsgi',
+    'asgi': 'import config.asgi',
+    'manage': 'import django; django.setup()',
+}
+# Views and everything they import are loaded with the URLconf, on the first request
+LOAD_URLS = '; from django.urls import get_resolver; get_resolver().url_patterns'
+
+# "import time:       self [us] |  cumulative | imported package"
+LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(output):
+    """Return [(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    modules = []
+    for line in output.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            modules.append((match[4], int(match[1]), int(match[2]), (len(match[3]) - 1) // 2))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure worker startup with `python -X importtime`: total import time and the "
+        "slowest packages and modules. With --budget, fails when startup exceeds it "
+        "(e.g. in CI, to keep heavy imports like Pillow off the boot path)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(TARGETS), default='wsgi', help='Entry point to import')
+        parser.add_argument('--runs', type=int, default=3, help='Report the fastest of this many cold starts')
+        parser.add_argument('--limit', type=int, default=15, help='Rows per table')
+        parser.add_argument('--budget', type=float, help='Fail if imports take longer than this (ms)')
+
+    def run_once(self, code):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        wall = time.perf_counter() - started
+        if result.returncode != 0:
+            raise CommandError(f'Importing failed:\n{result.stderr[-2000:]}')
+        return wall, parse_importtime(result.stderr)
+
+    def handle(self, *args, **options):
+        code = TARGETS[options['target']] + LOAD_URLS
+        runs = [self.run_once(code) for _ in range(max(options['runs'], 1))]
+        wall, modules = min(runs, key=lambda run: sum(m[2] for m in run[1] if m[3] == 0))
+        total_ms = sum(cumulative for _, _, cumulative, depth in modules if depth == 0) / 1000
+
+        # A package's cost: the self time of all its modules, wherever they were imported from
+        packages = defaultdict(int)
+        for name, own, _, _ in modules:
+            packages[name.split('.')[0]] += own
+        limit = options['limit']
+
+        self.stdout.write(
+            f"{options['target']}: {len(modules)} modules, imports {total_ms:.0f} ms, "
+            f"process {wall * 1000:.0f} ms (best of {len(runs)})"
+        )
+        self.stdout.write('\nSlowest packages:')
+        for name, own in sorted(packages.items(), key=lambda item: -item[1])[:limit]:
+            self.stdout.write(f'  {own / 1000:8.1f} ms  {name}')
+        self.stdout.write('\nSlowest modules (self):')
+        for name, own, _, _ in sorted(modules, key=lambda m: -m[1])[:limit]:
+            self.stdout.write(f'  {own / 1000:8.1f} ms  {name}')
+
+        if options['budget'] is not None and total_ms > options['budget']:
+            raise CommandError(f"Startup imports take {total_ms:.0f} ms, over the {options['budget']:.0f} ms budget.")
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.flavors.menu import build_menu_grid, get_published_selection
+from apps.flavors.models import DailySelection, Shop
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render the homepage menu for selections going live soon, so the swap at "
+        "publish time is served from cache. Run from cron, e.g. every 15 minutes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=60, help='Warm selections publishing within this many minutes')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        horizon = now + timedelta(minutes=options['ahead'])
+
+        for shop in Shop.objects.all():
+            # Keep the live menu warm as well
+            build_menu_grid(shop, get_published_selection(shop, now))
+
+            staged = DailySelection.objects.for_shop(shop).filter(
+                published_at__gt=now, published_at__lte=horizon,
+            ).select_related('hit_of_the_day')
+            for selection in staged:
+                build_menu_grid(shop, selection)
+                self.stdout.write(
+                    f'{shop}: warmed menu for {selection.date}, '
+                    f'live at {timezone.localtime(selection.published_at):%H:%M}'
+                )
@@ -0,0 +1,181 @@
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+
+from apps.flavors.clock import local_today
+from apps.flavors.events import publish_menu_event
+from apps.flavors.images import make_thumbnail, optimize_photo, thumbnail_name
+from apps.flavors.models import PREDEFINED_TAGS, DailySelection, Flavor
+from apps.flavors.tenancy import bump_tenant_version
+
+from ._helpers import get_shop
+
+logger = logging.getLogger(__name__)
+
+BASES = [
+    'Wanilia', 'Czekolada', 'Truskawka', 'Malina', 'Pistacja', 'Orzech laskowy', 'Mango', 'Cytryna',
+    'Kawa', 'Karmel', 'Jagoda', 'Wiśnia', 'Śmietanka', 'Kokos', 'Banan', 'Marakuja', 'Porzeczka',
+    'Agrest', 'Rabarbar', 'Gruszka', 'Jabłko', 'Śliwka', 'Brzoskwinia', 'Morela', 'Arbuz', 'Melon',
+    'Limonka', 'Pomarańcza', 'Grejpfrut', 'Figa', 'Miód', 'Sernik', 'Tiramisu', 'Chałwa', 'Mak',
+    'Ciastko', 'Twaróg', 'Jogurt', 'Matcha', 'Słony karmel',
+]
+MODIFIERS = [
+    'z bazylią', 'z miętą', 'z rozmarynem', 'z lawendą', 'z imbirem', 'z chili', 'z solą morską',
+    'z kardamonem', 'z cynamonem', 'z wanilią', 'z czekoladą', 'z orzechami', 'z migdałami',
+    'z miodem', 'z limonką', 'z pieprzem', 'z kruszonką', 'z bezą', 'z karmelem', 'z nutą rumu',
+    'sycylijska', 'domowa', 'bałtycka', 'tatrzańska', 'babci',
+]
+# Tags a generated flavor may get; 'hit' is shown from hit_of_the_day instead
+SEED_TAGS = sorted(tag for tag in PREDEFINED_TAGS if tag != 'hit')
+
+BATCH_SIZE = 500
+
+
+def _parse_size(value):
+    try:
+        width, height = (int(part) for part in value.lower().split('x'))
+    except ValueError:
+        raise CommandError(f"Photo size must look like 1600x1200, got '{value}'.")
+    return width, height
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill a shop with a synthetic, reproducible dataset for performance work: flavors with "
+        "Polish names, tags and generated photos (in a process pool, through the same image "
+        "pipeline as uploads), and a history of daily selections with hits and orderings. "
+        "The same --seed always produces the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', help='Shop slug (default: first shop)')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--flavors', type=int, default=200)
+        parser.add_argument('--days', type=int, default=365, help='Days of selection history, ending today')
+        parser.add_argument('--per-day', type=int, default=16, help='Average flavors in a selection')
+        parser.add_argument('--photo-size', type=_parse_size, default=(1600, 1200),
+                            help='Size of the generated "camera" photos, e.g. 4000x3000')
+        parser.add_argument('--photo-ratio', type=float, default=0.9, help='Share of flavors with a photo')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Image generation processes')
+        parser.add_argument('--flush', action='store_true', help="Delete the shop's flavors and selections first")
+
+    def handle(self, *args, **options):
+        shop = get_shop(options['shop'])
+        rng = random.Random(options['seed'])
+
+        if options['flush']:
+            photos = list(Flavor.objects.for_shop(shop).exclude(photo='').values_list('photo', flat=True))
+            DailySelection.objects.for_shop(shop).delete()
+            Flavor.objects.for_shop(shop).delete()
+            for name in photos:
+                default_storage.delete(name)
+                default_storage.delete(thumbnail_name(name))
+        elif Flavor.objects.for_shop(shop).exists():
+            raise CommandError(f'{shop} already has flavors. Use --flush to replace them.')
+
+        flavors, with_photos = self._build_flavors(shop, rng, options['flavors'], options['photo_ratio'])
+        self._generate_photos(with_photos, options['seed'], options['photo_size'], options['workers'])
+        with transaction.atomic():
+            Flavor.objects.bulk_create(flavors, batch_size=BATCH_SIZE)
+            selections = self._create_history(shop, rng, flavors, options['days'], options['per_day'])
+
+        # bulk_create sends no signals: invalidate the menu and publish it as the panel would
+        bump_tenant_version(shop, 'menu')
+        publish_menu_event(shop.pk)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {shop} (seed {options['seed']}): {len(flavors)} flavors, "
+            f"{len(with_photos)} photos, {selections} daily selections."
+        ))
+
+    def _build_flavors(self, shop, rng, count, photo_ratio):
+        """Build unsaved flavors. Returns (flavors, [(index, flavor)] of those getting a photo)."""
+        names = [f'{base} {modifier}' for base in BASES for modifier in MODIFIERS]
+        rng.shuffle(names)
+        flavors, with_photos = [], []
+        for index in range(count):
+            name = names[index % len(names)]
+            if index >= len(names):
+                name = f'{name} {index // len(names) + 1}'
+            flavor = Flavor(
+                shop=shop,
+                name=name,
+                slug=slugify(name),
+                description=f'{name}. Robione na miejscu, codziennie rano.',
+                flavor_type='sorbet' if rng.random() < 0.3 else 'milk',
+                tags=rng.sample(SEED_TAGS, rng.choice([0, 0, 1, 1, 2, 3])),
+                is_seasonal=rng.random() < 0.2,
+                status='archived' if rng.random() < 0.1 else 'active',
+            )
+            if rng.random() < photo_ratio:
+                with_photos.append((index, flavor))
+            flavors.append(flavor)
+        return flavors, with_photos
+
+    def _generate_photos(self, with_photos, seed, size, workers):
+        if not with_photos:
+            return
+        jobs = [(seed, index, size) for index, _ in with_photos]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_generate_photo, jobs, chunksize=max(len(jobs) // (4 * (workers or 1)), 1))
+            for done, ((index, flavor), (data, thumbnail)) in enumerate(zip(with_photos, results), start=1):
+                name = default_storage.save(f'flavors/seed-{seed}/{index:05d}.webp', ContentFile(data))
+                default_storage.save(thumbnail_name(name), ContentFile(thumbnail))
+                flavor.photo.name = name
+                if done % 100 == 0:
+                    self.stdout.write(f'  {done} photos...')
+
+    def _create_history(self, shop, rng, flavors, days, per_day):
+        active = [flavor for flavor in flavors if flavor.status == 'active'] or flavors
+        today = local_today()
+        selections, chosen = [], []
+        for offset in range(days, 0, -1):
+            date = today - timedelta(days=offset - 1)
+            count = min(max(per_day + rng.randint(-4, 4), 1), len(active))
+            day_flavors = rng.sample(active, count)
+            selections.append(DailySelection(
+                shop=shop,
+                date=date,
+                hit_of_the_day=rng.choice(day_flavors) if rng.random() < 0.8 else None,
+                display_order=[flavor.pk for flavor in day_flavors],
+                # bulk_create skips DailySelection.save(), which normally fills this in
+                published_at=shop.publish_datetime(date),
+            ))
+            chosen.append(day_flavors)
+        DailySelection.objects.bulk_create(selections, batch_size=BATCH_SIZE)
+
+        Through = DailySelection.flavors.through
+        Through.objects.bulk_create([
+            Through(dailyselection_id=selection.pk, flavor_id=flavor.pk)
+            for selection, day_flavors in zip(selections, chosen)
+            for flavor in day_flavors
+        ], batch_size=BATCH_SIZE)
+        return len(selections)
+
+
+def _generate_photo(job):
+    """
+    Process pool worker: a deterministic "camera" JPEG of the given size for
+    (seed, index), run through the upload pipeline. Returns (photo, thumbnail) WebP bytes.
+    """
+    from PIL import Image
+
+    seed, index, (width, height) = job
+    rng = random.Random(f'{seed}:{index}')
+    # Smooth colour blobs from a tiny random image, plus fine grain so it compresses like a photo
+    img = Image.frombytes('RGB', (8, 6), rng.randbytes(8 * 6 * 3)).resize((width, height), Image.BICUBIC)
+    grain = Image.frombytes('L', (width, height), rng.randbytes(width * height)).convert('RGB')
+    img = Image.blend(img, grain, 0.08)
+
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=90)
+    optimized = optimize_photo(buffer.getvalue())
+    return optimized, make_thumbnail(optimized)
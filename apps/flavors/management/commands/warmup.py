@@ -0,0 +1,161 @@
+import logging
+import os
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.template.loader import get_template
+from django.urls import reverse
+
+from apps.flavors.images import make_thumbnail, thumbnail_name
+from apps.flavors.menu import build_menu_grid, get_menu_flavors, get_published_selection
+from apps.flavors.models import DailySelection, Flavor, Shop
+from apps.flavors.tenancy import resolve_shop
+from apps.flavors.views_api import build_menu_payload
+
+logger = logging.getLogger(__name__)
+
+READ_BLOCK_SIZE = 1024 * 1024  # bytes
+URL_TIMEOUT = 10  # seconds
+PHOTOS_IN_FLIGHT = 2  # per worker; the parent holds only these photos in memory
+
+
+class Command(BaseCommand):
+    help = (
+        "Warm up after a deploy: compile all templates, fill the shared cache (shop lookups, "
+        "menu grids, API payloads), read the SQLite file into the OS page cache and run the "
+        "hot queries, and generate missing photo thumbnails in a process pool. With --url, "
+        "also sends requests to the restarted server so its workers render once before customers do."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Thumbnail processes')
+        parser.add_argument('--url', help='Base URL of the running site, e.g. https://lody.example.com')
+        parser.add_argument('--requests', type=int, default=8, help='Concurrent requests per URL, to reach every worker')
+
+    def handle(self, *args, **options):
+        self.step('templates', self.compile_templates)
+        self.step('database', self.touch_database)
+        self.step('cache', self.fill_cache)
+        self.step('thumbnails', lambda: self.make_thumbnails(options['workers']))
+        if options['url']:
+            self.step('server', lambda: self.request_pages(options['url'], options['requests']))
+
+    def step(self, name, func):
+        started = time.monotonic()
+        summary = func()
+        self.stdout.write(f'{name}: {summary} ({(time.monotonic() - started) * 1000:.0f} ms)')
+
+    def compile_templates(self):
+        """Load every project template once (and fail the deploy on a broken one)."""
+        count = 0
+        for root in settings.TEMPLATES[0]['DIRS']:
+            for path in Path(root).rglob('*.*'):
+                get_template(path.relative_to(root).as_posix())
+                count += 1
+        return f'{count} compiled'
+
+    def touch_database(self):
+        read = 0
+        if connection.vendor == 'sqlite':
+            # Sequential read: the OS page cache then serves the workers' first queries
+            path = str(connection.settings_dict['NAME'])
+            for name in (path, f'{path}-wal'):
+                if os.path.exists(name):
+                    with open(name, 'rb') as f:
+                        while block := f.read(READ_BLOCK_SIZE):
+                            read += len(block)
+
+        # The queries behind the homepage and the panel lists, through their indexes
+        queries = 0
+        for shop in Shop.objects.all():
+            get_menu_flavors(shop, get_published_selection(shop))
+            list(Flavor.objects.for_shop(shop).active().order_by('name').values_list('pk', flat=True))
+            list(Flavor.objects.for_shop(shop).active().order_by('-created_at').values_list('pk', flat=True))
+            list(DailySelection.objects.for_shop(shop).order_by('-date').values_list('pk', flat=True)[:30])
+            queries += 4
+        return f'read {read / (1024 * 1024):.1f} MB, ran {queries} queries'
+
+    def fill_cache(self):
+        shops = list(Shop.objects.all())
+        for shop in shops:
+            if shop.domain:
+                resolve_shop(shop.domain)
+            selection = get_published_selection(shop)
+            build_menu_grid(shop, selection)
+            build_menu_payload(shop, selection)
+        return f'{len(shops)} shops'
+
+    def make_thumbnails(self, workers):
+        missing = [
+            flavor for flavor in Flavor.objects.exclude(photo='').only('pk', 'photo')
+            if not default_storage.exists(thumbnail_name(flavor.photo.name))
+        ]
+        if not missing:
+            return 'none missing'
+
+        # pool.map would read every photo up front; submit them as workers free up instead
+        made = 0
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for flavor in missing:
+                in_flight.append((flavor, pool.submit(_thumbnail_or_none, _read_photo(flavor.photo.name))))
+                if len(in_flight) >= PHOTOS_IN_FLIGHT * (workers or 1):
+                    made += self.save_thumbnail(*in_flight.popleft())
+            while in_flight:
+                made += self.save_thumbnail(*in_flight.popleft())
+        return f'{made} of {len(missing)} generated'
+
+    def save_thumbnail(self, flavor, future):
+        """Store a worker's thumbnail. Returns 1 if it was stored, 0 if skipped."""
+        thumbnail = future.result()
+        if thumbnail is None:
+            self.stderr.write(f'Photo of flavor {flavor.pk} ({flavor.photo.name}) could not be read, skipping it')
+            return 0
+        default_storage.save(thumbnail_name(flavor.photo.name), ContentFile(thumbnail))
+        return 1
+
+    def request_pages(self, base_url, count):
+        base_url = base_url.rstrip('/')
+        urls = [base_url + reverse('flavors:homepage'), base_url + reverse('flavors:api_menu')]
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            statuses = list(pool.map(_fetch_status, urls * count))
+        failed = [status for status in statuses if status != 200]
+        if failed:
+            self.stderr.write(f'{len(failed)} warm-up requests failed: {sorted(set(map(str, failed)))}')
+        return f'{len(statuses) - len(failed)} of {len(statuses)} requests OK'
+
+
+def _read_photo(name):
+    try:
+        with default_storage.open(name) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _thumbnail_or_none(data):
+    """Process pool worker: thumbnail WebP bytes, or None if the photo is missing or unreadable."""
+    if data is None:
+        return None
+    try:
+        return make_thumbnail(data)
+    except Exception as e:
+        logger.warning(f'Thumbnail failed: {e}')
+        return None
+
+
+def _fetch_status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=URL_TIMEOUT) as response:
+            response.read()
+            return response.status
+    except OSError as e:
+        return getattr(e, 'code', None) or type(e).__name__
@@ -0,0 +1,105 @@
+"""
+The published menu: what the homepage shows for a shop right now.
+
+A selection is visible once its published_at has passed, so a menu staged
+for tomorrow swaps in atomically at the shop's publish time. The homepage
+needs one indexed lookup of the latest published selection; the rendered
+flavor grid is cached under a per-shop menu version that every flavor or
+selection change bumps.
+"""
+import time
+from datetime import timedelta
+
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from . import caching
+from .clock import local_today
+from .models import DailySelection, Flavor
+from .tenancy import tenant_key, tenant_version
+
+MENU_GRID_TIMEOUT = 60 * 60 * 24  # keys are versioned, so this only bounds cache size
+
+
+def get_published_selection(shop, now=None):
+    """
+    Return the selection currently visible for a shop, or None to show all active flavors.
+    Selections older than yesterday are treated as stale, as before.
+    """
+    now = now or timezone.now()
+    selection = DailySelection.objects.for_shop(shop).published(now).select_related('hit_of_the_day').first()
+    if selection is None or selection.date < local_today(now) - timedelta(days=1):
+        return None
+    return selection
+
+
+def get_fallback_note(selection, now=None):
+    """Freshness note shown when the menu isn't today's selection."""
+    if selection is None:
+        return "Wszystkie dostępne smaki"
+    if selection.date < local_today(now):
+        return "Wczorajsze smaki (dzisiejsze wkrótce)"
+    return None
+
+
+def get_menu_flavors(shop, selection):
+    """
+    Return (flavors, hit_of_the_day) in display order, with the hit moved to the front.
+    """
+    if selection is None:
+        return list(Flavor.objects.for_shop(shop).active()), None
+
+    prefetch_related_objects([selection], 'flavors')
+    flavors = list(selection.flavors.all())
+
+    # Sortowanie według display_order jeśli dostępne
+    if selection.display_order:
+        order_map = {pk: idx for idx, pk in enumerate(selection.display_order)}
+        flavors.sort(key=lambda f: order_map.get(f.pk, 9999))
+
+    # Przeniesienie hit_of_the_day na pierwszą pozycję
+    hit_of_the_day = selection.hit_of_the_day
+    if hit_of_the_day and hit_of_the_day in flavors:
+        flavors.remove(hit_of_the_day)
+        flavors.insert(0, hit_of_the_day)
+
+    return flavors, hit_of_the_day
+
+
+def menu_grid_key(shop, selection):
+    return tenant_key(
+        shop, 'menu-grid', tenant_version(shop, 'menu'), selection.pk if selection else 'all'
+    )
+
+
+def _render_menu_grid(shop, selection):
+    flavors, hit_of_the_day = get_menu_flavors(shop, selection)
+    return render_to_string('flavors/partials/menu_grid.html', {
+        'flavors': flavors,
+        'hit_of_the_day': hit_of_the_day,
+    })
+
+
+def build_menu_grid(shop, selection):
+    """Render the flavor grid and store it in the cache (used to warm it ahead of time)."""
+    started = time.monotonic()
+    html = _render_menu_grid(shop, selection)
+    caching.store(menu_grid_key(shop, selection), html, MENU_GRID_TIMEOUT, time.monotonic() - started)
+    return html
+
+
+def render_menu_grid(shop, selection):
+    """
+    Return the cached flavor grid HTML. On a miss (a new day's selection going
+    live, or an edit) one process renders it while the others keep serving the
+    last grid shown, so the switch at midnight doesn't pile up renders.
+    """
+    html = caching.get_or_build(
+        menu_grid_key(shop, selection),
+        lambda: _render_menu_grid(shop, selection),
+        MENU_GRID_TIMEOUT,
+        fallback_key=tenant_key(shop, 'menu-grid', 'last-good'),
+    )
+    return mark_safe(html)
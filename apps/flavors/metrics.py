@@ -0,0 +1,262 @@
+"""
+Server-wide metrics in the Prometheus text exposition format.
+
+Every process (web workers, import pool workers) keeps its counters and
+histograms in memory and writes them to METRICS_DIR/<pid>.json at most once
+per FLUSH_INTERVAL. A scrape of /metrics sums the files of all processes, so
+it sees the whole server. Files of processes that have exited are folded into
+a single file so their counts aren't lost on worker restarts.
+"""
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows - single-process development only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 1  # seconds
+DEAD_PROCESSES_FILE = 'exited.json'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LOCK_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+IMAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'flavors_request_duration_seconds': ('histogram', 'Request latency by URL name.', LATENCY_BUCKETS),
+    'flavors_db_queries_total': ('counter', 'SQL queries executed while serving requests, by URL name.', None),
+    'flavors_db_query_duration_seconds': ('histogram', 'SQL query latency by statement type.', QUERY_BUCKETS),
+    'flavors_sqlite_lock_wait_seconds': ('histogram', 'Time to acquire the SQLite write lock, by endpoint.', LOCK_WAIT_BUCKETS),
+    'flavors_sqlite_busy_total': ('counter', 'Panel writes retried because SQLite was locked.', None),
+    'flavors_sqlite_write_failures_total': ('counter', 'Panel writes that gave up on a locked database.', None),
+    'flavors_image_processing_seconds': ('histogram', 'Photo optimization (resize + WebP) duration.', IMAGE_BUCKETS),
+    'flavors_cache_requests_total': ('counter', 'Cache lookups by result (hit/miss).', None),
+    'flavors_cache_hit_ratio': ('gauge', 'Cache hits / lookups since the metrics directory was created.', None),
+    'process_resident_memory_bytes': ('gauge', 'Resident memory of each live process.', None),
+}
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()  # one writer of this process's file at a time
+_counters = defaultdict(float)  # key -> value
+_histograms = {}  # key -> {'buckets': [...], 'sum': float, 'count': int}
+_last_flush = 0.0
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())])
+
+
+def inc(name, amount=1, **labels):
+    """Increase a counter."""
+    with _lock:
+        _counters[_key(name, labels)] += amount
+    _flush_if_due()
+
+
+def observe(name, value, **labels):
+    """Record one value in a histogram."""
+    buckets = METRICS[name][2]
+    with _lock:
+        histogram = _histograms.setdefault(
+            _key(name, labels), {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+        )
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                histogram['buckets'][i] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+    _flush_if_due()
+
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # peak, KiB on Linux
+
+
+def _write_json(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _flush():
+    # Caller holds _flush_lock. Metrics must never fail the request that records them.
+    global _last_flush
+    with _lock:
+        data = {
+            'counters': dict(_counters),
+            'histograms': {key: dict(h, buckets=list(h['buckets'])) for key, h in _histograms.items()},
+            'rss': _rss_bytes(),
+        }
+        _last_flush = time.monotonic()
+    try:
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        _write_json(os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json'), data)
+    except OSError as e:
+        logger.warning(f'Writing metrics failed: {e}')
+
+
+def flush():
+    """Write this process's metrics to its file in METRICS_DIR."""
+    with _flush_lock:
+        _flush()
+
+
+def _flush_if_due():
+    if time.monotonic() - _last_flush < FLUSH_INTERVAL:
+        return
+    # Another thread already flushing covers this one's values too
+    if not _flush_lock.acquire(blocking=False):
+        return
+    try:
+        if time.monotonic() - _last_flush >= FLUSH_INTERVAL:
+            _flush()
+    finally:
+        _flush_lock.release()
+
+
+@atexit.register
+def _flush_at_exit():
+    # Only processes that recorded something leave a file (not migrate, shell, ...)
+    if _counters or _histograms:
+        flush()
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(total, data):
+    for key, value in data.get('counters', {}).items():
+        total['counters'][key] = total['counters'].get(key, 0) + value
+    for key, histogram in data.get('histograms', {}).items():
+        merged = total['histograms'].setdefault(
+            key, {'buckets': [0] * len(histogram['buckets']), 'sum': 0.0, 'count': 0}
+        )
+        merged['buckets'] = [a + b for a, b in zip(merged['buckets'], histogram['buckets'])]
+        merged['sum'] += histogram['sum']
+        merged['count'] += histogram['count']
+
+
+def collect():
+    """
+    Sum the metrics of all processes. Returns (counters, histograms, rss by pid).
+    Files of exited processes are folded into DEAD_PROCESSES_FILE on the way.
+    """
+    flush()
+    directory = settings.METRICS_DIR
+    dead_path = os.path.join(directory, DEAD_PROCESSES_FILE)
+    total = {'counters': {}, 'histograms': {}}
+    rss = {}
+
+    with open(os.path.join(directory, '.lock'), 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+        dead = _read_json(dead_path) or {'counters': {}, 'histograms': {}}
+        folded = False
+        for filename in os.listdir(directory):
+            stem, ext = os.path.splitext(filename)
+            if ext != '.json' or not stem.isdigit():
+                continue
+            path = os.path.join(directory, filename)
+            data = _read_json(path)
+            if data is None:
+                continue
+            if _is_alive(int(stem)):
+                _merge(total, data)
+                rss[stem] = data.get('rss', 0)
+            else:
+                _merge(dead, data)
+                os.remove(path)
+                folded = True
+        if folded:
+            _write_json(dead_path, dead)
+        _merge(total, dead)
+
+    return total['counters'], total['histograms'], rss
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = [
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels
+    ]
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render():
+    """Render all metrics in the Prometheus text exposition format (version 0.0.4)."""
+    counters, histograms, rss = collect()
+
+    samples = defaultdict(list)  # name -> [(labels, value)]
+    for key, value in counters.items():
+        name, labels = json.loads(key)
+        samples[name].append((labels, value))
+    for key, histogram in histograms.items():
+        name, labels = json.loads(key)
+        for bound, count in zip(METRICS[name][2], histogram['buckets']):
+            samples[name].append((labels + [['le', str(bound)]], count, '_bucket'))
+        samples[name].append((labels + [['le', '+Inf']], histogram['count'], '_bucket'))
+        samples[name].append((labels, histogram['sum'], '_sum'))
+        samples[name].append((labels, histogram['count'], '_count'))
+
+    hits = counters.get(_key('flavors_cache_requests_total', {'result': 'hit'}), 0)
+    misses = counters.get(_key('flavors_cache_requests_total', {'result': 'miss'}), 0)
+    if hits + misses:
+        samples['flavors_cache_hit_ratio'].append(([], hits / (hits + misses)))
+    for pid, value in sorted(rss.items()):
+        samples['process_resident_memory_bytes'].append(([['pid', pid]], value))
+
+    lines = []
+    for name, (metric_type, help_text, _) in METRICS.items():
+        if not samples[name]:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        # Stable sort by series, so histogram buckets stay in ascending 'le' order
+        series = sorted(samples[name], key=lambda s: str([label for label in s[0] if label[0] != 'le']))
+        for labels, value, *suffix in series:
+            lines.append(f'{name}{suffix[0] if suffix else ""}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
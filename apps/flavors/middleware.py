@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+
+from django.db import connection
+from django.urls import reverse
+
+from . import metrics, perf, profiling
+from .tenancy import resolve_shop
+
+logger = logging.getLogger('apps.flavors.perf')
+
+SLOW_REQUEST_THRESHOLD = 0.5  # seconds, slower panel requests are logged with their SQL
+SQL_SAMPLED_PATH_PREFIX = '/panel/'
+
+
+class PerformanceMiddleware:
+    """
+    Measure each request: SQL count and time, template rendering, cache hits and
+    misses, image processing. Adds a Server-Timing header and logs one line per
+    request on the apps.flavors.perf logger; slow panel requests include their SQL.
+    Latency, query and cache totals also feed the /metrics aggregates.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        capture_sql = request.path.startswith(SQL_SAMPLED_PATH_PREFIX)
+        request_metrics, token = perf.start(capture_sql)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(perf.QueryTimer(request_metrics)):
+                response = self.get_response(request)
+        finally:
+            perf.stop(token)
+        total = time.perf_counter() - started
+
+        response['Server-Timing'] = request_metrics.server_timing(total)
+        message = f'{request.method} {request.path} {response.status_code} {total * 1000:.1f}ms'
+        extra = {'perf': request_metrics.as_dict(total)}
+        if capture_sql and total > SLOW_REQUEST_THRESHOLD:
+            extra['sql'] = request_metrics.queries
+            logger.warning(f'slow request {message}', extra=extra)
+        else:
+            logger.info(message, extra=extra)
+
+        # Server-wide aggregates for /metrics; unresolved URLs share one label
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else 'unmatched'
+        metrics.observe('flavors_request_duration_seconds', total, view=view)
+        metrics.inc('flavors_db_queries_total', request_metrics.counts['db'], view=view)
+        for result in ('hit', 'miss'):
+            if request_metrics.counts[f'cache_{result}']:
+                metrics.inc('flavors_cache_requests_total', request_metrics.counts[f'cache_{result}'], result=result)
+        return response
+
+
+class TenantMiddleware:
+    """
+    Attach the shop for the current host as request.shop (None if no shop serves it).
+    Resolution is cached per host, so this is a cache hit on warm processes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.shop = resolve_shop(request.get_host())
+        return self.get_response(request)
+
+
+class PanelSessionMiddleware:
+    """
+    Renew the session expiry on every panel request (what SESSION_SAVE_EVERY_REQUEST
+    did site-wide). Public pages leave the session alone, so they get no Set-Cookie
+    or Vary: Cookie and stay cacheable. Must come after SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.path.startswith(SQL_SAMPLED_PATH_PREFIX):
+            # SessionMiddleware saves a modified session only if it has data
+            request.session.modified = True
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    Sample-profile the next N panel requests of a staff user who armed the
+    profiler (see views_admin.profiles). Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Public pages must not touch the session: reading it adds Vary: Cookie
+        if not request.path.startswith(SQL_SAMPLED_PATH_PREFIX):
+            return self.get_response(request)
+        remaining = request.session.get(profiling.SESSION_KEY, 0)
+        if (
+            not remaining
+            or request.path.startswith(reverse('flavors:admin_profiles'))
+            or not request.user.is_staff
+        ):
+            return self.get_response(request)
+
+        request.session[profiling.SESSION_KEY] = remaining - 1
+        profiler = profiling.SamplingProfiler(threading.get_ident())
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = profiler.stop()
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else 'unmatched'
+        profiling.save_profile(stacks, view, time.perf_counter() - started)
+        return response
@@ -0,0 +1,96 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_default_shop(apps, schema_editor):
+    """Move all existing data into a default shop owned by existing staff users."""
+    Shop = apps.get_model('flavors', 'Shop')
+    Flavor = apps.get_model('flavors', 'Flavor')
+    DailySelection = apps.get_model('flavors', 'DailySelection')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    shop = Shop.objects.create(name='Lodziarnia', slug='default')
+    shop.owners.set(User.objects.filter(is_staff=True))
+    Flavor.objects.update(shop=shop)
+    DailySelection.objects.update(shop=shop)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flavors', '0002_photo_uuid_upload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Shop',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True)),
+                ('domain', models.CharField(blank=True, max_length=255, null=True, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('owners', models.ManyToManyField(blank=True, related_name='shops', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='flavor',
+            name='shop',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='flavors', to='flavors.shop'),
+        ),
+        migrations.AddField(
+            model_name='dailyselection',
+            name='shop',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='selections', to='flavors.shop'),
+        ),
+        migrations.RunPython(create_default_shop, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='flavor',
+            name='shop',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flavors', to='flavors.shop'),
+        ),
+        migrations.AlterField(
+            model_name='dailyselection',
+            name='shop',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='selections', to='flavors.shop'),
+        ),
+        migrations.AlterField(
+            model_name='flavor',
+            name='name',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='flavor',
+            name='slug',
+            field=models.SlugField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='dailyselection',
+            name='date',
+            field=models.DateField(),
+        ),
+        migrations.AddConstraint(
+            model_name='flavor',
+            constraint=models.UniqueConstraint(fields=('shop', 'name'), name='unique_flavor_name_per_shop'),
+        ),
+        migrations.AddConstraint(
+            model_name='flavor',
+            constraint=models.UniqueConstraint(fields=('shop', 'slug'), name='unique_flavor_slug_per_shop'),
+        ),
+        migrations.AddIndex(
+            model_name='flavor',
+            index=models.Index(fields=['shop', 'status', 'name'], name='flavor_shop_status_name'),
+        ),
+        migrations.AddIndex(
+            model_name='flavor',
+            index=models.Index(fields=['shop', 'status', '-created_at'], name='flavor_shop_status_created'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyselection',
+            constraint=models.UniqueConstraint(fields=('shop', 'date'), name='unique_selection_per_shop_date'),
+        ),
+    ]
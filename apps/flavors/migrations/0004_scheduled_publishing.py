@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:40
+
+import datetime
+import zoneinfo
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def set_published_at(apps, schema_editor):
+    """Existing selections were published at the start of their day."""
+    DailySelection = apps.get_model('flavors', 'DailySelection')
+    tz = zoneinfo.ZoneInfo(settings.TIME_ZONE)
+    for selection in DailySelection.objects.only('date'):
+        selection.published_at = datetime.datetime.combine(selection.date, datetime.time(0, 0), tzinfo=tz)
+        selection.save(update_fields=['published_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flavors', '0003_shop_tenancy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shop',
+            name='publish_time',
+            field=models.TimeField(default=datetime.time(0, 0)),
+        ),
+        migrations.AddField(
+            model_name='dailyselection',
+            name='published_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(set_published_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='dailyselection',
+            name='published_at',
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='dailyselection',
+            index=models.Index(fields=['shop', '-published_at'], name='selection_shop_published'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flavors', '0004_scheduled_publishing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('flavors', models.JSONField(default=list)),
+                ('hit_of_the_day', models.PositiveIntegerField(blank=True, null=True)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='menu_history', to='flavors.shop')),
+            ],
+            options={
+                'verbose_name_plural': 'menu history',
+                'constraints': [models.UniqueConstraint(fields=('shop', 'date'), name='unique_history_per_shop_date')],
+            },
+        ),
+    ]
@@ -1,17 +1,24 @@
 import logging
 import uuid
 import os
-from datetime import datetime
-from io import BytesIO
+from datetime import datetime, time
 
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
-from PIL import Image
+
+from .images import make_thumbnail, optimize_photo, thumbnail_name
 
 logger = logging.getLogger(__name__)
 
+# Thumbnail names seen on storage. Photo names are unique and a thumbnail is never
+# replaced, so a hit stays valid; misses are checked again (warmup may add them).
+_existing_thumbnails = set()
+EXISTING_THUMBNAILS_KEPT = 10000
+
 PREDEFINED_TAGS = {
     'vegan': {'label': 'Wegański', 'color': 'green'},
     'lactose-free': {'label': 'Bez laktozy', 'color': 'blue'},
@@ -29,6 +36,49 @@ def uuid_upload_to(instance, filename):
     return f'flavors/{date_path}/{uuid.uuid4().hex}.{ext}'
 
 
+class Shop(models.Model):
+    """An ice cream shop (tenant). Resolved from the request host."""
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(unique=True)
+    domain = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    owners = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='shops')
+    # Local time at which a day's selection becomes visible on the homepage
+    publish_time = models.TimeField(default=time(0, 0))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    def publish_datetime(self, date):
+        """Moment the selection for the given date goes live (aware, in TIME_ZONE)."""
+        return timezone.make_aware(datetime.combine(date, self.publish_time))
+
+    def is_owner(self, user):
+        """Check whether the user may manage this shop in the panel."""
+        if not user.is_authenticated:
+            return False
+        if user.is_superuser:
+            return True
+        return self.owners.filter(pk=user.pk).exists()
+
+
+class FlavorQuerySet(models.QuerySet):
+    def for_shop(self, shop):
+        return self.filter(shop=shop)
+
+    def active(self):
+        return self.filter(status='active')
+
+
+class DailySelectionQuerySet(models.QuerySet):
+    def for_shop(self, shop):
+        return self.filter(shop=shop)
+
+    def published(self, now=None):
+        """Selections already visible to customers, newest first."""
+        return self.filter(published_at__lte=now or timezone.now()).order_by('-published_at')
+
+
 class Flavor(models.Model):
     FLAVOR_TYPES = [
         ('milk', 'Mleczny'),
@@ -40,8 +90,9 @@ class Flavor(models.Model):
         ('archived', 'Zarchiwizowany'),
     ]
 
-    name = models.CharField(max_length=100, unique=True)
-    slug = models.SlugField(unique=True, blank=True)
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='flavors')
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(blank=True)
     description = models.TextField(blank=True)
     flavor_type = models.CharField(max_length=20, choices=FLAVOR_TYPES, default='milk')
     tags = models.JSONField(default=list, blank=True)
@@ -50,6 +101,19 @@ class Flavor(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = FlavorQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'name'], name='unique_flavor_name_per_shop'),
+            models.UniqueConstraint(fields=['shop', 'slug'], name='unique_flavor_slug_per_shop'),
+        ]
+        indexes = [
+            # Panel and homepage lists: shop + status, ordered by name or newest first
+            models.Index(fields=['shop', 'status', 'name'], name='flavor_shop_status_name'),
+            models.Index(fields=['shop', 'status', '-created_at'], name='flavor_shop_status_created'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
@@ -73,30 +137,39 @@ class Flavor(models.Model):
 
             if is_new_photo:
                 try:
-                    img = Image.open(self.photo)
-
-                    # Convert RGBA/P to RGB for WebP compatibility
-                    if img.mode in ('RGBA', 'P'):
-                        img = img.convert('RGB')
-
-                    # Resize to max 1200px maintaining aspect ratio
-                    max_size = (1200, 1200)
-                    img.thumbnail(max_size, Image.BICUBIC)
-
-                    # Save as WebP with 85% quality
-                    buffer = BytesIO()
-                    img.save(buffer, format='WEBP', quality=85)
+                    # Resize to max 1200px and convert to WebP
+                    self.photo.seek(0)
+                    optimized = optimize_photo(self.photo.read())
 
                     # Replace file content with optimized version
-                    file_content = ContentFile(buffer.getvalue())
                     # uuid_upload_to generates the actual filename with UUID
-                    self.photo.save('temp.webp', file_content, save=False)
+                    self.photo.save('temp.webp', ContentFile(optimized), save=False)
+                    self.photo.storage.save(thumbnail_name(self.photo.name), ContentFile(make_thumbnail(optimized)))
                 except Exception as e:
                     # If image processing fails, log and continue with original
                     logger.warning(f"Image processing failed for {self.name}: {e}")
 
         super().save(*args, **kwargs)
 
+    @property
+    def thumbnail_url(self):
+        """
+        Small panel thumbnail; photos without one (saved before thumbnails existed,
+        or whose processing failed) fall back to the full image until `manage.py
+        warmup` generates it. Storage is checked once per thumbnail per process.
+        """
+        if not self.photo:
+            return ''
+        name = thumbnail_name(self.photo.name)
+        storage = self.photo.storage
+        if name not in _existing_thumbnails:
+            if not storage.exists(name):
+                return self.photo.url
+            if len(_existing_thumbnails) >= EXISTING_THUMBNAILS_KEPT:
+                _existing_thumbnails.clear()
+            _existing_thumbnails.add(name)
+        return storage.url(name)
+
     def clean(self):
         if len(self.tags) > 5:
             raise ValidationError({'tags': 'Możesz wybrać maksymalnie 5 tagów.'})
@@ -106,7 +179,8 @@ class Flavor(models.Model):
 
 
 class DailySelection(models.Model):
-    date = models.DateField(unique=True)
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='selections')
+    date = models.DateField()
     flavors = models.ManyToManyField(Flavor, blank=True)
     hit_of_the_day = models.ForeignKey(
         Flavor,
@@ -115,11 +189,34 @@ class DailySelection(models.Model):
         related_name='hit_days'
     )
     display_order = models.JSONField(default=list, blank=True)
+    # Set from shop.publish_time on creation; selections staged for a future date stay hidden until then
+    published_at = models.DateTimeField()
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = DailySelectionQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Also serves as the (shop_id, date) lookup index
+            models.UniqueConstraint(fields=['shop', 'date'], name='unique_selection_per_shop_date'),
+        ]
+        indexes = [
+            # Homepage: latest published selection for a shop
+            models.Index(fields=['shop', '-published_at'], name='selection_shop_published'),
+        ]
+
     def __str__(self):
         return f"Dzisiejsze smaki: {self.date}"
 
+    def save(self, *args, **kwargs):
+        if self.published_at is None:
+            self.published_at = self.shop.publish_datetime(self.date)
+        super().save(*args, **kwargs)
+
+    @property
+    def is_published(self):
+        return self.published_at <= timezone.now()
+
     def get_ordered_flavors(self):
         """
         Return flavors in display_order, with any unlisted flavors appended at end.
@@ -140,26 +237,30 @@ class DailySelection(models.Model):
 
         return sorted(all_flavors, key=sort_key)
 
-    def add_flavor_to_order(self, flavor_id):
+    def add_flavor_to_order(self, flavor_id, save=True):
         """
         Append flavor ID to display_order if not already present.
         Call this when adding a flavor to the selection.
+        Pass save=False to batch the update with other field changes.
         """
         if self.display_order is None:
             self.display_order = []
 
         if flavor_id not in self.display_order:
             self.display_order.append(flavor_id)
-            self.save(update_fields=['display_order'])
+            if save:
+                self.save(update_fields=['display_order'])
 
-    def remove_flavor_from_order(self, flavor_id):
+    def remove_flavor_from_order(self, flavor_id, save=True):
         """
         Remove flavor ID from display_order if present.
         Call this when removing a flavor from the selection.
+        Pass save=False to batch the update with other field changes.
         """
         if self.display_order and flavor_id in self.display_order:
             self.display_order = [fid for fid in self.display_order if fid != flavor_id]
-            self.save(update_fields=['display_order'])
+            if save:
+                self.save(update_fields=['display_order'])
 
     def move_flavor(self, flavor_id, direction):
         """
@@ -183,3 +284,25 @@ class DailySelection(models.Model):
 
         self.save(update_fields=['display_order'])
         return True
+
+
+class MenuHistory(models.Model):
+    """
+    A past day's menu in compact form, written by `manage.py compact_history`.
+    Replaces the DailySelection row and its per-flavor M2M rows; names are kept
+    so the record still reads right after flavors are renamed or deleted.
+    """
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='menu_history')
+    date = models.DateField()
+    # [[flavor id, name], ...] in display order
+    flavors = models.JSONField(default=list)
+    hit_of_the_day = models.PositiveIntegerField(null=True, blank=True)  # flavor id, not a FK on purpose
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'date'], name='unique_history_per_shop_date'),
+        ]
+        verbose_name_plural = 'menu history'
+
+    def __str__(self):
+        return f"Menu {self.date}: {len(self.flavors)} smaków"
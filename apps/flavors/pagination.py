@@ -0,0 +1,56 @@
+"""
+Keyset ("seek") pagination for the panel's infinite-scroll lists.
+
+A page is fetched with WHERE (sort key) > (last row's key) ORDER BY ... LIMIT,
+which stays an index range scan however deep the user scrolls, unlike OFFSET.
+The cursor is the last row's key values, JSON + urlsafe base64 in ?after=.
+"""
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+
+PAGE_SIZE = 30
+
+
+def _encode(values):
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode().rstrip('=')
+
+
+def _decode(cursor, length):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        return None
+    return values if isinstance(values, list) and len(values) == length else None
+
+
+def _after(ordering, values):
+    """Q for rows strictly after values in ordering, e.g. ('-created_at', '-pk')."""
+    condition = Q()
+    for i in reversed(range(len(ordering))):
+        field = ordering[i].lstrip('-')
+        lookup = 'lt' if ordering[i].startswith('-') else 'gt'
+        equal = {ordering[j].lstrip('-'): values[j] for j in range(i)}
+        condition = Q(**equal, **{f'{field}__{lookup}': values[i]}) | condition
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, size=PAGE_SIZE):
+    """
+    Return (rows, next_cursor) for the page after cursor. ordering must end with
+    a unique field ('pk' or '-pk'); next_cursor is None on the last page.
+    An invalid cursor gives the first page.
+    """
+    queryset = queryset.order_by(*ordering)
+    values = _decode(cursor, len(ordering)) if cursor else None
+    if values is not None:
+        queryset = queryset.filter(_after(ordering, values))
+
+    rows = list(queryset[:size + 1])
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    last = rows[-1]
+    return rows, _encode([getattr(last, field.lstrip('-')) for field in ordering])
@@ -0,0 +1,149 @@
+"""
+Per-request performance counters.
+
+PerformanceMiddleware starts a RequestMetrics for each request in a context
+variable; code paths worth watching (SQL, template rendering, cache lookups,
+image processing) add to it through the helpers below, which are no-ops
+outside a request. The totals are sent as a Server-Timing header and logged
+as one structured line per request.
+"""
+import json
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import metrics as server_metrics
+
+MAX_SAMPLED_QUERIES = 100
+STATEMENT_TYPES = {'SELECT', 'INSERT', 'UPDATE', 'DELETE'}  # the rest is labelled OTHER
+
+_current = ContextVar('flavors_request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self, capture_sql=False):
+        self.durations = defaultdict(float)  # seconds per phase: db, tpl, img
+        self.counts = defaultdict(int)  # db queries, cache hits/misses
+        self.capture_sql = capture_sql
+        self.queries = []  # (sql, duration) when capture_sql is set
+        self._active = set()
+
+    def server_timing(self, total):
+        """Format the Server-Timing header value (durations in ms)."""
+        parts = [f'db;dur={self.durations["db"] * 1000:.1f};desc="{self.counts["db"]} queries"']
+        for name in ('tpl', 'img'):
+            if name in self.durations:
+                parts.append(f'{name};dur={self.durations[name] * 1000:.1f}')
+        if self.counts['cache_hit'] or self.counts['cache_miss']:
+            parts.append(f'cache;desc="{self.counts["cache_hit"]} hit, {self.counts["cache_miss"]} miss"')
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+    def as_dict(self, total):
+        data = {f'{name}_ms': round(duration * 1000, 1) for name, duration in self.durations.items()}
+        data.update(self.counts)
+        data['total_ms'] = round(total * 1000, 1)
+        return data
+
+
+def start(capture_sql=False):
+    """Begin collecting metrics for the current request. Returns (metrics, token)."""
+    metrics = RequestMetrics(capture_sql)
+    return metrics, _current.set(metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    """Return the current request's metrics, or None outside a request."""
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """Add the duration of the block to the current request (nested blocks count once)."""
+    metrics = _current.get()
+    if metrics is None or name in metrics._active:
+        yield
+        return
+    metrics._active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.durations[name] += time.perf_counter() - started
+        metrics._active.discard(name)
+
+
+def record_cache(hit):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.counts['cache_hit' if hit else 'cache_miss'] += 1
+
+
+class QueryTimer:
+    """
+    connection.execute_wrapper() hook counting and timing every query, for the
+    request's totals and the server-wide latency histogram by statement type.
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.metrics.durations['db'] += duration
+            self.metrics.counts['db'] += 1
+            server_metrics.observe('flavors_db_query_duration_seconds', duration, statement=_statement_type(sql))
+            if self.metrics.capture_sql and len(self.metrics.queries) < MAX_SAMPLED_QUERIES:
+                self.metrics.queries.append((sql, round(duration * 1000, 2)))
+
+
+def _statement_type(sql):
+    statement = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ''
+    return statement if statement in STATEMENT_TYPES else 'OTHER'
+
+
+class _TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed('tpl'):
+            return super().render(context, request)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend that adds top-level render time to the request metrics."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return _TimedTemplate(template.template, self)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; merges the record's 'perf' and 'sql' extras."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key in ('perf', 'sql'):
+            if hasattr(record, key):
+                data[key] = getattr(record, key)
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
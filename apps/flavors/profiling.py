@@ -0,0 +1,121 @@
+"""
+On-demand sampling profiler for panel requests.
+
+A staff user arms it for the next N panel requests (stored in their session).
+While such a request runs, a background thread samples the request thread's
+stack every SAMPLE_INTERVAL and counts identical stacks. The result is saved
+to PROFILES_DIR in the collapsed-stack format ("frame;frame;frame count" per
+line) that flamegraph.pl, speedscope and inferno read directly.
+"""
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+
+SAMPLE_INTERVAL = 0.005  # seconds
+SESSION_KEY = 'profile_requests'
+MAX_PROFILED_REQUESTS = 50
+PROFILES_LISTED = 50
+
+PROFILE_NAME_RE = re.compile(r'^(?P<time>\d{8}-\d{6}-\d{6})_(?P<view>[\w-]+)_(?P<ms>\d+)ms_(?P<samples>\d+)\.txt$')
+
+
+def _frame_name(frame):
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}"
+
+
+class SamplingProfiler:
+    """Samples one thread's stack from a background thread until stop()."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='panel-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+
+def save_profile(stacks, view_name, duration):
+    """Write collapsed stacks to PROFILES_DIR; returns the file name."""
+    os.makedirs(settings.PROFILES_DIR, exist_ok=True)
+    name = (
+        f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}_{view_name}"
+        f"_{duration * 1000:.0f}ms_{sum(stacks.values())}.txt"
+    )
+    with open(os.path.join(settings.PROFILES_DIR, name), 'w', encoding='utf-8') as f:
+        for stack, count in stacks.most_common():
+            f.write(f'{stack} {count}\n')
+    return name
+
+
+def list_profiles():
+    """Newest saved profiles first, as dicts parsed from their file names."""
+    try:
+        names = os.listdir(settings.PROFILES_DIR)
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for name in sorted(names, reverse=True):
+        match = PROFILE_NAME_RE.match(name)
+        if match:
+            profiles.append({
+                'name': name,
+                'created': datetime.strptime(match['time'], '%Y%m%d-%H%M%S-%f'),
+                'view': match['view'],
+                'duration_ms': int(match['ms']),
+                'samples': int(match['samples']),
+            })
+            if len(profiles) == PROFILES_LISTED:
+                break
+    return profiles
+
+
+def profile_path(name):
+    """Return the path of a saved profile, or None for names that aren't profiles."""
+    if not PROFILE_NAME_RE.match(name):
+        return None
+    path = os.path.join(settings.PROFILES_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def summarize(path, limit=15):
+    """
+    Return (self, inclusive) hot spots of a profile as [(frame, samples, percent)]:
+    frames on top of the stack, and the project's own frames (apps.*) anywhere in it.
+    """
+    own, inclusive = Counter(), Counter()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            frames = stack.split(';')
+            own[frames[-1]] += int(count)
+            for frame in set(frames):
+                if frame.startswith('apps.'):
+                    inclusive[frame] += int(count)
+    total = sum(own.values()) or 1
+    return tuple(
+        [(frame, count, count * 100 / total) for frame, count in counter.most_common(limit)]
+        for counter in (own, inclusive)
+    )
@@ -0,0 +1,61 @@
+"""
+Cache invalidation: once a change to what a shop's menu shows is committed, its
+'menu' version is bumped and a live menu event is published to open homepages.
+Bulk operations wrap their writes in deferred_menu_changes() to do this once per
+shop instead of once per row.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .events import publish_menu_event
+from .models import DailySelection, Flavor
+from .tenancy import bump_tenant_version
+
+_deferred_shop_ids = ContextVar('deferred_menu_changes', default=None)
+
+
+def _menu_committed(shop_id):
+    bump_tenant_version(shop_id, 'menu')
+    publish_menu_event(shop_id)
+
+
+def _menu_changed(shop_id):
+    deferred = _deferred_shop_ids.get()
+    if deferred is not None:
+        deferred.add(shop_id)
+        return
+    # Bumped only once committed: a reader between a bump and the commit would cache
+    # the old rows under the new version. Several signals fire per panel action;
+    # the later events find nothing new and are dropped.
+    transaction.on_commit(partial(_menu_committed, shop_id), robust=True)
+
+
+@contextmanager
+def deferred_menu_changes():
+    """Collect the menu changes of the enclosed writes and signal each shop once at the end."""
+    shop_ids = set()
+    token = _deferred_shop_ids.set(shop_ids)
+    try:
+        yield
+    finally:
+        _deferred_shop_ids.reset(token)
+        for shop_id in shop_ids:
+            _menu_changed(shop_id)
+
+
+@receiver([post_save, post_delete], sender=Flavor)
+@receiver([post_save, post_delete], sender=DailySelection)
+def _bump_menu_version(sender, instance, **kwargs):
+    _menu_changed(instance.shop_id)
+
+
+@receiver(m2m_changed, sender=DailySelection.flavors.through)
+def _bump_menu_version_on_selection_change(sender, instance, action, **kwargs):
+    # instance is a DailySelection or, from the reverse side, a Flavor - both belong to one shop
+    if action.startswith('post_'):
+        _menu_changed(instance.shop_id)
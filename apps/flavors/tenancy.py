@@ -0,0 +1,105 @@
+"""
+Shop (tenant) resolution and per-tenant cache keys.
+
+Every request resolves its shop from the host name. The lookup is cached
+per host, so a warm process answers it without touching the database.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import perf
+from .models import Shop
+
+SHOP_CACHE_TIMEOUT = 300  # 5 minutes
+SHOPS_GENERATION_KEY = 'flavors:shops:gen'
+
+# Stored in the cache when a host resolves to no shop at all
+_NO_SHOP = 0
+
+
+def _new_version():
+    # Seed counters from the clock so an evicted counter never restarts at a
+    # value that old cache entries were stored under
+    return time.time_ns() // 1_000_000
+
+
+def _get_counter(key):
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump_counter(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def _shops_generation():
+    """Return the current shop-table generation, bumped on any Shop change."""
+    return _get_counter(SHOPS_GENERATION_KEY)
+
+
+def _lookup_shop(host):
+    """
+    Find the shop for a host. Other hosts get the only shop of a single-shop
+    install, or the first shop with DEBUG (localhost); otherwise None, so one
+    shop's pages are never served on another's unknown alias.
+    """
+    shop = Shop.objects.filter(domain=host).first()
+    if shop is None:
+        if settings.DEBUG:
+            return Shop.objects.order_by('pk').first()
+        shops = list(Shop.objects.order_by('pk')[:2])
+        shop = shops[0] if len(shops) == 1 else None
+    return shop
+
+
+def resolve_shop(host):
+    """
+    Resolve the shop serving the given host (port stripped).
+    Returns None when no shop serves it (see _lookup_shop).
+    """
+    host = host.split(':', 1)[0].lower()
+    key = f'flavors:shop-host:{_shops_generation()}:{host}'
+
+    shop = cache.get(key)
+    perf.record_cache(shop is not None)
+    if shop is None:
+        shop = _lookup_shop(host)
+        cache.set(key, shop if shop is not None else _NO_SHOP, SHOP_CACHE_TIMEOUT)
+    elif shop == _NO_SHOP:
+        shop = None
+    return shop
+
+
+def tenant_key(shop, *parts):
+    """Build a cache key namespaced to a shop, e.g. flavors:shop:3:menu."""
+    shop_id = shop if isinstance(shop, int) else shop.pk
+    return ':'.join(['flavors', 'shop', str(shop_id), *[str(part) for part in parts]])
+
+
+def tenant_version(shop, name):
+    """
+    Return a shop's current version counter for a group of cached data.
+    Include it in cache keys; bump_tenant_version() then invalidates them all.
+    """
+    return _get_counter(tenant_key(shop, 'version', name))
+
+
+def bump_tenant_version(shop, name):
+    _bump_counter(tenant_key(shop, 'version', name))
+
+
+@receiver([post_save, post_delete], sender=Shop)
+def _invalidate_shop_cache(sender, **kwargs):
+    """Any Shop change invalidates all cached host lookups at once."""
+    _bump_counter(SHOPS_GENERATION_KEY)
@@ -0,0 +1,103 @@
+"""
+Base classes and fixtures for tests (run with config.settings_test).
+
+- Each test process (one per `manage.py test --parallel` worker) writes media,
+  menu events, metrics, profiles and upload spools to its own temporary
+  directory, so workers never see each other's files.
+- Photos are the slow part of Flavor.save (Pillow decode + WebP encode). The
+  fixtures below encode each photo size once per process as a WebP within
+  1200px, which optimize_photo stores as is; Flavor.save still runs (thumbnail,
+  menu signals), so fixtures match what the panel creates.
+"""
+import functools
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from itertools import count
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase as DjangoTestCase, TransactionTestCase as DjangoTransactionTestCase
+from django.test import override_settings
+
+from .images import optimize_photo
+from .models import Flavor, Shop
+
+_process_dirs = {}  # pid -> data directory, so forked workers don't inherit the parent's
+_names = count(1)
+
+
+def process_data_dir():
+    """This process's temporary data directory (inside settings.TEST_DATA_DIR, removed at exit)."""
+    pid = os.getpid()
+    if pid not in _process_dirs:
+        _process_dirs[pid] = tempfile.mkdtemp(prefix=f'worker-{pid}-', dir=settings.TEST_DATA_DIR)
+    return _process_dirs[pid]
+
+
+@functools.lru_cache(maxsize=None)
+def photo_bytes(size=(400, 300), color=(222, 184, 135)):
+    """WebP bytes as Flavor.save would store them, encoded once per process."""
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    return optimize_photo(buffer.getvalue())
+
+
+def uploaded_photo(name='photo.webp', size=(400, 300), color=(222, 184, 135)):
+    """A photo upload; already WebP within 1200px, so optimize_photo passes it through."""
+    return SimpleUploadedFile(name, photo_bytes(size, color), content_type='image/webp')
+
+
+def create_shop(slug='lodziarnia', **fields):
+    """A shop served on the test client's host."""
+    fields.setdefault('name', slug.capitalize())
+    fields.setdefault('domain', 'testserver')
+    return Shop.objects.create(slug=slug, **fields)
+
+
+def create_flavor(shop, photo=False, **fields):
+    """
+    Create a flavor through Flavor.save. With photo=True (or a (width, height)
+    size) it gets a prebuilt photo, stored with its thumbnail as on upload.
+    """
+    fields.setdefault('name', f'Smak {next(_names)}')
+    if photo:
+        fields['photo'] = uploaded_photo(size=photo) if isinstance(photo, tuple) else uploaded_photo()
+    return Flavor.objects.create(shop=shop, **fields)
+
+
+class IsolatedDataMixin:
+    """Per-process data directories and a clean cache for every test."""
+
+    @classmethod
+    def setUpClass(cls):
+        base = process_data_dir()
+        data_settings = override_settings(
+            MEDIA_ROOT=os.path.join(base, 'media'),
+            MENU_EVENTS_DIR=os.path.join(base, 'events'),
+            METRICS_DIR=os.path.join(base, 'metrics'),
+            PROFILES_DIR=os.path.join(base, 'profiles'),
+            UPLOADS_DIR=os.path.join(base, 'uploads'),
+        )
+        data_settings.enable()
+        cls.addClassCleanup(data_settings.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        super().setUp()
+        # Tenant version counters, cached fragments and menu event states would
+        # leak between tests (shop ids repeat once the database is rolled back)
+        cache.clear()
+        shutil.rmtree(settings.MENU_EVENTS_DIR, ignore_errors=True)
+
+
+class TestCase(IsolatedDataMixin, DjangoTestCase):
+    pass
+
+
+class TransactionTestCase(IsolatedDataMixin, DjangoTransactionTestCase):
+    """For code that needs real commits, e.g. menu events published from transaction.on_commit."""
@@ -0,0 +1,39 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+
+from apps.flavors.clock import local_today
+from apps.flavors.management.commands import compact_history
+from apps.flavors.models import DailySelection, MenuHistory
+from apps.flavors.testing import TestCase, create_flavor, create_shop
+
+
+class CompactHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = create_shop()
+        cls.flavors = [create_flavor(cls.shop) for _ in range(3)]
+        today = local_today()
+        for days_ago in [0, *range(100, 110)]:
+            selection = DailySelection.objects.create(
+                shop=cls.shop, date=today - timedelta(days=days_ago),
+                display_order=[flavor.pk for flavor in cls.flavors],
+            )
+            selection.flavors.set(cls.flavors)
+
+    def test_menu_signalled_once_per_shop(self):
+        # ANALYZE/VACUUM/checkpoint can't run inside the test's transaction
+        with mock.patch.object(compact_history.Command, 'reclaim'), \
+                mock.patch('apps.flavors.signals.publish_menu_event') as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            call_command('compact_history', '--keep-days=90', '--batch-size=4', '--no-vacuum', stdout=StringIO())
+
+        publish.assert_called_once_with(self.shop.pk)
+        self.assertEqual(DailySelection.objects.count(), 1)
+        self.assertEqual(MenuHistory.objects.count(), 10)
+        self.assertEqual(
+            MenuHistory.objects.first().flavors,
+            [[flavor.pk, flavor.name] for flavor in self.flavors],
+        )
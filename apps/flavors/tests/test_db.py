@@ -0,0 +1,35 @@
+from unittest import mock
+
+from django.db import OperationalError
+
+from apps.flavors import db
+from apps.flavors.testing import TransactionTestCase
+
+
+@mock.patch.object(db, 'RETRY_BASE_DELAY', 0)
+class RunWriteTests(TransactionTestCase):
+    def test_retried_while_locked(self):
+        calls = []
+
+        def write():
+            calls.append(1)
+            if len(calls) < db.WRITE_ATTEMPTS:
+                raise OperationalError('database is locked')
+            return 'zapisano'
+
+        self.assertEqual(db.run_write('test', write), 'zapisano')
+        self.assertEqual(len(calls), db.WRITE_ATTEMPTS)
+
+    def test_gives_up_after_last_attempt(self):
+        write = mock.Mock(side_effect=OperationalError('database is locked'))
+
+        with self.assertRaises(OperationalError):
+            db.run_write('test', write)
+        self.assertEqual(write.call_count, db.WRITE_ATTEMPTS)
+
+    def test_other_errors_not_retried(self):
+        write = mock.Mock(side_effect=OperationalError('no such table: flavors_flavor'))
+
+        with self.assertRaises(OperationalError):
+            db.run_write('test', write)
+        self.assertEqual(write.call_count, 1)
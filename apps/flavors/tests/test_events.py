@@ -0,0 +1,77 @@
+import asyncio
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from apps.flavors import events
+from apps.flavors.clock import local_today
+from apps.flavors.events import current_version, get_state, publish_menu_event
+from apps.flavors.models import DailySelection
+from apps.flavors.testing import TransactionTestCase, create_flavor, create_shop
+
+
+class MenuEventTests(TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shop = create_shop()
+        self.vanilla = create_flavor(self.shop, name='Wanilia')
+        self.mango = create_flavor(self.shop, name='Mango')
+
+    def stage_selection(self, published_at):
+        selection = DailySelection.objects.create(
+            shop=self.shop, date=local_today(), published_at=published_at, display_order=[self.mango.pk],
+        )
+        selection.flavors.add(self.mango)
+        return selection
+
+    def test_current_version_follows_published_events(self):
+        version = current_version(self.shop)
+        self.assertEqual(version, get_state(self.shop)['version'])
+
+        self.vanilla.name = 'Wanilia bourbon'
+        self.vanilla.save()
+
+        self.assertEqual(current_version(self.shop), version + 1)
+        self.assertEqual(get_state(self.shop)['version'], version + 1)
+
+    def test_staged_selection_records_next_publish(self):
+        version = current_version(self.shop)
+        published_at = timezone.now() + timedelta(hours=1)
+
+        self.stage_selection(published_at)
+
+        state = get_state(self.shop)
+        # Not visible yet: no event, only the time to publish one
+        self.assertEqual(state['version'], version)
+        self.assertEqual(state['next_publish_at'], published_at.timestamp())
+
+    def test_poller_publishes_when_staged_selection_goes_live(self):
+        published_at = timezone.now() + timedelta(hours=1)
+        self.stage_selection(published_at)
+        version = current_version(self.shop)
+
+        async def receive():
+            broker = events.MenuBroker()
+            queue = broker.subscribe(self.shop.pk)
+            try:
+                return await asyncio.wait_for(queue.get(), timeout=5)
+            finally:
+                broker.unsubscribe(self.shop.pk, queue)
+
+        later = published_at + timedelta(seconds=1)
+        with mock.patch.object(events, 'POLL_INTERVAL', 0.01), \
+                mock.patch.object(events.timezone, 'now', return_value=later):
+            event = asyncio.run(receive())
+
+        self.assertEqual(event['version'], version + 1)
+        self.assertEqual(event['order'], [self.mango.pk])
+        self.assertIsNone(get_state(self.shop)['next_publish_at'])
+        self.assertEqual(current_version(self.shop), version + 1)
+
+    def test_unchanged_menu_publishes_nothing(self):
+        version = current_version(self.shop)
+
+        self.assertIsNone(publish_menu_event(self.shop.pk))
+
+        self.assertEqual(current_version(self.shop), version)
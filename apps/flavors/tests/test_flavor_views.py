@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from apps.flavors.models import Flavor
+from apps.flavors.pagination import PAGE_SIZE
+from apps.flavors.testing import TestCase, create_flavor, create_shop, uploaded_photo
+
+
+class FlavorViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = create_shop()
+        cls.user = get_user_model().objects.create_user('wlasciciel', password='haslo')
+        cls.shop.owners.add(cls.user)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_htmx_create_renders_the_list(self):
+        create_flavor(self.shop, name='Wanilia')
+
+        response = self.client.post(
+            reverse('flavors:admin_flavor_create'),
+            {'name': 'Pistacja', 'flavor_type': 'milk', 'tags': '[]'},
+            headers={'HX-Request': 'true'},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Pistacja')
+        self.assertContains(response, 'Wanilia')
+        self.assertNotContains(response, 'Brak smakow')
+
+    def test_create_with_photo(self):
+        response = self.client.post(
+            reverse('flavors:admin_flavor_create'),
+            {'name': 'Malina', 'flavor_type': 'sorbet', 'tags': '[]', 'photo': uploaded_photo()},
+        )
+
+        self.assertRedirects(response, reverse('flavors:admin_flavor_list'))
+        flavor = Flavor.objects.get(name='Malina')
+        self.assertTrue(flavor.photo.name.endswith('.webp'))
+        self.assertIn('/thumbs/', flavor.thumbnail_url)
+
+    def test_list_pages_by_keyset(self):
+        for i in range(PAGE_SIZE + 3):
+            create_flavor(self.shop, name=f'Smak {i:02d}')
+        url = reverse('flavors:admin_flavor_list')
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        cursor = first.context['rows_html'].split('after=')[1].split('"')[0].split('&')[0]
+        rest = self.client.get(url, {'after': cursor}, headers={'HX-Request': 'true'})
+
+        shown = [name for name in Flavor.objects.values_list('name', flat=True)
+                 if name in first.content.decode() or name in rest.content.decode()]
+        self.assertEqual(len(shown), PAGE_SIZE + 3)
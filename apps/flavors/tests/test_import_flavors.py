@@ -0,0 +1,55 @@
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from apps.flavors.management.commands import import_flavors
+from apps.flavors.models import Flavor
+from apps.flavors.testing import TestCase, create_flavor, create_shop, process_data_dir
+
+
+# --parallel test workers are daemonic processes, which can't start a process pool
+@mock.patch.object(import_flavors, 'ProcessPoolExecutor', ThreadPoolExecutor)
+class ImportFlavorsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = create_shop()
+        create_flavor(cls.shop, name='Wanilia')
+
+    def write_csv(self, rows):
+        path = os.path.join(process_data_dir(), 'flavors.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['name', 'flavor_type', 'tags'])
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def test_imported_flavor_on_homepage(self):
+        # Cache the homepage grid first: the import has to invalidate it
+        self.assertNotContains(self.client.get(reverse('flavors:homepage')), 'Pistacja')
+        path = self.write_csv([{'name': 'Pistacja', 'flavor_type': 'milk', 'tags': 'vegan'}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_flavors', path, f'--shop={self.shop.slug}', '--workers=1', stdout=StringIO())
+
+        self.assertTrue(Flavor.objects.filter(shop=self.shop, name='Pistacja').exists())
+        response = self.client.get(reverse('flavors:homepage'))
+        self.assertContains(response, 'Pistacja')
+        self.assertContains(response, 'Wanilia')
+
+    def test_existing_names_skipped(self):
+        path = self.write_csv([
+            {'name': 'Wanilia', 'flavor_type': 'milk', 'tags': ''},
+            {'name': 'Mango', 'flavor_type': 'sorbet', 'tags': ''},
+        ])
+        stderr = StringIO()
+
+        call_command('import_flavors', path, f'--shop={self.shop.slug}', '--workers=1',
+                     stdout=StringIO(), stderr=stderr)
+
+        self.assertIn('Skipping "Wanilia": already exists', stderr.getvalue())
+        self.assertEqual(Flavor.objects.filter(shop=self.shop).count(), 2)
@@ -0,0 +1,72 @@
+from django.urls import reverse
+
+from apps.flavors.events import current_version, publish_menu_event
+from apps.flavors.testing import TestCase, create_flavor, create_shop
+
+
+class MenuApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = create_shop()
+        cls.vanilla = create_flavor(cls.shop, name='Wanilia')
+        cls.mango = create_flavor(cls.shop, name='Mango', photo=True)
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('flavors:api_menu')
+        # The state the kept events start from, as after the site's first change
+        publish_menu_event(self.shop.pk)
+
+    def rename(self, flavor, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            flavor.name = name
+            flavor.save()
+
+    def test_full_menu(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertFalse(data['delta'])
+        self.assertEqual([flavor['name'] for flavor in data['flavors']], ['Mango', 'Wanilia'])
+        self.assertIn('/thumbs/', data['flavors'][0]['thumbnail'])
+
+    def test_unchanged_menu_answered_with_304(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_change_invalidates_etag_and_payload(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.rename(self.vanilla, 'Wanilia bourbon')
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Wanilia bourbon', [flavor['name'] for flavor in response.json()['flavors']])
+
+    def test_delta_since_version(self):
+        version = current_version(self.shop)
+
+        self.rename(self.vanilla, 'Wanilia bourbon')
+        data = self.client.get(self.url, {'since': version}).json()
+
+        self.assertTrue(data['delta'])
+        self.assertEqual(data['version'], version + 1)
+        self.assertEqual([flavor['name'] for flavor in data['flavors']], ['Wanilia bourbon'])
+        self.assertEqual(data['order'], [self.mango.pk, self.vanilla.pk])
+        self.assertEqual(data['removed'], [])
+
+    def test_unknown_version_gets_full_menu(self):
+        data = self.client.get(self.url, {'since': 12345}).json()
+
+        self.assertFalse(data['delta'])
+        self.assertEqual(len(data['flavors']), 2)
+
+    def test_invalid_since(self):
+        response = self.client.get(self.url, {'since': 'wczoraj'})
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,32 @@
+from django.db import transaction
+
+from apps.flavors.menu import render_menu_grid
+from apps.flavors.tenancy import tenant_version
+from apps.flavors.testing import TestCase, create_flavor, create_shop
+
+
+class MenuVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = create_shop()
+        cls.flavor = create_flavor(cls.shop, name='Wanilia')
+
+    def test_version_bumped_only_on_commit(self):
+        before = tenant_version(self.shop, 'menu')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.flavor.name = 'Wanilia bourbon'
+                self.flavor.save()
+                self.assertEqual(tenant_version(self.shop, 'menu'), before)
+
+        self.assertNotEqual(tenant_version(self.shop, 'menu'), before)
+
+    def test_grid_rebuilt_after_change(self):
+        self.assertIn('Wanilia', render_menu_grid(self.shop, None))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flavor.name = 'Pistacja'
+            self.flavor.save()
+
+        self.assertIn('Pistacja', render_menu_grid(self.shop, None))
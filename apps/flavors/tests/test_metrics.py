@@ -0,0 +1,59 @@
+import os
+import threading
+from collections import defaultdict
+from unittest import mock
+
+from django.conf import settings
+
+from apps.flavors import metrics
+from apps.flavors.testing import TestCase
+
+
+class MetricsTests(TestCase):
+    def test_concurrent_flushes_do_not_raise(self):
+        errors = []
+
+        def record():
+            try:
+                for _ in range(200):
+                    metrics.inc('flavors_sqlite_busy_total', endpoint='test_threads')
+            except Exception as e:
+                errors.append(e)
+
+        with mock.patch.object(metrics, 'FLUSH_INTERVAL', 0):
+            threads = [threading.Thread(target=record) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertIn('flavors_sqlite_busy_total{endpoint="test_threads"} ', metrics.render())
+        leftovers = [name for name in os.listdir(settings.METRICS_DIR) if name.startswith('.tmp-')]
+        self.assertEqual(leftovers, [])
+
+    def test_write_failure_is_logged_not_raised(self):
+        with mock.patch.object(metrics, '_write_json', side_effect=OSError('disk full')), \
+                self.assertLogs('apps.flavors.metrics', 'WARNING'):
+            metrics.flush()
+
+    def test_no_file_at_exit_without_metrics(self):
+        with mock.patch.object(metrics, '_counters', defaultdict(float)), \
+                mock.patch.object(metrics, '_histograms', {}), \
+                mock.patch.object(metrics, 'flush') as flush:
+            metrics._flush_at_exit()
+
+        flush.assert_not_called()
+
+    def test_query_latency_by_statement_type(self):
+        def count(statement):
+            histogram = metrics._histograms.get(
+                metrics._key('flavors_db_query_duration_seconds', {'statement': statement})
+            )
+            return histogram['count'] if histogram else 0
+
+        before = count('SELECT')
+
+        self.client.get('/')
+
+        self.assertGreater(count('SELECT'), before)
@@ -0,0 +1,25 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from apps.flavors.testing import TestCase, create_shop
+
+
+class MetricsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_shop()
+
+    @override_settings(METRICS_TOKEN='', METRICS_ALLOWED_IPS=[])
+    def test_closed_without_token_or_allowlist(self):
+        response = self.client.get(reverse('flavors:metrics'), REMOTE_ADDR='127.0.0.1')
+
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_TOKEN='sekret', METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_token_required_when_set(self):
+        url = reverse('flavors:metrics')
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+        response = self.client.get(url, headers={'Authorization': 'Bearer sekret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
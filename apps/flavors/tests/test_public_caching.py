@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from apps.flavors.testing import TestCase, create_flavor, create_shop
+
+
+class PublicCachingTests(TestCase):
+    """Public pages are shared by caches, so they must not vary on the session cookie."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = create_shop()
+        create_flavor(cls.shop, name='Wanilia')
+        cls.user = get_user_model().objects.create_user('wlasciciel', password='haslo', is_staff=True)
+
+    def assertNoVaryCookie(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('cookie', response.get('Vary', '').lower())
+
+    def test_homepage(self):
+        self.assertNoVaryCookie(reverse('flavors:homepage'))
+
+    def test_menu_api(self):
+        self.assertNoVaryCookie(reverse('flavors:api_menu'))
+
+    def test_with_session_cookie(self):
+        # An owner browsing the public site still carries the panel session cookie
+        self.client.force_login(self.user)
+
+        self.assertNoVaryCookie(reverse('flavors:homepage'))
+        self.assertNoVaryCookie(reverse('flavors:api_menu'))
+
+    def test_panel_renews_session(self):
+        self.shop.owners.add(self.user)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('flavors:admin_flavor_list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('sessionid', response.cookies)
@@ -0,0 +1,142 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from apps.flavors.clock import local_today
+from apps.flavors.models import DailySelection
+from apps.flavors.testing import TestCase, create_flavor, create_shop
+
+
+class SelectionBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = create_shop()
+        cls.user = get_user_model().objects.create_user('wlasciciel', password='haslo')
+        cls.shop.owners.add(cls.user)
+        cls.vanilla = create_flavor(cls.shop, name='Wanilia')
+        cls.chocolate = create_flavor(cls.shop, name='Czekolada')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def post_batch(self, ops, date=None, **headers):
+        url = reverse('flavors:admin_selection_batch')
+        return self.client.post(
+            f'{url}?date={date}' if date else url,
+            json.dumps({'ops': ops}),
+            content_type='application/json',
+            headers=headers,
+        )
+
+    def select_op(self, flavor, selected, op_id=1):
+        return {'id': op_id, 'type': 'select', 'flavor': flavor.pk, 'selected': selected}
+
+    def test_select_and_hit(self):
+        response = self.post_batch([
+            self.select_op(self.vanilla, True, 1),
+            self.select_op(self.chocolate, True, 2),
+            {'id': 3, 'type': 'hit', 'flavor': self.chocolate.pk},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['selected'], sorted([self.vanilla.pk, self.chocolate.pk]))
+        selection = DailySelection.objects.get(shop=self.shop, date=local_today())
+        self.assertEqual(selection.display_order, [self.vanilla.pk, self.chocolate.pk])
+        self.assertEqual(selection.hit_of_the_day, self.chocolate)
+
+    def test_deselect_flavor_missing_from_display_order(self):
+        # Rows written by older endpoints can have flavors that aren't in display_order
+        selection = DailySelection.objects.create(shop=self.shop, date=local_today(), display_order=[self.chocolate.pk])
+        selection.flavors.add(self.vanilla, self.chocolate)
+
+        response = self.post_batch([self.select_op(self.vanilla, False)])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['selected'], [self.chocolate.pk])
+        selection.refresh_from_db()
+        self.assertEqual(list(selection.flavors.all()), [self.chocolate])
+        self.assertEqual(selection.display_order, [self.chocolate.pk])
+
+    def test_archived_flavor_is_a_conflict(self):
+        archived = create_flavor(self.shop, status='archived')
+
+        response = self.post_batch([self.select_op(archived, True)])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['reason'], 'unavailable')
+        self.assertEqual(response.json()['selected'], [])
+
+    def test_replayed_batch_is_applied_once(self):
+        self.post_batch([self.select_op(self.vanilla, True)], x_batch_id='batch-1')
+        # Deselected in the meantime; the replay must not select it again
+        self.post_batch([self.select_op(self.vanilla, False)])
+
+        response = self.post_batch([self.select_op(self.vanilla, True)], x_batch_id='batch-1')
+
+        self.assertEqual(response.status_code, 200)
+        selection = DailySelection.objects.get(shop=self.shop, date=local_today())
+        self.assertFalse(selection.flavors.exists())
+
+    def test_invalid_ops(self):
+        response = self.post_batch([{'id': 1, 'type': 'select', 'flavor': 'x', 'selected': True}])
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_for_past_day_rejected(self):
+        yesterday = local_today() - timedelta(days=1)
+
+        response = self.post_batch([self.select_op(self.vanilla, True)], date=yesterday.isoformat())
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(DailySelection.objects.exists())
+
+    def test_batch_for_future_day_staged(self):
+        tomorrow = local_today() + timedelta(days=1)
+
+        response = self.post_batch([self.select_op(self.vanilla, True)], date=tomorrow.isoformat())
+
+        self.assertEqual(response.status_code, 200)
+        selection = DailySelection.objects.get(shop=self.shop)
+        self.assertEqual(selection.date, tomorrow)
+        self.assertEqual(list(selection.flavors.all()), [self.vanilla])
+
+    def test_other_changes_for_past_day_rejected(self):
+        yesterday = local_today() - timedelta(days=1)
+
+        response = self.client.post(f"{reverse('flavors:admin_clear_selection')}?date={yesterday}")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(DailySelection.objects.exists())
+
+    def test_expired_session_gets_json_401(self):
+        self.client.logout()
+
+        response = self.post_batch([self.select_op(self.vanilla, True)])
+
+        # Not a redirect to the login page: fetch would follow it and see a 200
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertFalse(DailySelection.objects.exists())
+
+    def test_other_owners_shop_gets_json_403(self):
+        self.client.force_login(get_user_model().objects.create_user('obcy', password='haslo'))
+
+        response = self.post_batch([self.select_op(self.vanilla, True)])
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_opening_a_day_creates_nothing(self):
+        tomorrow = local_today() + timedelta(days=1)
+
+        for name in ('flavors:admin_daily_selection', 'flavors:admin_daily_selection_sort'):
+            response = self.client.get(reverse(name), {'date': tomorrow.isoformat()})
+            self.assertEqual(response.status_code, 200)
+
+        # An empty staged selection would go live at midnight and hide the menu
+        self.assertFalse(DailySelection.objects.exists())
+        self.post_batch([self.select_op(self.vanilla, True)], date=tomorrow.isoformat())
+        self.assertEqual(DailySelection.objects.get().date, tomorrow)
@@ -0,0 +1,48 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from apps.flavors.models import Shop
+from apps.flavors.tenancy import resolve_shop
+from apps.flavors.testing import TestCase, create_shop
+
+
+@override_settings(ALLOWED_HOSTS=['.example.com', 'localhost'])
+class ResolveShopTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Migration 0003 creates a default shop; these tests count shops
+        Shop.objects.all().delete()
+
+    def test_shop_by_domain(self):
+        create_shop('lodziarnia', domain='lody.example.com')
+        other = create_shop('gelateria', domain='gelato.example.com')
+
+        self.assertEqual(resolve_shop('GELATO.example.com:443'), other)
+
+    def test_unknown_host_of_single_shop_install(self):
+        shop = create_shop(domain='lody.example.com')
+
+        self.assertEqual(resolve_shop('www.lody.example.com'), shop)
+
+    def test_unknown_host_with_several_shops(self):
+        create_shop('lodziarnia', domain='lody.example.com')
+        create_shop('gelateria', domain='gelato.example.com')
+
+        self.assertIsNone(resolve_shop('obcy.example.com'))
+        response = self.client.get(reverse('flavors:homepage'), headers={'host': 'obcy.example.com'})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(DEBUG=True)
+    def test_unknown_host_in_debug(self):
+        first = create_shop('lodziarnia', domain='lody.example.com')
+        create_shop('gelateria', domain='gelato.example.com')
+
+        self.assertEqual(resolve_shop('localhost'), first)
+
+    def test_new_shop_invalidates_cached_lookup(self):
+        create_shop('lodziarnia', domain='lody.example.com')
+        self.assertIsNotNone(resolve_shop('obcy.example.com'))
+
+        create_shop('gelateria', domain='gelato.example.com')
+
+        self.assertIsNone(resolve_shop('obcy.example.com'))
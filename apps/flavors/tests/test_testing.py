@@ -0,0 +1,21 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from apps.flavors.images import thumbnail_name
+from apps.flavors.testing import TestCase, create_flavor, create_shop, photo_bytes
+
+
+class FixtureTests(TestCase):
+    def test_flavor_photo_matches_an_upload(self):
+        flavor = create_flavor(create_shop(), photo=True)
+
+        self.assertTrue(flavor.photo.name.startswith('flavors/'))
+        with flavor.photo.open('rb') as f:
+            self.assertEqual(f.read(), photo_bytes())
+        self.assertTrue(default_storage.exists(thumbnail_name(flavor.photo.name)))
+
+    def test_media_is_per_process(self):
+        self.assertIn(f'worker-{os.getpid()}-', str(settings.MEDIA_ROOT))
+        self.assertTrue(str(settings.MEDIA_ROOT).startswith(str(settings.TEST_DATA_DIR)))
@@ -0,0 +1,89 @@
+import base64
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from apps.flavors import uploads
+from apps.flavors.forms import FlavorForm
+from apps.flavors.models import Flavor
+from apps.flavors.testing import TestCase, create_shop, photo_bytes
+
+
+class ResumableUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = create_shop()
+        cls.user = get_user_model().objects.create_user('wlasciciel', password='haslo')
+        cls.shop.owners.add(cls.user)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def upload(self, data, chunk_size):
+        response = self.client.post(reverse('flavors:admin_upload_create'), headers={
+            'Upload-Length': str(len(data)),
+            'Upload-Metadata': f"filename {base64.b64encode(b'malina.webp').decode()}",
+        })
+        self.assertEqual(response.status_code, 201)
+        url = response['Location']
+        for offset in range(0, len(data), chunk_size):
+            response = self.client.patch(
+                url, data[offset:offset + chunk_size], content_type='application/offset+octet-stream',
+                headers={'Upload-Offset': str(offset)},
+            )
+            self.assertEqual(response.status_code, 204)
+            self.assertEqual(int(response['Upload-Offset']), min(offset + chunk_size, len(data)))
+        return url.rstrip('/').rsplit('/', 1)[1]
+
+    def test_chunked_upload_creates_flavor(self):
+        upload_id = self.upload(photo_bytes(), chunk_size=1000)
+
+        response = self.client.post(
+            reverse('flavors:admin_flavor_create'),
+            {'name': 'Malina', 'flavor_type': 'sorbet', 'tags': '[]', 'upload_id': upload_id},
+        )
+
+        self.assertRedirects(response, reverse('flavors:admin_flavor_list'))
+        flavor = Flavor.objects.get(name='Malina')
+        with flavor.photo.open('rb') as f:
+            self.assertEqual(f.read(), photo_bytes())
+        # The spool files are gone once the flavor has its copy
+        self.assertIsNone(uploads.get(upload_id, self.shop))
+
+    def test_wrong_offset_rejected(self):
+        data = photo_bytes()
+        response = self.client.post(
+            reverse('flavors:admin_upload_create'), headers={'Upload-Length': str(len(data))},
+        )
+
+        response = self.client.patch(
+            response['Location'], data[:100], content_type='application/offset+octet-stream',
+            headers={'Upload-Offset': '50'},
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '0')
+
+    def test_completed_upload_validated_from_disk(self):
+        upload_id = self.upload(photo_bytes(), chunk_size=4096)
+        form = FlavorForm(
+            {'name': 'Malina', 'flavor_type': 'sorbet', 'tags': '[]', 'upload_id': upload_id}, shop=self.shop,
+        )
+
+        # Reading the upload would mean validation loads the whole photo into memory
+        with mock.patch.object(uploads.CompletedUpload, 'read', side_effect=AssertionError('read into memory')):
+            self.assertTrue(form.is_valid(), form.errors)
+
+        self.assertEqual(form.cleaned_data['photo'].image.size, (400, 300))
+        form.cleaned_data['photo'].close()
+
+    def test_unfinished_upload_rejected(self):
+        upload_id = uploads.create(self.shop, len(photo_bytes()), 'malina.webp')
+        form = FlavorForm(
+            {'name': 'Malina', 'flavor_type': 'sorbet', 'tags': '[]', 'upload_id': upload_id}, shop=self.shop,
+        )
+
+        self.assertFalse(form.is_valid())
+        self.assertIn('photo', form.errors)
@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+
+from django.core.files.storage import default_storage
+
+from apps.flavors.images import thumbnail_name
+from apps.flavors.management.commands import warmup
+from apps.flavors.testing import TestCase, create_flavor, create_shop
+
+
+# --parallel test workers are daemonic processes, which can't start a process pool
+@mock.patch.object(warmup, 'ProcessPoolExecutor', ThreadPoolExecutor)
+class WarmupThumbnailTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        shop = create_shop()
+        self.flavors = [create_flavor(shop, photo=True) for _ in range(5)]
+        for flavor in self.flavors:
+            default_storage.delete(thumbnail_name(flavor.photo.name))
+        self.command = warmup.Command(stdout=StringIO(), stderr=StringIO())
+
+    def test_missing_thumbnails_generated(self):
+        default_storage.delete(self.flavors[0].photo.name)
+
+        summary = self.command.make_thumbnails(workers=1)
+
+        self.assertEqual(summary, '4 of 5 generated')
+        self.assertIn(f'flavor {self.flavors[0].pk}', self.command.stderr.getvalue())
+        for flavor in self.flavors[1:]:
+            self.assertTrue(default_storage.exists(thumbnail_name(flavor.photo.name)))
+
+    def test_photos_read_as_workers_free_up(self):
+        pending = []
+        read_photo, save_thumbnail = warmup._read_photo, self.command.save_thumbnail
+
+        def read(name):
+            pending.append(name)
+            # Never more photos held in the parent than the in-flight limit
+            self.assertLessEqual(len(pending), warmup.PHOTOS_IN_FLIGHT)
+            return read_photo(name)
+
+        def save(flavor, future):
+            pending.pop(0)
+            return save_thumbnail(flavor, future)
+
+        with mock.patch.object(warmup, '_read_photo', read), \
+                mock.patch.object(self.command, 'save_thumbnail', save):
+            summary = self.command.make_thumbnails(workers=1)
+
+        self.assertEqual(summary, '5 of 5 generated')
+
+    def test_thumbnail_url_falls_back_until_generated(self):
+        flavor = self.flavors[0]
+        self.assertEqual(flavor.thumbnail_url, flavor.photo.url)
+
+        self.command.make_thumbnails(workers=1)
+
+        self.assertIn('/thumbs/', flavor.thumbnail_url)
+        with mock.patch.object(default_storage, 'exists') as exists:
+            self.assertIn('/thumbs/', flavor.thumbnail_url)
+        exists.assert_not_called()
@@ -0,0 +1,149 @@
+"""
+Resumable photo uploads (the core of the tus protocol: create, HEAD, PATCH).
+
+The client creates an upload with its total size and then sends the file in
+chunks, each starting at the offset the server has. Chunks are streamed from
+the request to a spool file in UPLOADS_DIR a block at a time, so memory use
+doesn't depend on the photo size, and a dropped connection only loses the
+chunk in flight: the client asks for the offset and continues from there.
+A completed upload is handed to FlavorForm by its id.
+"""
+import json
+import os
+import re
+import secrets
+import time
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+
+try:
+    import fcntl
+except ImportError:  # Windows - single-process development only
+    fcntl = None
+
+MAX_UPLOAD_SIZE = 25 * 1024 * 1024  # bytes
+MAX_CHUNK_SIZE = 8 * 1024 * 1024  # bytes per PATCH
+STREAM_BLOCK_SIZE = 64 * 1024
+UPLOAD_MAX_AGE = 24 * 60 * 60  # seconds an unfinished or unused upload is kept
+
+UPLOAD_ID_RE = re.compile(r'^[A-Za-z0-9_-]{22}$')
+
+
+class CompletedUpload(UploadedFile):
+    """
+    A finished upload, read from its spool file. temporary_file_path() lets
+    ImageField validation open it from disk, as it does a TemporaryUploadedFile,
+    instead of reading it into memory first.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class UploadError(Exception):
+    """A request the upload can't accept; status is the HTTP status to answer with."""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def _paths(upload_id):
+    base = os.path.join(settings.UPLOADS_DIR, upload_id)
+    return f'{base}.part', f'{base}.json'
+
+
+def remove_stale(max_age=UPLOAD_MAX_AGE):
+    """Delete spool files of uploads older than max_age."""
+    cutoff = time.time() - max_age
+    try:
+        names = os.listdir(settings.UPLOADS_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = os.path.join(settings.UPLOADS_DIR, name)
+        try:
+            if os.stat(path).st_mtime < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def create(shop, length, filename):
+    """Start an upload of length bytes; returns its id."""
+    if not 0 < length <= MAX_UPLOAD_SIZE:
+        raise UploadError(f'Plik może mieć najwyżej {MAX_UPLOAD_SIZE // (1024 * 1024)} MB.', 413)
+    os.makedirs(settings.UPLOADS_DIR, exist_ok=True)
+    remove_stale()
+
+    upload_id = secrets.token_urlsafe(16)
+    part_path, meta_path = _paths(upload_id)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({'shop': shop.pk, 'length': length, 'filename': os.path.basename(filename)[:100]}, f)
+    open(part_path, 'wb').close()
+    return upload_id
+
+
+def get(upload_id, shop):
+    """Return the upload's metadata with its current 'offset', or None if it isn't this shop's."""
+    if not UPLOAD_ID_RE.match(upload_id):
+        return None
+    part_path, meta_path = _paths(upload_id)
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        meta['offset'] = os.path.getsize(part_path)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return meta if meta['shop'] == shop.pk else None
+
+
+def append(upload_id, shop, offset, stream, content_length):
+    """
+    Write a chunk read from stream at offset; returns the new offset.
+    A chunk cut short by a dropped connection is kept, the client resumes after it.
+    """
+    meta = get(upload_id, shop)
+    if meta is None:
+        raise UploadError('Nie znaleziono przesyłanego pliku.', 404)
+    if content_length > MAX_CHUNK_SIZE:
+        raise UploadError('Za duża część pliku.', 413)
+    if offset + content_length > meta['length']:
+        raise UploadError('Część pliku wykracza poza zadeklarowany rozmiar.', 413)
+
+    part_path, _ = _paths(upload_id)
+    with open(part_path, 'ab') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        # Checked under the lock: a retried chunk may race the original one
+        if f.seek(0, os.SEEK_END) != offset:
+            raise UploadError('Nieprawidłowy offset.', 409)
+        remaining = content_length
+        while remaining:
+            block = stream.read(min(STREAM_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            f.write(block)
+            remaining -= len(block)
+        return f.tell()
+
+
+def open_completed(upload_id, shop):
+    """Return a completed upload as a CompletedUpload, or None if it's unknown or unfinished."""
+    meta = get(upload_id, shop)
+    if meta is None or meta['offset'] != meta['length']:
+        return None
+    part_path, _ = _paths(upload_id)
+    return CompletedUpload(open(part_path, 'rb'), name=meta['filename'], size=meta['length'])
+
+
+def discard(upload_id):
+    """Delete an upload's spool files."""
+    if not UPLOAD_ID_RE.match(upload_id):
+        return
+    for path in _paths(upload_id):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -1,64 +1,72 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
-from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 
-from .models import DailySelection, Flavor
+from . import metrics
+from .events import current_version, event_stream
+from .menu import get_fallback_note, get_published_selection, render_menu_grid
 
 
 def homepage(request):
     """
-    Widok głównej strony wyświetlający dzisiejsze smaki.
-    Z logiką fallback: dzisiaj -> wczoraj -> wszystkie aktywne.
+    Widok głównej strony wyświetlający aktualnie opublikowane smaki.
+    Jedno zapytanie o najnowszy opublikowany zestaw (published_at <= teraz);
+    bez zestawu z dziś ani wczoraj pokazywane są wszystkie aktywne smaki.
+    Sklep wybierany na podstawie domeny (request.shop).
     """
-    today = timezone.now().date()
-    yesterday = today - timezone.timedelta(days=1)
+    shop = request.shop
+    if shop is None:
+        raise Http404('Brak sklepu dla tej domeny.')
 
-    flavors = []
-    hit_of_the_day = None
-    last_updated = None
-    fallback_note = None
+    selection = get_published_selection(shop)
 
-    # Próba pobrania dzisiejszego zestawu
-    try:
-        selection = DailySelection.objects.select_related(
-            'hit_of_the_day'
-        ).prefetch_related('flavors').get(date=today)
+    context = {
+        'menu_grid': render_menu_grid(shop, selection),
+        'last_updated': selection.updated_at if selection else None,
+        'fallback_note': get_fallback_note(selection),
+        'menu_version': current_version(shop),
+    }
 
-        flavors = list(selection.flavors.all())
-        hit_of_the_day = selection.hit_of_the_day
-        last_updated = selection.updated_at
+    return render(request, 'flavors/homepage.html', context)
 
-    except DailySelection.DoesNotExist:
-        # Fallback: wczorajszy zestaw
-        try:
-            selection = DailySelection.objects.select_related(
-                'hit_of_the_day'
-            ).prefetch_related('flavors').get(date=yesterday)
 
-            flavors = list(selection.flavors.all())
-            hit_of_the_day = selection.hit_of_the_day
-            last_updated = selection.updated_at
-            fallback_note = "Wczorajsze smaki (dzisiejsze wkrótce)"
+async def menu_events(request):
+    """
+    Strumień SSE ze zmianami menu dla strony głównej (patrz apps/flavors/events.py).
+    Wymaga serwera ASGI; pod WSGI zwraca 204, więc EventSource nie łączy się ponownie.
+    """
+    shop = request.shop
+    if shop is None:
+        raise Http404('Brak sklepu dla tej domeny.')
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
 
-        except DailySelection.DoesNotExist:
-            # Ostateczny fallback: wszystkie aktywne smaki
-            flavors = list(Flavor.objects.filter(status='active'))
-            fallback_note = "Wszystkie dostępne smaki"
+    try:
+        last_event_id = int(request.headers['Last-Event-ID'])
+    except (KeyError, ValueError):
+        last_event_id = None
 
-    # Sortowanie według display_order jeśli dostępne
-    if flavors and 'selection' in locals() and selection.display_order:
-        order_map = {pk: idx for idx, pk in enumerate(selection.display_order)}
-        flavors.sort(key=lambda f: order_map.get(f.pk, 9999))
+    response = StreamingHttpResponse(
+        event_stream(shop.pk, last_event_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: don't buffer the stream
+    return response
 
-    # Przeniesienie hit_of_the_day na pierwszą pozycję
-    if hit_of_the_day and hit_of_the_day in flavors:
-        flavors.remove(hit_of_the_day)
-        flavors.insert(0, hit_of_the_day)
 
-    context = {
-        'flavors': flavors,
-        'hit_of_the_day': hit_of_the_day,
-        'last_updated': last_updated,
-        'fallback_note': fallback_note,
-    }
+def metrics_view(request):
+    """
+    Metryki serwera w formacie tekstowym Prometheusa (sumowane ze wszystkich procesów).
+    Dostęp z tokenem (METRICS_TOKEN, nagłówek Authorization: Bearer) lub z adresów METRICS_ALLOWED_IPS.
+    """
+    if settings.METRICS_TOKEN:
+        auth = request.headers.get('Authorization', '')
+        if not constant_time_compare(auth, f'Bearer {settings.METRICS_TOKEN}'):
+            raise PermissionDenied
+    elif request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise PermissionDenied
 
-    return render(request, 'flavors/homepage.html', context)
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,18 +1,58 @@
+import base64
+import binascii
+import hashlib
+import json
 import logging
+from datetime import date, timedelta
+from urllib.parse import urlencode
 
 from django.contrib.auth import authenticate, login, logout
-from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
+from django.core.cache import cache
+from django.core.exceptions import BadRequest
 from django.utils import timezone
-from django.http import HttpResponse
-
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.template.loader import render_to_string
+from django.templatetags.static import static
+from django.utils.safestring import mark_safe
+
+from . import profiling, uploads
+from .caching import get_or_build
+from .clock import local_today
+from .db import run_write
+from .pagination import keyset_page
+from .decorators import shop_owner_required, shop_owner_required_json, staff_required
 from .models import Flavor, DailySelection
 from .forms import FlavorForm
+from .tenancy import tenant_key, tenant_version
 
 logger = logging.getLogger(__name__)
 
+PANEL_FRAGMENT_TIMEOUT = 60 * 60  # versioned keys; this only bounds cache size
+
+# Columns the panel lists render (name, type badge, thumbnail) plus the sort keys
+LIST_FIELDS = ('pk', 'name', 'flavor_type', 'photo', 'status', 'created_at')
+NEWEST_FIRST = ('-created_at', '-pk')
+BY_NAME = ('name', 'pk')
+
+# Precached by the panel service worker; hashed names, so cache-first is safe
+PANEL_STATIC_ASSETS = (
+    'css/tailwind.css',
+    'css/custom.css',
+    'vendor/htmx/htmx.min.js',
+    'admin/js/selection_queue.js',
+)
+
+SELECTION_BATCH_MAX_OPS = 200
+BATCH_RESULT_TIMEOUT = 24 * 60 * 60  # replays of a batch within this window get the stored answer
+BATCH_CONFLICT_MESSAGES = {
+    'unavailable': 'Smak został zarchiwizowany lub usunięty.',
+    'not_selected': 'Wybierz najpierw ten smak, aby ustawić hit dnia.',
+}
+
 
 def admin_login(request):
     """Custom login view for ice cream shop owner."""
@@ -34,19 +74,24 @@ def admin_logout(request):
     return redirect('flavors:admin_login')
 
 
-@login_required
+@shop_owner_required
 @require_http_methods(["GET"])
 def admin_dashboard(request):
-    """Main admin dashboard - list flavors and daily selection status."""
-    flavors = Flavor.objects.filter(status='active').order_by('-created_at')
-    today = timezone.now().date()
-    today_selection = DailySelection.objects.filter(date=today).first()
-
+    """Main admin dashboard - counts, today's selection status and recent flavors (infinite scroll)."""
+    flavors = Flavor.objects.for_shop(request.shop).active().only(*LIST_FIELDS)
+    page, next_cursor = keyset_page(flavors, NEWEST_FIRST, request.GET.get('after'))
     context = {
-        'flavors': flavors,
-        'today_selection': today_selection,
-        'flavor_count': flavors.count(),
+        'flavors': page,
+        'next_cursor': next_cursor,
     }
+    if 'after' in request.GET:
+        return render(request, 'admin/partials/dashboard_rows.html', context)
+
+    today_selection = DailySelection.objects.for_shop(request.shop).filter(date=local_today()).first()
+    context.update({
+        'flavor_count': flavors.count(),
+        'selected_count': today_selection.flavors.count() if today_selection else 0,
+    })
 
     if request.htmx:
         return render(request, 'admin/partials/dashboard_content.html', context)
@@ -54,42 +99,65 @@ def admin_dashboard(request):
     return render(request, 'admin/dashboard.html', context)
 
 
-@login_required
-@require_http_methods(["GET"])
-def flavor_list(request):
-    """List all flavors with filter by status."""
-    status_filter = request.GET.get('status', 'active')
-    search = request.GET.get('search', '')
-
-    flavors = Flavor.objects.all()
+def _flavor_list_rows(shop, status_filter='active', search='', cursor=None):
+    """HTML of one page of flavor list rows (shared fragments when unfiltered)."""
+    flavors = Flavor.objects.for_shop(shop).only(*LIST_FIELDS)
     if status_filter != 'all':
         flavors = flavors.filter(status=status_filter)
     if search:
         flavors = flavors.filter(name__icontains=search)
 
-    flavors = flavors.order_by('-created_at')
+    def build():
+        page, next_cursor = keyset_page(flavors, NEWEST_FIRST, cursor)
+        return render_to_string('admin/partials/flavor_list_rows.html', {
+            'flavors': page,
+            'next_cursor': next_cursor,
+            'query': urlencode({'status': status_filter, 'search': search}),
+        })
 
-    if request.htmx:
-        return render(request, 'admin/partials/flavor_list.html', {'flavors': flavors})
+    if search:
+        return build()
+    # Unfiltered pages are shared fragments, invalidated by any flavor change
+    key = tenant_key(shop, 'panel', 'flavor-list', tenant_version(shop, 'menu'), status_filter, cursor)
+    return get_or_build(key, build, PANEL_FRAGMENT_TIMEOUT)
 
-    return render(request, 'admin/flavor_list.html', {
-        'flavors': flavors,
+
+def _flavor_list_context(rows_html, status_filter='active'):
+    return {
+        'rows_html': mark_safe(rows_html.strip()),
         'status_filter': status_filter,
-    })
+    }
+
+
+@shop_owner_required
+@require_http_methods(["GET"])
+def flavor_list(request):
+    """List flavors with filter by status; pages of PAGE_SIZE load on scroll."""
+    status_filter = request.GET.get('status', 'active')
+    cursor = request.GET.get('after')
+    rows_html = _flavor_list_rows(request.shop, status_filter, request.GET.get('search', ''), cursor)
+
+    if request.htmx and cursor:
+        return HttpResponse(rows_html)
+
+    context = _flavor_list_context(rows_html, status_filter)
+    if request.htmx:
+        return render(request, 'admin/partials/flavor_list.html', context)
+    return render(request, 'admin/flavor_list.html', context)
 
 
-@login_required
+@shop_owner_required
 @require_http_methods(["GET", "POST"])
 def flavor_create(request):
     """Create new flavor with HTMX support."""
     if request.method == 'POST':
-        form = FlavorForm(request.POST, request.FILES)
+        form = FlavorForm(request.POST, request.FILES, shop=request.shop)
         if form.is_valid():
             flavor = form.save()
             messages.success(request, f'Smak "{flavor.name}" dodany.')
             if request.htmx:
-                flavors = Flavor.objects.filter(status='active')
-                return render(request, 'admin/partials/flavor_list.html', {'flavors': flavors})
+                context = _flavor_list_context(_flavor_list_rows(request.shop))
+                return render(request, 'admin/partials/flavor_list.html', context)
             return redirect('flavors:admin_flavor_list')
 
         if request.htmx:
@@ -97,114 +165,128 @@ def flavor_create(request):
                 'form': form, 'submit_url': request.path, 'title': 'Dodaj smak'
             }, status=422)
     else:
-        form = FlavorForm()
+        form = FlavorForm(shop=request.shop)
 
     return render(request, 'admin/flavor_form.html', {
         'form': form, 'title': 'Dodaj nowy smak', 'submit_url': request.path
     })
 
 
-@login_required
+@shop_owner_required
 @require_http_methods(["GET", "POST"])
 def flavor_edit(request, pk):
     """Edit existing flavor."""
-    flavor = get_object_or_404(Flavor, pk=pk)
+    flavor = get_object_or_404(Flavor.objects.for_shop(request.shop), pk=pk)
 
     if request.method == 'POST':
-        form = FlavorForm(request.POST, request.FILES, instance=flavor)
+        form = FlavorForm(request.POST, request.FILES, instance=flavor, shop=request.shop)
         if form.is_valid():
             form.save()
             messages.success(request, f'Smak "{flavor.name}" zaktualizowany.')
             return redirect('flavors:admin_flavor_list')
     else:
-        form = FlavorForm(instance=flavor)
+        form = FlavorForm(instance=flavor, shop=request.shop)
 
     return render(request, 'admin/flavor_form.html', {
         'form': form, 'flavor': flavor, 'title': f'Edytuj: {flavor.name}', 'submit_url': request.path
     })
 
 
-@login_required
+@shop_owner_required
 @require_http_methods(["GET"])
 def flavor_detail(request, pk):
     """View flavor details (read-only)."""
-    flavor = get_object_or_404(Flavor, pk=pk)
+    flavor = get_object_or_404(Flavor.objects.for_shop(request.shop), pk=pk)
     return render(request, 'admin/flavor_detail.html', {'flavor': flavor})
 
 
-@login_required
+@shop_owner_required
 @require_http_methods(["POST"])
 def archive_flavor(request, pk):
     """Archive a flavor (soft delete)."""
-    flavor = get_object_or_404(Flavor, pk=pk)
+    flavor = get_object_or_404(Flavor.objects.for_shop(request.shop), pk=pk)
 
     flavor.status = 'archived'
-    flavor.save()
+    run_write('archive_flavor', flavor.save, update_fields=['status'])
     messages.success(request, f'Smak "{flavor.name}" zarchiwizowany.')
     return redirect('flavors:admin_flavor_list')
 
 
-@login_required
+@shop_owner_required
 @require_http_methods(["POST"])
 def restore_flavor(request, pk):
     """Restore an archived flavor to active status."""
-    flavor = get_object_or_404(Flavor, pk=pk, status='archived')
+    flavor = get_object_or_404(Flavor.objects.for_shop(request.shop), pk=pk, status='archived')
     flavor.status = 'active'
-    flavor.save()
+    run_write('restore_flavor', flavor.save, update_fields=['status'])
     messages.success(request, f'Smak "{flavor.name}" przywrócony.')
     return redirect('flavors:admin_archived_flavors')
 
 
-@login_required
+@shop_owner_required
 @require_http_methods(["GET"])
 def archived_flavors(request):
-    """List all archived flavors with restore option."""
-    flavors = Flavor.objects.filter(status='archived').order_by('name')
-    return render(request, 'admin/archived_flavors.html', {'flavors': flavors})
+    """List archived flavors with restore option; pages load on scroll."""
+    flavors = Flavor.objects.for_shop(request.shop).filter(status='archived').only(*LIST_FIELDS)
+    page, next_cursor = keyset_page(flavors, BY_NAME, request.GET.get('after'))
+    context = {'flavors': page, 'next_cursor': next_cursor}
+    if 'after' in request.GET:
+        return render(request, 'admin/partials/archived_rows.html', context)
+    return render(request, 'admin/archived_flavors.html', context)
 
 
 # ============================================================================
 # DAILY SELECTION VIEWS
 # ============================================================================
 
-@login_required
-@require_http_methods(["GET"])
-def daily_selection(request):
+def _selection_date(request):
     """
-    Main daily selection interface.
-    Shows all active flavors with their selection state for today.
+    Date of the selection being edited: today, or a future date passed as
+    ?date=YYYY-MM-DD to stage a menu that goes live at the shop's publish time.
+    A date that has passed raises BadRequest: a page left open overnight must
+    not apply its changes to the next day's selection.
     """
-    today = timezone.now().date()
-    selection, created = DailySelection.objects.get_or_create(
-        date=today,
-        defaults={'display_order': []}
-    )
+    today = local_today()
+    value = request.GET.get('date')
+    if not value:
+        return today
+    try:
+        selection_date = date.fromisoformat(value)
+    except ValueError:
+        return today
+    if selection_date < today:
+        raise BadRequest(f'Dzień {selection_date} już minął.')
+    return selection_date
 
-    # Get all active flavors
-    all_flavors = Flavor.objects.filter(status='active').order_by('name')
 
-    # Get selected flavor IDs for efficient lookup
-    selected_ids = set(selection.flavors.values_list('id', flat=True))
+def _existing_selection(shop, selection_date):
+    """
+    The shop's selection for a date, for views that only show it. When there's
+    none yet it's left unsaved: an empty selection created just by opening the
+    "Jutro" tab would go live at midnight and hide the previous day's menu.
+    The first change creates it.
+    """
+    selection = DailySelection.objects.for_shop(shop).filter(date=selection_date).first()
+    if selection is None:
+        selection = DailySelection(
+            shop=shop, date=selection_date, display_order=[], published_at=shop.publish_datetime(selection_date),
+        )
+    return selection
 
-    # Build list with selection state
-    flavors_with_state = []
-    for flavor in all_flavors:
-        flavors_with_state.append({
-            'flavor': flavor,
-            'is_selected': flavor.id in selected_ids,
-            'is_hit': selection.hit_of_the_day_id == flavor.id,
-        })
 
-    # Get ordered flavors for display
-    selected_flavors = selection.get_ordered_flavors()
+@shop_owner_required
+@require_http_methods(["GET"])
+def daily_selection(request):
+    """
+    Main daily selection interface.
+    Shows active flavors with their selection state for today, a page at a time.
+    """
+    selection = _existing_selection(request.shop, _selection_date(request))
 
-    context = {
-        'selection': selection,
-        'flavors': flavors_with_state,
-        'selected_flavors': selected_flavors,
-        'today': today,
-        'selected_count': len(selected_ids),
-    }
+    context = _selection_context(request, selection)
+    if 'after' in request.GET:
+        return render(request, 'admin/partials/selection_rows.html', context)
+    context['tomorrow'] = local_today() + timedelta(days=1)
 
     if request.htmx:
         return render(request, 'admin/partials/daily_selection.html', context)
@@ -212,59 +294,60 @@ def daily_selection(request):
     return render(request, 'admin/daily_selection.html', context)
 
 
-@login_required
+@shop_owner_required
 @require_http_methods(["POST"])
 def toggle_flavor(request, flavor_id):
     """
     Toggle a flavor in/out of today's selection.
     Returns partial row template with updated state.
     """
-    today = timezone.now().date()
+    today = _selection_date(request)
     selection, _ = DailySelection.objects.get_or_create(
+        shop=request.shop,
         date=today,
         defaults={'display_order': []}
     )
 
-    flavor = get_object_or_404(Flavor, pk=flavor_id, status='active')
-
-    # Check if flavor is currently selected
-    is_selected = selection.flavors.filter(pk=flavor_id).exists()
+    flavor = get_object_or_404(Flavor.objects.for_shop(request.shop), pk=flavor_id, status='active')
 
-    try:
-        if is_selected:
-            # Remove from selection
+    def apply():
+        # Re-read state under the write lock; returns the new is_selected
+        selection.refresh_from_db(fields=['hit_of_the_day', 'display_order'])
+        if selection.flavors.filter(pk=flavor_id).exists():
             selection.flavors.remove(flavor)
-            selection.remove_flavor_from_order(flavor_id)
+            selection.remove_flavor_from_order(flavor_id, save=False)
 
-            # If this was the hit, clear it
+            # If this was the hit, clear it in the same UPDATE
             if selection.hit_of_the_day_id == flavor_id:
                 selection.hit_of_the_day = None
-                selection.save(update_fields=['hit_of_the_day'])
-
-            messages.info(request, f'Usunięto: {flavor.name}')
-        else:
-            # Add to selection
-            selection.flavors.add(flavor)
-            selection.add_flavor_to_order(flavor_id)
-            messages.success(request, f'Dodano: {flavor.name}')
+            selection.save(update_fields=['display_order', 'hit_of_the_day'])
+            return False
 
-        # Refresh selection state
-        is_selected = not is_selected
+        selection.flavors.add(flavor)
+        selection.add_flavor_to_order(flavor_id)
+        return True
 
+    try:
+        is_selected = run_write('toggle_flavor', apply)
+        if is_selected:
+            messages.success(request, f'Dodano: {flavor.name}')
+        else:
+            messages.info(request, f'Usunięto: {flavor.name}')
     except Exception as e:
         logger.error(f"Error in toggle_flavor for flavor_id={flavor_id}: {e}")
         messages.error(request, 'Nie udało się zaktualizować wyboru. Spróbuj ponownie.')
+        is_selected = selection.flavors.filter(pk=flavor_id).exists()
 
     context = {
         'flavor': flavor,
-        'is_selected': is_selected if 'is_selected' in locals() else False,
+        'is_selected': is_selected,
         'selection': selection,
     }
 
     return render(request, 'admin/partials/flavor_select_row.html', context)
 
 
-@login_required
+@shop_owner_required
 @require_http_methods(["POST"])
 def set_hit(request, flavor_id):
     """
@@ -272,29 +355,33 @@ def set_hit(request, flavor_id):
     If flavor is already hit: clear it.
     If different flavor: set as new hit.
     """
-    today = timezone.now().date()
+    today = _selection_date(request)
     selection, _ = DailySelection.objects.get_or_create(
+        shop=request.shop,
         date=today,
         defaults={'display_order': []}
     )
 
-    flavor = get_object_or_404(Flavor, pk=flavor_id, status='active')
+    flavor = get_object_or_404(Flavor.objects.for_shop(request.shop), pk=flavor_id, status='active')
 
     # Verify flavor is in today's selection
     if not selection.flavors.filter(pk=flavor_id).exists():
         messages.error(request, 'Wybierz najpierw ten smak, aby ustawić hit dnia.')
         return _get_selection_partial(request, selection)
 
+    def apply():
+        # Toggle hit state; returns True if the flavor is now the hit
+        selection.refresh_from_db(fields=['hit_of_the_day'])
+        is_hit = selection.hit_of_the_day_id != flavor_id
+        selection.hit_of_the_day = flavor if is_hit else None
+        selection.save(update_fields=['hit_of_the_day'])
+        return is_hit
+
     try:
-        # Toggle hit state
-        if selection.hit_of_the_day_id == flavor_id:
-            selection.hit_of_the_day = None
-            selection.save(update_fields=['hit_of_the_day'])
-            messages.info(request, f'Usunięto hit dnia: {flavor.name}')
-        else:
-            selection.hit_of_the_day = flavor
-            selection.save(update_fields=['hit_of_the_day'])
+        if run_write('set_hit', apply):
             messages.success(request, f'Hit dnia: {flavor.name}')
+        else:
+            messages.info(request, f'Usunięto hit dnia: {flavor.name}')
     except Exception as e:
         logger.error(f"Error in set_hit for flavor_id={flavor_id}: {e}")
         messages.error(request, 'Nie udało się ustawić hitu dnia. Spróbuj ponownie.')
@@ -302,15 +389,178 @@ def set_hit(request, flavor_id):
     return _get_selection_partial(request, selection)
 
 
-@login_required
+def _parse_batch_ops(body):
+    """
+    Validate a selection batch: {"ops": [op, ...]} where each op states the
+    desired end state, so replaying it is harmless:
+        {"id": ..., "type": "select", "flavor": 12, "selected": true}
+        {"id": ..., "type": "hit", "flavor": 12}     (null clears the hit)
+        {"id": ..., "type": "order", "order": [12, 7, 3]}
+    Raises ValueError for anything else.
+    """
+    data = json.loads(body)
+    ops = data.get('ops') if isinstance(data, dict) else None
+    if not isinstance(ops, list) or not 0 < len(ops) <= SELECTION_BATCH_MAX_OPS:
+        raise ValueError('ops must be a non-empty list')
+
+    def is_id(value):
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    for op in ops:
+        if not isinstance(op, dict):
+            raise ValueError('op must be an object')
+        kind = op.get('type')
+        if kind == 'select':
+            valid = is_id(op.get('flavor')) and isinstance(op.get('selected'), bool)
+        elif kind == 'hit':
+            valid = op.get('flavor') is None or is_id(op.get('flavor'))
+        elif kind == 'order':
+            valid = isinstance(op.get('order'), list) and all(is_id(fid) for fid in op['order'])
+        else:
+            valid = False
+        if not valid:
+            raise ValueError(f'invalid op: {op!r}')
+    return ops
+
+
+@shop_owner_required_json
+@require_http_methods(["POST"])
+def selection_batch(request):
+    """
+    Apply a batch of queued selection changes (see _parse_batch_ops) in one
+    write transaction, in order. Ops that can't be applied - an archived flavor,
+    a hit on a flavor that isn't selected - are reported back as conflicts and
+    skipped; the rest are applied. The response carries the resulting
+    selection so the client can reconcile rows it changed optimistically.
+
+    A batch sent again with the same X-Batch-Id header (the service worker
+    replaying its offline queue after a lost response) is not re-applied.
+    A batch for a day that has passed is rejected with 409.
+    """
+    try:
+        ops = _parse_batch_ops(request.body)
+    except ValueError as e:
+        return JsonResponse({'error': f'Nieprawidłowe dane: {e}'}, status=400)
+
+    batch_id = request.headers.get('X-Batch-Id', '')[:64]
+    result_key = tenant_key(request.shop, 'selection-batch', batch_id) if batch_id else None
+    if result_key:
+        stored = cache.get(result_key)
+        if stored is not None:
+            return JsonResponse(stored)
+
+    try:
+        today = _selection_date(request)
+    except BadRequest:
+        # Queued on a page left open past midnight: the client drops the batch
+        return JsonResponse({'error': 'Ten dzień już minął, zmiany nie zostały zapisane.'}, status=409)
+    selection, _ = DailySelection.objects.get_or_create(
+        shop=request.shop,
+        date=today,
+        defaults={'display_order': []}
+    )
+    mentioned = {op['flavor'] for op in ops if op.get('flavor') is not None}
+
+    def apply():
+        # Re-read state under the write lock; returns (results, selected ids)
+        selection.refresh_from_db(fields=['hit_of_the_day', 'display_order'])
+        initial = set(selection.flavors.values_list('id', flat=True))
+        active = set(
+            Flavor.objects.for_shop(request.shop).active().filter(pk__in=mentioned).values_list('pk', flat=True)
+        )
+        selected = set(initial)
+        hit_id = selection.hit_of_the_day_id
+        order = [fid for fid in (selection.display_order or []) if fid in selected]
+        # Older rows and endpoints may have left selected flavors out of display_order;
+        # they are shown after the listed ones (see get_ordered_flavors)
+        order += sorted(selected - set(order))
+        results = []
+
+        for op in ops:
+            conflict = None
+            if op['type'] == 'select':
+                flavor_id = op['flavor']
+                if op['selected'] and flavor_id not in selected:
+                    if flavor_id in active:
+                        selected.add(flavor_id)
+                        order.append(flavor_id)
+                    else:
+                        conflict = 'unavailable'
+                elif not op['selected'] and flavor_id in selected:
+                    selected.discard(flavor_id)
+                    order.remove(flavor_id)
+                    if hit_id == flavor_id:
+                        hit_id = None
+            elif op['type'] == 'hit':
+                flavor_id = op['flavor']
+                if flavor_id is None or (flavor_id in selected and flavor_id in active):
+                    hit_id = flavor_id
+                else:
+                    conflict = 'not_selected' if flavor_id in active else 'unavailable'
+            else:
+                # Listed ids first, then any selected flavors the client didn't know about
+                listed = list(dict.fromkeys(fid for fid in op['order'] if fid in selected))
+                order = listed + [fid for fid in order if fid not in listed]
+            results.append({'id': op.get('id'), 'status': 'conflict' if conflict else 'ok', 'reason': conflict})
+
+        if initial - selected:
+            selection.flavors.remove(*(initial - selected))
+        if selected - initial:
+            selection.flavors.add(*(selected - initial))
+        if hit_id != selection.hit_of_the_day_id or order != selection.display_order:
+            selection.hit_of_the_day_id = hit_id
+            selection.display_order = order
+            selection.save(update_fields=['hit_of_the_day', 'display_order'])
+        return results, selected
+
+    try:
+        results, selected = run_write('selection_batch', apply)
+    except Exception as e:
+        logger.error(f"Error in selection_batch ({len(ops)} ops): {e}")
+        return JsonResponse({'error': 'Nie udało się zapisać zmian. Spróbuj ponownie.'}, status=503)
+
+    for result in results:
+        if result['reason']:
+            result['message'] = BATCH_CONFLICT_MESSAGES[result['reason']]
+    hit = selection.hit_of_the_day
+    payload = {
+        'results': results,
+        'selected': sorted(selected),
+        'hit': hit.pk if hit else None,
+        'hit_name': hit.name if hit else None,
+        'selected_count': len(selected),
+    }
+    if result_key:
+        cache.set(result_key, payload, BATCH_RESULT_TIMEOUT)
+    return JsonResponse(payload)
+
+
+@require_http_methods(["GET"])
+def service_worker(request):
+    """
+    Panel service worker. Served from /panel/ rather than /static/ so that its
+    scope covers the panel; its cache name follows the hashed static files.
+    """
+    static_assets = [static(path) for path in PANEL_STATIC_ASSETS]
+    version = hashlib.md5(''.join(static_assets).encode(), usedforsecurity=False).hexdigest()[:12]
+    response = render(request, 'admin/service_worker.js', {
+        'version': version,
+        'static_assets': static_assets,
+    }, content_type='application/javascript')
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+@shop_owner_required
 @require_http_methods(["POST"])
 def move_flavor(request, flavor_id, direction):
     """
     Move flavor up or down in the display order.
     direction: 'up' (-1) or 'down' (+1)
     """
-    today = timezone.now().date()
+    today = _selection_date(request)
     selection, _ = DailySelection.objects.get_or_create(
+        shop=request.shop,
         date=today,
         defaults={'display_order': []}
     )
@@ -323,12 +573,16 @@ def move_flavor(request, flavor_id, direction):
         messages.error(request, 'Nieprawidłowy kierunek.')
         return _get_selection_partial(request, selection)
 
+    def apply():
+        selection.refresh_from_db(fields=['display_order'])
+        return selection.move_flavor(flavor_id, direction_value)
+
     try:
         # Perform the move
-        success = selection.move_flavor(flavor_id, direction_value)
+        success = run_write('move_flavor', apply)
 
         if success:
-            flavor = get_object_or_404(Flavor, pk=flavor_id)
+            flavor = get_object_or_404(Flavor.objects.for_shop(request.shop), pk=flavor_id)
             direction_label = 'wyżej' if direction_value == -1 else 'niżej'
             messages.success(request, f'Przesunięto {flavor.name} {direction_label}')
         else:
@@ -340,55 +594,54 @@ def move_flavor(request, flavor_id, direction):
     return _get_selection_partial(request, selection, sort_mode=True)
 
 
-@login_required
+@shop_owner_required
 @require_http_methods(["POST"])
 def copy_from_yesterday(request):
     """
     Copy yesterday's selection to today.
     Copies flavors and display_order.
     """
-    today = timezone.now().date()
+    today = _selection_date(request)
     yesterday = today - timezone.timedelta(days=1)
 
     selection, _ = DailySelection.objects.get_or_create(
+        shop=request.shop,
         date=today,
         defaults={'display_order': []}
     )
 
     try:
-        yesterday_selection = DailySelection.objects.get(date=yesterday)
+        yesterday_selection = DailySelection.objects.for_shop(request.shop).get(date=yesterday)
     except DailySelection.DoesNotExist:
         messages.warning(request, 'Brak wyboru z wczoraj do skopiowania.')
         return _get_selection_partial(request, selection)
 
     # Get yesterday's flavors (only active ones)
-    yesterday_flavors = yesterday_selection.flavors.filter(status='active')
-    flavor_count = yesterday_flavors.count()
+    yesterday_flavors = list(yesterday_selection.flavors.filter(status='active'))
+    flavor_count = len(yesterday_flavors)
 
     if flavor_count == 0:
         messages.info(request, 'Wczorajszy wybór był pusty lub wszystkie smaki zostały zarchiwizowane.')
         return _get_selection_partial(request, selection)
 
-    try:
-        # Clear current selection
-        selection.flavors.clear()
-        selection.hit_of_the_day = None
+    # Copy display_order (filter to only include active flavors that exist)
+    active_ids = {flavor.id for flavor in yesterday_flavors}
+    new_order = [fid for fid in (yesterday_selection.display_order or []) if fid in active_ids]
 
-        # Copy flavors
-        selection.flavors.set(yesterday_flavors)
-
-        # Copy display_order (filter to only include active flavors that exist)
-        active_ids = set(yesterday_flavors.values_list('id', flat=True))
-        new_order = [fid for fid in (yesterday_selection.display_order or []) if fid in active_ids]
-
-        # Add any flavors not in the order (append at end)
-        for flavor in yesterday_flavors:
-            if flavor.id not in new_order:
-                new_order.append(flavor.id)
+    # Add any flavors not in the order (append at end)
+    for flavor in yesterday_flavors:
+        if flavor.id not in new_order:
+            new_order.append(flavor.id)
 
+    def apply():
+        # set() replaces the current selection, so no separate clear() is needed
+        selection.flavors.set(yesterday_flavors)
+        selection.hit_of_the_day = None
         selection.display_order = new_order
         selection.save(update_fields=['display_order', 'hit_of_the_day'])
 
+    try:
+        run_write('copy_from_yesterday', apply)
         messages.success(request, f'Skopiowano {flavor_count} smaków z wczoraj.')
     except Exception as e:
         logger.error(f"Error in copy_from_yesterday: {e}")
@@ -397,25 +650,29 @@ def copy_from_yesterday(request):
     return _get_selection_partial(request, selection)
 
 
-@login_required
+@shop_owner_required
 @require_http_methods(["POST"])
 def clear_selection(request):
     """
     Clear today's selection - remove all flavors and reset hit.
     """
-    today = timezone.now().date()
+    today = _selection_date(request)
     selection, _ = DailySelection.objects.get_or_create(
+        shop=request.shop,
         date=today,
         defaults={'display_order': []}
     )
 
-    count = selection.flavors.count()
-
-    try:
+    def apply():
+        count = selection.flavors.count()
         selection.flavors.clear()
         selection.hit_of_the_day = None
         selection.display_order = []
         selection.save(update_fields=['hit_of_the_day', 'display_order'])
+        return count
+
+    try:
+        count = run_write('clear_selection', apply)
         messages.info(request, f'Wyczyszczono wybór ({count} smaków).')
     except Exception as e:
         logger.error(f"Error in clear_selection: {e}")
@@ -424,17 +681,13 @@ def clear_selection(request):
     return _get_selection_partial(request, selection)
 
 
-@login_required
+@shop_owner_required
 @require_http_methods(["GET"])
 def daily_selection_sort(request):
     """Sort mode for reordering selected flavors."""
-    today = timezone.now().date()
-    selection, _ = DailySelection.objects.get_or_create(
-        date=today,
-        defaults={'display_order': []}
-    )
+    selection = _existing_selection(request.shop, _selection_date(request))
 
-    selected_flavors = selection.get_ordered_flavors()
+    selected_flavors = selection.get_ordered_flavors() if selection.pk else []
 
     return render(request, 'admin/partials/selection_sort.html', {
         'selection': selection,
@@ -442,40 +695,167 @@ def daily_selection_sort(request):
     })
 
 
-def _get_selection_partial(request, selection, sort_mode=False):
+def _selection_context(request, selection, cursor=None):
     """
-    Helper to return the selection list partial with context.
-    Used by multiple endpoints after making changes.
+    Context for the selection list: one page of active flavors (by name) with
+    their selection state, plus the counts shown above the list.
     """
-    # Get all active flavors
-    all_flavors = Flavor.objects.filter(status='active').order_by('name')
-
-    # Get selected flavor IDs
-    selected_ids = set(selection.flavors.values_list('id', flat=True))
-
-    # Build list with selection state
-    flavors_with_state = []
-    for flavor in all_flavors:
-        flavors_with_state.append({
-            'flavor': flavor,
-            'is_selected': flavor.id in selected_ids,
-            'is_hit': selection.hit_of_the_day_id == flavor.id,
-        })
+    if cursor is None:
+        cursor = request.GET.get('after')
+    flavors = Flavor.objects.for_shop(request.shop).active()
+    page, next_cursor = keyset_page(flavors.only('pk', 'name'), BY_NAME, cursor)
 
-    # Get ordered flavors for display
-    selected_flavors = selection.get_ordered_flavors()
+    # The catalogue may be long, but a day's selection is short
+    selected_ids = set(selection.flavors.values_list('id', flat=True)) if selection.pk else set()
 
-    context = {
+    return {
         'selection': selection,
-        'flavors': flavors_with_state,
-        'selected_flavors': selected_flavors,
-        'all_flavors': all_flavors,
+        'flavors': [
+            {
+                'flavor': flavor,
+                'is_selected': flavor.id in selected_ids,
+                'is_hit': selection.hit_of_the_day_id == flavor.id,
+            }
+            for flavor in page
+        ],
+        'next_cursor': next_cursor,
         'today': selection.date,
         'selected_count': len(selected_ids),
-        'sort_mode': sort_mode,
+        # Shown above the list only, so not needed for the following pages
+        'flavor_count': None if cursor else flavors.count(),
     }
 
+
+def _get_selection_partial(request, selection, sort_mode=False):
+    """
+    Helper to return the selection list partial with context.
+    Used by multiple endpoints after making changes; renders the first page.
+    """
     if sort_mode:
-        return render(request, 'admin/partials/selection_sort.html', context)
+        return render(request, 'admin/partials/selection_sort.html', {
+            'selection': selection,
+            'selected_flavors': selection.get_ordered_flavors(),
+        })
 
+    context = _selection_context(request, selection, cursor='')
     return render(request, 'admin/partials/selection_list.html', context)
+
+
+# ============================================================================
+# RESUMABLE PHOTO UPLOADS (see uploads.py)
+# ============================================================================
+
+def _upload_filename(metadata):
+    """Read the file name from a tus Upload-Metadata header ('filename <base64>, ...')."""
+    for item in metadata.split(','):
+        key, _, value = item.strip().partition(' ')
+        if key == 'filename':
+            try:
+                return base64.b64decode(value).decode()
+            except (binascii.Error, UnicodeDecodeError):
+                break
+    return 'photo'
+
+
+def _upload_response(status, offset=None, **headers):
+    response = HttpResponse(status=status)
+    if offset is not None:
+        response['Upload-Offset'] = offset
+    for name, value in headers.items():
+        response[name.replace('_', '-')] = value
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@shop_owner_required
+@require_http_methods(["POST"])
+def upload_create(request):
+    """Start a resumable upload; the total size comes in the Upload-Length header."""
+    try:
+        length = int(request.headers.get('Upload-Length', ''))
+        upload_id = uploads.create(
+            request.shop, length, _upload_filename(request.headers.get('Upload-Metadata', ''))
+        )
+    except ValueError:
+        return HttpResponse('Brak nagłówka Upload-Length.', status=400)
+    except uploads.UploadError as e:
+        return HttpResponse(str(e), status=e.status)
+    return _upload_response(201, 0, Location=reverse('flavors:admin_upload_detail', args=[upload_id]))
+
+
+@shop_owner_required
+@require_http_methods(["HEAD", "PATCH", "DELETE"])
+def upload_detail(request, upload_id):
+    """
+    HEAD: how much of the upload the server has (Upload-Offset).
+    PATCH: append the request body at Upload-Offset; streamed, not read into memory.
+    DELETE: abandon the upload.
+    """
+    meta = uploads.get(upload_id, request.shop)
+    if meta is None:
+        return HttpResponse(status=404)
+
+    if request.method == 'HEAD':
+        return _upload_response(200, meta['offset'], Upload_Length=meta['length'])
+    if request.method == 'DELETE':
+        uploads.discard(upload_id)
+        return _upload_response(204)
+
+    if request.content_type != 'application/offset+octet-stream':
+        return HttpResponse(status=415)
+    try:
+        offset = int(request.headers['Upload-Offset'])
+        content_length = int(request.headers.get('Content-Length') or 0)
+    except (KeyError, ValueError):
+        return HttpResponse('Brak nagłówka Upload-Offset.', status=400)
+    try:
+        new_offset = uploads.append(upload_id, request.shop, offset, request, content_length)
+    except uploads.UploadError as e:
+        return _upload_response(e.status, meta['offset'])
+    return _upload_response(204, new_offset)
+
+
+# ============================================================================
+# PROFILER (staff only)
+# ============================================================================
+
+@staff_required
+@require_http_methods(["GET", "POST"])
+def profiles(request):
+    """Arm the sampling profiler for the next N panel requests and list saved profiles."""
+    if request.method == 'POST':
+        try:
+            count = int(request.POST.get('count', 0))
+        except ValueError:
+            count = 0
+        count = max(0, min(count, profiling.MAX_PROFILED_REQUESTS))
+        request.session[profiling.SESSION_KEY] = count
+        if count:
+            messages.success(request, f'Profilowanie następnych {count} żądań panelu.')
+        else:
+            messages.success(request, 'Profilowanie wyłączone.')
+        return redirect('flavors:admin_profiles')
+
+    return render(request, 'admin/profiles.html', {
+        'profiles': profiling.list_profiles(),
+        'remaining': request.session.get(profiling.SESSION_KEY, 0),
+        'max_requests': profiling.MAX_PROFILED_REQUESTS,
+    })
+
+
+@staff_required
+@require_http_methods(["GET"])
+def profile_detail(request, name):
+    """Hot spots of one profile; ?raw=1 returns the collapsed stacks for flame graph tools."""
+    path = profiling.profile_path(name)
+    if path is None:
+        raise Http404('Nie ma takiego profilu.')
+    if request.GET.get('raw'):
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=name, content_type='text/plain')
+
+    self_frames, app_frames = profiling.summarize(path)
+    return render(request, 'admin/profile_detail.html', {
+        'name': name,
+        'self_frames': self_frames,
+        'app_frames': app_frames,
+    })
@@ -0,0 +1,129 @@
+"""
+Read-only JSON menu for in-shop displays and widgets: GET /api/v1/menu/.
+
+The payload has the homepage's order and hit of the day (see menu.py) and
+only what a display needs per flavor. It's built once per menu version and
+cached, and the ETag is derived from the versions alone, so a poll with a
+matching If-None-Match is answered with 304 without serializing anything.
+
+With ?since=<version> (the "version" of a previous response) the answer is
+a delta built from the kept menu events (see events.py): the new order and
+hit, the flavors that changed or appeared, and the ids removed. When the
+version is too old to be covered by the kept events, the full menu is sent.
+"""
+import hashlib
+import time
+
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET
+
+from . import caching
+from .events import current_version, get_state
+from .menu import MENU_GRID_TIMEOUT, get_fallback_note, get_menu_flavors, get_published_selection
+from .tenancy import tenant_key, tenant_version
+
+JSON_PARAMS = {'separators': (',', ':'), 'ensure_ascii': False}
+
+
+def _flavor_data(flavor):
+    return {
+        'id': flavor.pk,
+        'name': flavor.name,
+        'type': flavor.flavor_type,
+        'tags': flavor.tags,
+        'thumbnail': flavor.thumbnail_url,
+        'photo': flavor.photo.url if flavor.photo else '',
+    }
+
+
+def _build_menu_payload(shop, selection):
+    flavors, hit_of_the_day = get_menu_flavors(shop, selection)
+    return {
+        'hit': hit_of_the_day.pk if hit_of_the_day else None,
+        'updated_at': selection.updated_at.isoformat() if selection else None,
+        'flavors': [_flavor_data(flavor) for flavor in flavors],
+    }
+
+
+def menu_payload_key(shop, selection):
+    return tenant_key(shop, 'menu-api', tenant_version(shop, 'menu'), selection.pk if selection else 'all')
+
+
+def build_menu_payload(shop, selection):
+    """Build the API payload and store it in the cache (used to warm it ahead of time)."""
+    started = time.monotonic()
+    payload = _build_menu_payload(shop, selection)
+    caching.store(menu_payload_key(shop, selection), payload, MENU_GRID_TIMEOUT, time.monotonic() - started)
+    return payload
+
+
+def _menu_delta(payload, state, since):
+    """
+    Return the changes since version `since`, or None when the kept events
+    can't produce them (too old, or the event state lags behind the database).
+    """
+    order = [flavor['id'] for flavor in payload['flavors']]
+    if state is None or state['order'] != order or state['hit'] != payload['hit']:
+        return None
+    if since == state['version']:
+        previous_order = state['order']
+    else:
+        previous = next((event for event in state['events'] if event['version'] == since), None)
+        if previous is None:
+            return None
+        previous_order = previous['order']
+
+    changed = {int(pk) for event in state['events'] if event['version'] > since for pk in event['cards']}
+    changed.update(set(order) - set(previous_order))
+    return {
+        'since': since,
+        'hit': payload['hit'],
+        'updated_at': payload['updated_at'],
+        'order': order,
+        'flavors': [flavor for flavor in payload['flavors'] if flavor['id'] in changed],
+        'removed': [pk for pk in previous_order if pk not in order],
+    }
+
+
+@gzip_page
+@require_GET
+def menu(request):
+    """
+    Aktualne menu w formacie JSON dla wyświetlaczy w sklepie (kolejność i hit dnia jak na stronie głównej).
+    Obsługuje If-None-Match (304) oraz ?since=<wersja>, zwracające tylko zmiany od tej wersji.
+    """
+    shop = request.shop
+    if shop is None:
+        raise Http404('Brak sklepu dla tej domeny.')
+
+    since = request.GET.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return JsonResponse({'error': 'Parametr since musi być liczbą.'}, status=400)
+
+    selection = get_published_selection(shop)
+    version = current_version(shop)
+    note = get_fallback_note(selection)
+    menu_version = tenant_version(shop, 'menu')
+    # Everything the body depends on, so a poll is answered without building it
+    parts = [menu_version, selection.pk if selection else 'all', version, note, since]
+    etag = quote_etag(hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()[:16])
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        payload = caching.get_or_build(
+            menu_payload_key(shop, selection),
+            lambda: _build_menu_payload(shop, selection),
+            MENU_GRID_TIMEOUT,
+        )
+        delta = _menu_delta(payload, get_state(shop), since) if since is not None else None
+        data = {'version': version, 'delta': delta is not None, 'note': note, **(delta or payload)}
+        response = JsonResponse(data, json_dumps_params=JSON_PARAMS)
+    response['ETag'] = etag
+    # Displays poll every few seconds: always revalidate, which is cheap
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
@@ -54,12 +54,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.flavors.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'apps.flavors.middleware.PanelSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'apps.flavors.middleware.TenantMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.flavors.middleware.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
@@ -69,7 +73,8 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that also reports render time to PerformanceMiddleware
+        'BACKEND': 'apps.flavors.perf.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -105,6 +110,39 @@ DATABASES = {
 }
 
 
+# Cache - shared by all worker processes, so cached fragments and version
+# counters agree between workers. DJANGO_CACHE_BACKEND selects:
+#   file   - files in data/cache (default, single-box deploys)
+#   redis  - Redis or a compatible server at DJANGO_CACHE_URL (needs the redis package)
+#   locmem - per-process memory, for tests and one-process development
+CACHE_BACKEND = os.environ.get('DJANGO_CACHE_BACKEND', 'file')
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('DJANGO_CACHE_URL', 'redis://127.0.0.1:6379/1'),
+            'KEY_PREFIX': 'flavors',
+        }
+    }
+elif CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'data' / 'cache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 5000,
+            },
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -139,7 +177,8 @@ USE_TZ = True
 SESSION_COOKIE_AGE = 1209600  # 2 weeks in seconds
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = 'Lax'
-SESSION_SAVE_EVERY_REQUEST = True
+# Panel sessions are renewed on each panel request by PanelSessionMiddleware
+SESSION_SAVE_EVERY_REQUEST = False
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 
 # Authentication URLs
@@ -158,6 +197,20 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Live menu events (SSE) - state files shared by all worker processes
+MENU_EVENTS_DIR = BASE_DIR / 'data' / 'events'
+
+# /metrics - per-process files summed on scrape; readable from these IPs or with the token
+METRICS_DIR = BASE_DIR / 'data' / 'metrics'
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+METRICS_TOKEN = ''
+
+# Panel profiler output (collapsed stacks, one file per profiled request)
+PROFILES_DIR = BASE_DIR / 'data' / 'profiles'
+
+# Resumable photo uploads - chunks are spooled here until the flavor form is saved
+UPLOADS_DIR = BASE_DIR / 'data' / 'uploads'
+
 # Storage backends
 STORAGES = {
     "default": {
@@ -0,0 +1,80 @@
+"""
+Test settings for config project.
+
+Usage:
+    python manage.py test --settings=config.settings_test --parallel auto
+
+In-memory SQLite (each --parallel worker gets its own copy), per-process
+local-memory cache and a fast password hasher. Every path the app writes to
+points into a temporary directory; apps.flavors.testing gives each worker
+process its own one and provides prebuilt photo fixtures.
+"""
+
+import atexit
+import shutil
+import tempfile
+from pathlib import Path
+
+from .settings import *  # noqa: F401, F403
+from .settings import INSTALLED_APPS
+
+DEBUG = False
+
+# Only needed to build the CSS
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != 'django_tailwind_cli']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'OPTIONS': {
+            # As in production: panel writes take the write lock at BEGIN (see apps/flavors/db.py)
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Hashing with the real hasher costs ~100 ms per login or created user
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# No collectstatic manifest in tests
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Serve static files from the finders: there's no collectstatic output (STATIC_ROOT) in tests
+WHITENOISE_AUTOREFRESH = True
+
+# Fallback locations; test classes from apps.flavors.testing switch to a directory per worker
+TEST_DATA_DIR = Path(tempfile.mkdtemp(prefix='flavors-tests-'))
+atexit.register(shutil.rmtree, TEST_DATA_DIR, ignore_errors=True)
+MEDIA_ROOT = TEST_DATA_DIR / 'media'
+MENU_EVENTS_DIR = TEST_DATA_DIR / 'events'
+METRICS_DIR = TEST_DATA_DIR / 'metrics'
+PROFILES_DIR = TEST_DATA_DIR / 'profiles'
+UPLOADS_DIR = TEST_DATA_DIR / 'uploads'
+
+# Expected warnings (image processing, lock retries) would drown the test output
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'null': {
+            'class': 'logging.NullHandler',
+        },
+    },
+    'root': {
+        'handlers': ['null'],
+    },
+}
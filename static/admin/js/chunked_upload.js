@@ -0,0 +1,126 @@
+/**
+ * Resumable photo upload for the flavor form.
+ * On submit, the chosen photo (already shrunk by image_preview.js where the
+ * browser can) goes to the upload endpoint in chunks. After a failed chunk
+ * the upload continues from the offset the server reports, so a flaky
+ * connection never restarts it from zero. The form is then submitted with
+ * just the upload's id. Without fetch the photo is sent with the form as before.
+ */
+document.addEventListener('DOMContentLoaded', function() {
+    const photoInput = document.querySelector('input[type="file"][name="photo"]');
+    if (!photoInput || !photoInput.dataset.uploadUrl || !window.fetch) return;
+
+    const CHUNK_SIZE = 512 * 1024;  // bytes; small enough to finish between signal drops
+    const RETRY_DELAYS = [1000, 2000, 5000, 10000, 20000];  // ms
+
+    const form = photoInput.form;
+    const uploadIdInput = form.querySelector('input[name="upload_id"]');
+    const status = document.getElementById('photo-upload-status');
+    const csrfToken = form.querySelector('input[name="csrfmiddlewaretoken"]').value;
+    let uploading = false;
+    let current = null;  // {file, url}: resumed if the form is submitted again after a failure
+
+    class UploadRejected extends Error {}
+
+    function setStatus(text) {
+        if (status) status.textContent = text;
+    }
+
+    function wait(ms) {
+        return new Promise(function(resolve) { setTimeout(resolve, ms); });
+    }
+
+    function send(url, method, headers, body) {
+        return fetch(url, {
+            method: method,
+            credentials: 'same-origin',
+            headers: Object.assign({'X-CSRFToken': csrfToken}, headers),
+            body: body,
+        });
+    }
+
+    async function create(file) {
+        const name = btoa(String.fromCharCode(...new TextEncoder().encode(file.name)));
+        const response = await send(photoInput.dataset.uploadUrl, 'POST', {
+            'Upload-Length': String(file.size),
+            'Upload-Metadata': `filename ${name}`,
+        });
+        if (response.status !== 201) throw new UploadRejected(await response.text());
+        return response.headers.get('Location');
+    }
+
+    async function serverOffset(url) {
+        const response = await send(url, 'HEAD', {});
+        if (!response.ok) throw new UploadRejected('Przesyłanie wygasło.');
+        return parseInt(response.headers.get('Upload-Offset'), 10);
+    }
+
+    async function sendChunks(file, url, offset) {
+        let attempt = 0;
+        while (offset < file.size) {
+            setStatus(`Przesyłanie zdjęcia… ${Math.floor(offset * 100 / file.size)}%`);
+            try {
+                const response = await send(url, 'PATCH', {
+                    'Content-Type': 'application/offset+octet-stream',
+                    'Upload-Offset': String(offset),
+                }, file.slice(offset, offset + CHUNK_SIZE));
+                // 409: the server has a different offset (a retried chunk did arrive), continue from there
+                if (response.status !== 204 && response.status !== 409) {
+                    if (response.status < 500) throw new UploadRejected(`HTTP ${response.status}`);
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                offset = parseInt(response.headers.get('Upload-Offset'), 10);
+                attempt = 0;
+            } catch (error) {
+                if (error instanceof UploadRejected || attempt === RETRY_DELAYS.length) throw error;
+                setStatus('Brak połączenia, ponawiam przesyłanie…');
+                await wait(RETRY_DELAYS[attempt++]);
+                offset = await serverOffset(url).catch(function(headError) {
+                    if (headError instanceof UploadRejected) throw headError;
+                    return offset;
+                });
+            }
+        }
+    }
+
+    async function uploadPhoto(file) {
+        if (current && current.file === file) {
+            try {
+                await sendChunks(file, current.url, await serverOffset(current.url));
+                return current.url;
+            } catch (error) {
+                if (!(error instanceof UploadRejected)) throw error;
+                // Expired or rejected: start a new upload below
+            }
+        }
+        current = {file: file, url: await create(file)};
+        await sendChunks(file, current.url, 0);
+        return current.url;
+    }
+
+    form.addEventListener('submit', function(e) {
+        if (e.defaultPrevented) return;  // image_preview.js is still resizing and submits again
+        const file = photoInput.files[0];
+        if (!file) return;  // no new photo, or already uploaded: submit normally
+        e.preventDefault();
+        if (uploading) return;
+
+        uploading = true;
+        uploadPhoto(file)
+            .then(function(url) {
+                uploadIdInput.value = url.split('/').filter(Boolean).pop();
+                // The form carries only the id now
+                photoInput.value = '';
+                photoInput.required = false;
+                current = null;
+                setStatus('Zdjęcie przesłane.');
+                form.requestSubmit();
+            })
+            .catch(function() {
+                setStatus('Nie udało się przesłać zdjęcia. Sprawdź połączenie i zapisz ponownie.');
+            })
+            .finally(function() {
+                uploading = false;
+            });
+    });
+});
@@ -1,13 +1,57 @@
 /**
- * Image preview for flavor photo upload.
- * Shows selected image before form submission.
+ * Image preview and resizing for flavor photo upload.
+ * Shows the selected image right away, then shrinks it to the size the
+ * server keeps (max 1200px, WebP) in a worker and uploads that instead of
+ * the original. Browsers without OffscreenCanvas upload the original, which
+ * the server resizes as before.
  */
 document.addEventListener('DOMContentLoaded', function() {
     const photoInput = document.querySelector('input[type="file"][name="photo"]');
     if (!photoInput) return;
 
+    const MAX_SIZE = 1200;  // px, images.MAX_PHOTO_SIZE
+    const QUALITY = 0.85;  // images.WEBP_QUALITY
+
     // Find or create preview container
     const previewContainer = document.getElementById('photo-preview-container');
+    const form = photoInput.form;
+    const canResize = window.Worker && window.OffscreenCanvas && window.DataTransfer && photoInput.dataset.resizeWorker;
+    let previewUrl = null;
+    let resizing = null;  // promise of the running resize
+
+    function showPreview(file) {
+        let preview = document.getElementById('photo-preview');
+        if (!preview) {
+            preview = document.createElement('img');
+            preview.id = 'photo-preview';
+            preview.className = 'mt-3 rounded-lg max-w-full';
+            preview.style.maxHeight = '200px';
+            preview.style.objectFit = 'contain';
+            if (previewContainer) {
+                previewContainer.appendChild(preview);
+            }
+        }
+        // An object URL points at the file instead of copying it into a base64 string
+        if (previewUrl) URL.revokeObjectURL(previewUrl);
+        previewUrl = URL.createObjectURL(file);
+        preview.src = previewUrl;
+        preview.alt = 'Podglad zdjecia';
+    }
+
+    function resize(file) {
+        return new Promise(function(resolve) {
+            const worker = new Worker(photoInput.dataset.resizeWorker);
+            worker.onmessage = function(e) {
+                worker.terminate();
+                resolve(e.data.blob || null);
+            };
+            worker.onerror = function() {
+                worker.terminate();
+                resolve(null);
+            };
+            worker.postMessage({file: file, maxSize: MAX_SIZE, quality: QUALITY});
+        });
+    }
 
     photoInput.addEventListener('change', function(e) {
         const file = e.target.files[0];
@@ -20,22 +64,27 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
 
-        const reader = new FileReader();
-        reader.onload = function(event) {
-            let preview = document.getElementById('photo-preview');
-            if (!preview) {
-                preview = document.createElement('img');
-                preview.id = 'photo-preview';
-                preview.className = 'mt-3 rounded-lg max-w-full';
-                preview.style.maxHeight = '200px';
-                preview.style.objectFit = 'contain';
-                if (previewContainer) {
-                    previewContainer.appendChild(preview);
-                }
+        showPreview(file);
+        if (!canResize) return;
+
+        const current = resize(file).then(function(blob) {
+            // Only if the user hasn't picked another file meanwhile, and it actually got smaller
+            if (blob && photoInput.files[0] === file && blob.size < file.size) {
+                const extension = blob.type === 'image/webp' ? 'webp' : 'jpg';
+                const name = file.name.replace(/\.[^.]*$/, '') + '.' + extension;
+                const transfer = new DataTransfer();
+                transfer.items.add(new File([blob], name, {type: blob.type}));
+                photoInput.files = transfer.files;
             }
-            preview.src = event.target.result;
-            preview.alt = 'Podglad zdjecia';
-        };
-        reader.readAsDataURL(file);
+            if (resizing === current) resizing = null;
+        });
+        resizing = current;
+    });
+
+    // Submitting during a resize waits for it, so the small file is the one sent
+    form.addEventListener('submit', function(e) {
+        if (!resizing) return;
+        e.preventDefault();
+        resizing.then(function() { form.requestSubmit(); });
     });
 });
@@ -0,0 +1,35 @@
+/**
+ * Photo resizing off the main thread (used by image_preview.js).
+ * Receives {file, maxSize, quality}; answers {blob} with the photo scaled to
+ * fit maxSize and encoded as WebP (JPEG where the browser can't encode WebP),
+ * {blob: null} when the original can be uploaded as is, or {error}.
+ */
+self.onmessage = async function(e) {
+    const file = e.data.file;
+    const maxSize = e.data.maxSize;
+    try {
+        // Decodes with the EXIF orientation applied, so rotated phone photos come out upright
+        const bitmap = await createImageBitmap(file, {imageOrientation: 'from-image'});
+        const scale = Math.min(1, maxSize / Math.max(bitmap.width, bitmap.height));
+        if (scale === 1 && file.type === 'image/webp') {
+            bitmap.close();
+            self.postMessage({blob: null});
+            return;
+        }
+
+        const canvas = new OffscreenCanvas(Math.round(bitmap.width * scale), Math.round(bitmap.height * scale));
+        const context = canvas.getContext('2d');
+        context.imageSmoothingQuality = 'high';
+        context.drawImage(bitmap, 0, 0, canvas.width, canvas.height);
+        bitmap.close();
+
+        let blob = await canvas.convertToBlob({type: 'image/webp', quality: e.data.quality});
+        if (blob.type !== 'image/webp') {
+            // Safari encodes unsupported types as PNG, which would be larger than the original
+            blob = await canvas.convertToBlob({type: 'image/jpeg', quality: e.data.quality});
+        }
+        self.postMessage({blob: blob});
+    } catch (error) {
+        self.postMessage({error: String(error)});
+    }
+};
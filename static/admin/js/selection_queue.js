@@ -0,0 +1,406 @@
+/**
+ * Optimistic daily selection.
+ * Tapping a flavor row or its hit star updates the row at once and queues the
+ * change; once the taps pause, the queued changes go to the batch endpoint in
+ * one request. Each change states the desired end state (selected or not, hit
+ * flavor), so repeated taps on a row collapse into one change and a retried
+ * batch is harmless. The server answers with the resulting selection, which
+ * rolls back conflicting changes and picks up changes made on other devices.
+ *
+ * Offline, the panel service worker (service_worker.js) keeps the batches in
+ * IndexedDB and answers 202 {"queued": true}; it replays them on reconnect
+ * and reports the results back with a 'replayed' message. Changes for a day
+ * that has passed (a page left open overnight) are rejected with 409 and dropped.
+ */
+(function() {
+    const container = document.getElementById('selection-container');
+    if (!container || !window.fetch) return;
+
+    const FLUSH_DELAY = 400;  // ms of no taps before the queue is sent
+    const RETRY_DELAYS = [1000, 2000, 5000, 10000, 30000];  // ms, after failed sends
+    const batchUrl = new URL(container.dataset.batchUrl, window.location.href).href;
+    const worker = navigator.serviceWorker;
+
+    let pending = new Map();  // 'select:<id>' / 'hit' / 'order' -> op, in the order they were first queued
+    let inFlight = null;  // [[key, op]] of the batch being sent
+    let inFlightRequest = null;
+    let flushTimer = null;
+    let retries = 0;
+    let opCounter = 0;
+    let offlineNoticeShown = false;
+
+    // Last state the server confirmed, so a tap that undoes a queued one sends nothing
+    const confirmed = new Map();  // flavor id -> selected
+    let confirmedHit = currentHit();
+
+    function rows() {
+        return container.querySelectorAll('.flavor-row');
+    }
+
+    function rowFor(id) {
+        return container.querySelector(`.flavor-row[data-flavor-id="${id}"]`);
+    }
+
+    function currentHit() {
+        const info = document.getElementById('hit-info');
+        return info && info.dataset.hitId ? parseInt(info.dataset.hitId, 10) : null;
+    }
+
+    function isSelected(row) {
+        return row.dataset.selected === 'true';
+    }
+
+    function renderRow(row, selected, hit) {
+        const isHit = hit === parseInt(row.dataset.flavorId, 10);
+        row.dataset.selected = selected;
+        row.setAttribute('aria-pressed', selected);
+        row.classList.toggle('bg-blue-50', selected);
+        row.classList.toggle('border-blue-200', selected);
+        row.classList.toggle('bg-white', !selected);
+
+        const name = row.querySelector('.flavor-name');
+        name.classList.toggle('text-blue-700', selected);
+        name.classList.toggle('text-gray-700', !selected);
+
+        const hitButton = row.querySelector('.hit-btn');
+        hitButton.classList.toggle('hidden', !selected);
+        hitButton.classList.toggle('text-yellow-500', isHit);
+        hitButton.classList.toggle('text-gray-300', !isHit);
+        hitButton.classList.toggle('hover:text-yellow-400', !isHit);
+        hitButton.setAttribute('aria-label', isHit ? 'Usuń hit dnia' : 'Ustaw hit dnia');
+
+        row.querySelector('.add-indicator').classList.toggle('hidden', selected);
+    }
+
+    function renderHit(hit, name) {
+        const info = document.getElementById('hit-info');
+        if (info) {
+            info.dataset.hitId = hit === null ? '' : hit;
+            info.classList.toggle('hidden', hit === null);
+            const row = hit === null ? null : rowFor(hit);
+            const label = document.getElementById('hit-name');
+            if (label && (row || name)) {
+                label.textContent = row ? row.querySelector('.flavor-name').textContent.trim() : name;
+            }
+        }
+        rows().forEach(function(row) {
+            renderRow(row, isSelected(row), hit);
+        });
+    }
+
+    function adjustCount(delta) {
+        const count = document.getElementById('selected-count');
+        if (count) count.textContent = parseInt(count.textContent, 10) + delta;
+    }
+
+    function showToast(text, classes) {
+        const toasts = document.getElementById('toast-container');
+        if (!toasts) return;
+        const toast = document.createElement('div');
+        toast.className = `${classes || 'bg-red-100 border-red-400 text-red-800'} border px-4 py-3 rounded shadow-lg mb-2 animate-fade-out`;
+        toast.textContent = text;
+        toasts.appendChild(toast);
+        setTimeout(function() { toast.remove(); }, 3500);
+    }
+
+    // ------------------------------------------------------------------
+    // Queue
+    // ------------------------------------------------------------------
+
+    function enqueue(key, op, matchesConfirmed) {
+        const sending = inFlight && inFlight.some(function(entry) { return entry[0] === key; });
+        if (matchesConfirmed && !sending) {
+            // Back to what the server already has: nothing to send
+            pending.delete(key);
+        } else if (key === 'hit') {
+            // A hit depends on earlier selections, so it always goes last
+            pending.delete(key);
+            pending.set(key, Object.assign({id: ++opCounter}, op));
+        } else {
+            pending.set(key, Object.assign({id: ++opCounter}, op));
+        }
+        clearTimeout(flushTimer);
+        flushTimer = setTimeout(flush, FLUSH_DELAY);
+    }
+
+    function toggleRow(row) {
+        const id = parseInt(row.dataset.flavorId, 10);
+        const selected = !isSelected(row);
+        if (!confirmed.has(id)) confirmed.set(id, !selected);
+
+        let hit = currentHit();
+        if (!selected && hit === id) {
+            // The server clears the hit together with its flavor
+            hit = null;
+            enqueue('hit', {type: 'hit', flavor: null}, confirmedHit === null);
+        }
+        renderRow(row, selected, hit);
+        renderHit(hit);
+        adjustCount(selected ? 1 : -1);
+        enqueue(`select:${id}`, {type: 'select', flavor: id, selected: selected}, confirmed.get(id) === selected);
+    }
+
+    function sortRows() {
+        return Array.from(container.querySelectorAll('.sort-row'));
+    }
+
+    function renderMoveButtons() {
+        const sorted = sortRows();
+        sorted.forEach(function(row, index) {
+            row.querySelectorAll('.move-btn').forEach(function(button) {
+                const disabled = button.dataset.direction === 'up' ? index === 0 : index === sorted.length - 1;
+                button.disabled = disabled;
+                button.classList.toggle('opacity-30', disabled);
+                button.classList.toggle('cursor-not-allowed', disabled);
+                button.classList.toggle('hover:bg-gray-200', !disabled);
+                if (disabled) {
+                    button.setAttribute('aria-disabled', 'true');
+                } else {
+                    button.removeAttribute('aria-disabled');
+                }
+            });
+        });
+    }
+
+    function moveRow(row, direction) {
+        const sibling = direction === 'up' ? row.previousElementSibling : row.nextElementSibling;
+        if (!sibling || !sibling.classList.contains('sort-row')) return;
+        if (direction === 'up') {
+            sibling.before(row);
+        } else {
+            sibling.after(row);
+        }
+        renderMoveButtons();
+        const order = sortRows().map(function(sorted) { return parseInt(sorted.dataset.flavorId, 10); });
+        enqueue('order', {type: 'order', order: order}, false);
+    }
+
+    function applyQueued(ops) {
+        ops.forEach(function(op) {
+            const row = op.flavor === null || op.flavor === undefined ? null : rowFor(op.flavor);
+            if (op.type === 'select' && row && isSelected(row) !== op.selected) {
+                renderRow(row, op.selected, currentHit());
+                adjustCount(op.selected ? 1 : -1);
+            } else if (op.type === 'hit') {
+                renderHit(op.flavor);
+            }
+        });
+    }
+
+    function toggleHit(row) {
+        const id = parseInt(row.dataset.flavorId, 10);
+        const hit = currentHit() === id ? null : id;
+        renderHit(hit);
+        enqueue('hit', {type: 'hit', flavor: hit}, confirmedHit === hit);
+    }
+
+    function newBatchId() {
+        if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+        return `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    }
+
+    function send(entries, keepalive) {
+        return fetch(batchUrl, {
+            method: 'POST',
+            credentials: 'same-origin',
+            keepalive: !!keepalive,
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': container.dataset.csrfToken,
+                'X-Batch-Id': newBatchId(),
+            },
+            body: JSON.stringify({ops: entries.map(function(entry) { return entry[1]; })}),
+        });
+    }
+
+    /** Send the queued changes; resolves to false if they have to be retried later. */
+    function flush(keepalive) {
+        clearTimeout(flushTimer);
+        flushTimer = null;
+        if (inFlight) return inFlightRequest;
+        if (!pending.size) return Promise.resolve(true);
+
+        inFlight = Array.from(pending.entries());
+        pending = new Map();
+        inFlightRequest = send(inFlight, keepalive)
+            .then(function(response) {
+                const json = (response.headers.get('Content-Type') || '').startsWith('application/json');
+                if (response.status === 401 || response.status === 403 || response.redirected ||
+                        (response.ok && !json)) {
+                    // Expired session: a JSON 401, a CSRF 403, or the login page behind a followed redirect
+                    showToast('Sesja wygasła. Zaloguj się ponownie, aby kontynuować.',
+                              'bg-yellow-100 border-yellow-400 text-yellow-800');
+                    setTimeout(function() { window.location.href = '/panel/login/'; }, 3000);
+                    return null;
+                }
+                if (response.status === 409) {
+                    // The day is over: drop the changes and move to today's selection
+                    return response.json().then(function(data) {
+                        showToast(data.error);
+                        setTimeout(function() { window.location.href = window.location.pathname; }, 3000);
+                        return null;
+                    });
+                }
+                if (response.status === 400) {
+                    // Not retryable; start over from the server's state
+                    window.location.reload();
+                    return null;
+                }
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                return response.json();
+            })
+            .then(function(data) {
+                const sent = inFlight;
+                inFlight = null;
+                if (data && data.queued) {
+                    // Held by the service worker until the connection is back
+                    markQueued(sent);
+                } else if (data) {
+                    reconcile(data);
+                }
+                retries = 0;
+                offlineNoticeShown = false;
+                if (pending.size) flushTimer = setTimeout(flush, FLUSH_DELAY);
+                return !!data;
+            })
+            .catch(function() {
+                // Put the batch back in front of anything queued meanwhile (newer changes win)
+                const requeued = new Map(inFlight.filter(function(entry) { return !pending.has(entry[0]); }));
+                pending.forEach(function(op, key) { requeued.set(key, op); });
+                pending = requeued;
+                inFlight = null;
+                if (!offlineNoticeShown) {
+                    showToast('Brak połączenia z serwerem. Zmiany zostaną wysłane ponownie.');
+                    offlineNoticeShown = true;
+                }
+                flushTimer = setTimeout(flush, RETRY_DELAYS[Math.min(retries++, RETRY_DELAYS.length - 1)]);
+                return false;
+            });
+        return inFlightRequest;
+    }
+
+    /** Treat a batch the service worker queued as accepted, so undoing it sends a change too. */
+    function markQueued(entries) {
+        entries.forEach(function(entry) {
+            const op = entry[1];
+            if (op.type === 'select') confirmed.set(op.flavor, op.selected);
+            if (op.type === 'hit') confirmedHit = op.flavor;
+        });
+        if (!offlineNoticeShown) {
+            showToast('Brak połączenia. Zmiany zapisano na urządzeniu i zostaną wysłane później.',
+                      'bg-yellow-100 border-yellow-400 text-yellow-800');
+            offlineNoticeShown = true;
+        }
+    }
+
+    /** Show the server's selection, keeping the changes still queued on top of it. */
+    function reconcile(data) {
+        const selected = new Set(data.selected);
+        let count = data.selected_count;
+        rows().forEach(function(row) {
+            const id = parseInt(row.dataset.flavorId, 10);
+            confirmed.set(id, selected.has(id));
+            const queued = pending.get(`select:${id}`);
+            const shown = queued ? queued.selected : selected.has(id);
+            if (shown !== selected.has(id)) count += shown ? 1 : -1;
+            renderRow(row, shown, null);
+        });
+        confirmedHit = data.hit;
+        const queuedHit = pending.get('hit');
+        renderHit(queuedHit ? queuedHit.flavor : data.hit, data.hit_name);
+
+        const counter = document.getElementById('selected-count');
+        if (counter) counter.textContent = count;
+
+        data.results.forEach(function(result) {
+            if (result.status === 'conflict') showToast(result.message);
+        });
+    }
+
+    /** Send everything queued, including changes made while sending. */
+    function drain() {
+        return flush().then(function(ok) {
+            return ok && (pending.size || inFlight) ? drain() : ok;
+        });
+    }
+
+    // ------------------------------------------------------------------
+    // Events
+    // ------------------------------------------------------------------
+
+    container.addEventListener('click', function(e) {
+        const moveButton = e.target.closest('.move-btn');
+        if (moveButton) {
+            moveRow(moveButton.closest('.sort-row'), moveButton.dataset.direction);
+            return;
+        }
+        const row = e.target.closest('.flavor-row');
+        if (!row) return;
+        if (e.target.closest('.hit-btn')) {
+            toggleHit(row);
+        } else {
+            toggleRow(row);
+        }
+    });
+
+    container.addEventListener('keydown', function(e) {
+        if ((e.key === 'Enter' || e.key === ' ') && e.target.classList.contains('flavor-row')) {
+            e.preventDefault();
+            toggleRow(e.target);
+        }
+    });
+
+    // Other actions (copy, clear, sort, next page) work on the server's state: send the queue first
+    container.addEventListener('htmx:confirm', function(e) {
+        if (!pending.size && !inFlight) return;
+        e.preventDefault();
+        drain().then(function(ok) {
+            if (ok) {
+                e.detail.issueRequest();
+            } else {
+                showToast('Poczekaj, aż zmiany zostaną zapisane.');
+            }
+        });
+    });
+
+    // A swapped-in list is the server's current state
+    container.addEventListener('htmx:afterSettle', function(e) {
+        if (e.detail.target === container && !pending.size && !inFlight) {
+            confirmed.clear();
+            confirmedHit = currentHit();
+        }
+    });
+
+    window.addEventListener('online', function() {
+        if (worker && worker.controller) {
+            worker.controller.postMessage({type: 'replay', csrfToken: container.dataset.csrfToken});
+        }
+        if (pending.size) flush();
+    });
+
+    if (worker) {
+        worker.addEventListener('message', function(e) {
+            const message = e.data || {};
+            if (message.type === 'pending' && message.url === batchUrl) {
+                applyQueued(message.ops);
+            } else if (message.type === 'replayed' && message.url === batchUrl && !inFlight) {
+                reconcile(message.data);
+            } else if (message.type === 'stale') {
+                showToast(message.data.error);
+            } else if (message.type === 'auth') {
+                showToast('Sesja wygasła. Zaloguj się ponownie, aby wysłać zapisane zmiany.',
+                          'bg-yellow-100 border-yellow-400 text-yellow-800');
+            }
+        });
+        // Show changes still waiting in the worker's queue (e.g. page opened offline from cache)
+        if (worker.controller) {
+            worker.controller.postMessage({type: 'pending', url: batchUrl, csrfToken: container.dataset.csrfToken});
+            if (navigator.onLine) worker.controller.postMessage({type: 'replay'});
+        }
+    }
+
+    // Leaving the page: hand the queue to the browser, it finishes the request for us
+    window.addEventListener('pagehide', function() {
+        if (pending.size && !inFlight) flush(true);
+    });
+})();
@@ -0,0 +1,44 @@
+/**
+ * Live menu updates on the homepage.
+ * Listens to the SSE stream and patches flavor cards in place; reloads the
+ * page when it missed an event or the grid can't be patched.
+ */
+(function() {
+    const menu = document.getElementById('menu');
+    if (!menu || !window.EventSource) return;
+
+    let version = parseInt(menu.dataset.version, 10);
+    const source = new EventSource(menu.dataset.eventsUrl);
+
+    source.addEventListener('menu', function(e) {
+        const event = JSON.parse(e.data);
+        if (event.version <= version) return;  // already applied (replayed on reconnect)
+
+        const grid = document.getElementById('menu-grid');
+        if (event.prev !== version || !grid || !event.order.length) {
+            source.close();
+            window.location.reload();
+            return;
+        }
+
+        // Current cards by flavor id, then swap in the re-rendered ones
+        const cards = {};
+        grid.querySelectorAll('[data-flavor-id]').forEach(function(card) {
+            cards[card.dataset.flavorId] = card;
+        });
+        Object.keys(event.cards).forEach(function(id) {
+            const template = document.createElement('template');
+            template.innerHTML = event.cards[id].trim();
+            cards[id] = template.content.querySelector('[data-flavor-id]');
+        });
+
+        const ordered = event.order.map(function(id) { return cards[id]; });
+        if (ordered.some(function(card) { return !card; })) {
+            source.close();
+            window.location.reload();
+            return;
+        }
+        grid.replaceChildren(...ordered);
+        version = event.version;
+    });
+})();
@@ -0,0 +1,263 @@
+/**
+ * Panel service worker (scope /panel/), rendered by views_admin.service_worker.
+ *
+ * - Static files are precached and served cache-first (their names are hashed).
+ * - Panel pages are network-first; the last copy of each is kept for offline
+ *   use, and the daily selection and flavor list are precached on install.
+ * - Selection batches (see selection_queue.js) that can't reach the server are
+ *   stored in IndexedDB and answered with 202 {"queued": true}. The queue is
+ *   replayed in order when the connection is back: on Background Sync where
+ *   the browser has it, on the next batch, and when a page asks. Batches
+ *   carry an X-Batch-Id, so the server applies a replayed one only once.
+ */
+const VERSION = '{{ version }}';
+const STATIC_CACHE = `panel-static-${VERSION}`;
+const PAGES_CACHE = `panel-pages-${VERSION}`;
+const STATIC_ASSETS = [{% for url in static_assets %}'{{ url|escapejs }}'{% if not forloop.last %}, {% endif %}{% endfor %}];
+const PRECACHED_PAGES = ['{% url "flavors:admin_daily_selection" %}', '{% url "flavors:admin_flavor_list" %}'];
+const OFFLINE_PAGE = PRECACHED_PAGES[0];
+const BATCH_PATH = '{% url "flavors:admin_selection_batch" %}';
+const LOGOUT_PATH = '{% url "flavors:admin_logout" %}';
+const LOGIN_PATH = '{% url "flavors:admin_login" %}';
+const PROFILES_PATH = '{% url "flavors:admin_profiles" %}';
+
+const DB_NAME = 'panel-queue';
+const STORE = 'batches';
+const SYNC_TAG = 'panel-queue';
+
+let csrfToken = null;  // latest token from an open page; queued batches may carry a rotated one
+
+// ----------------------------------------------------------------------
+// Offline queue (IndexedDB)
+// ----------------------------------------------------------------------
+
+function openDb() {
+    return new Promise(function(resolve, reject) {
+        const request = indexedDB.open(DB_NAME, 1);
+        request.onupgradeneeded = function() {
+            request.result.createObjectStore(STORE, {keyPath: 'key', autoIncrement: true});
+        };
+        request.onsuccess = function() { resolve(request.result); };
+        request.onerror = function() { reject(request.error); };
+    });
+}
+
+function withStore(mode, action) {
+    return openDb().then(function(db) {
+        return new Promise(function(resolve, reject) {
+            const transaction = db.transaction(STORE, mode);
+            const request = action(transaction.objectStore(STORE));
+            transaction.oncomplete = function() { resolve(request.result); };
+            transaction.onerror = function() { reject(transaction.error); };
+        });
+    });
+}
+
+const queue = {
+    add: function(entry) { return withStore('readwrite', function(store) { return store.add(entry); }); },
+    all: function() { return withStore('readonly', function(store) { return store.getAll(); }); },
+    remove: function(key) { return withStore('readwrite', function(store) { return store.delete(key); }); },
+};
+
+function notify(message) {
+    return self.clients.matchAll({type: 'window'}).then(function(clients) {
+        clients.forEach(function(client) { client.postMessage(message); });
+    });
+}
+
+function post(entry) {
+    return fetch(entry.url, {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken || entry.csrfToken,
+            'X-Batch-Id': entry.batchId,
+        },
+        body: entry.body,
+    });
+}
+
+/** Whether the batch endpoint itself answered, rather than the login page or an auth error. */
+function isBatchResponse(response) {
+    if (response.redirected || response.status === 401 || response.status === 403) return false;
+    // Server errors may come from the proxy as HTML; they are retried either way
+    return response.status >= 500 || (response.headers.get('Content-Type') || '').startsWith('application/json');
+}
+
+/** Send queued batches oldest first; resolves to true once the queue is empty. */
+async function replayQueue() {
+    for (const entry of await queue.all()) {
+        let response;
+        try {
+            response = await post(entry);
+        } catch (e) {
+            return false;  // still offline
+        }
+        if (!isBatchResponse(response)) {
+            // Session expired (401/403, or a login page behind a redirect): keep the
+            // queue for after the next login
+            await notify({type: 'auth'});
+            return false;
+        }
+        if (response.status >= 500) return false;
+        await queue.remove(entry.key);
+        if (response.ok) {
+            await notify({type: 'replayed', url: entry.url, data: await response.json()});
+        } else if (response.status === 409) {
+            // Queued for a day that has passed: tell the pages it was dropped
+            await notify({type: 'stale', url: entry.url, data: await response.json()});
+        }
+        // Anything else (400) can never apply, so it is dropped
+    }
+    return true;
+}
+
+let replaying = null;
+
+function replay() {
+    if (!replaying) {
+        replaying = replayQueue().catch(function() { return false; }).finally(function() { replaying = null; });
+    }
+    return replaying;
+}
+
+async function sendBatch(request) {
+    const entry = {
+        url: request.url,
+        body: await request.text(),
+        batchId: request.headers.get('X-Batch-Id'),
+        csrfToken: request.headers.get('X-CSRFToken'),
+        queuedAt: Date.now(),
+    };
+    // Earlier batches go first, so the server sees changes in the order they were made
+    if (await replay()) {
+        try {
+            const response = await post(entry);
+            if (response.status < 500) return response;
+        } catch (e) {
+            // offline: queue it below
+        }
+    }
+    await queue.add(entry);
+    if (self.registration.sync) {
+        self.registration.sync.register(SYNC_TAG).catch(function() {});
+    }
+    return new Response(JSON.stringify({queued: true}), {
+        status: 202,
+        headers: {'Content-Type': 'application/json'},
+    });
+}
+
+// ----------------------------------------------------------------------
+// Caches
+// ----------------------------------------------------------------------
+
+async function precachePages() {
+    const cache = await caches.open(PAGES_CACHE);
+    await Promise.all(PRECACHED_PAGES.map(async function(url) {
+        try {
+            const response = await fetch(url, {credentials: 'same-origin'});
+            if (response.ok && !response.redirected) await cache.put(url, response);
+        } catch (e) {
+            // Offline during install: the page is cached on its next visit instead
+        }
+    }));
+}
+
+function isCacheablePage(url) {
+    return url.pathname !== LOGIN_PATH && !url.pathname.startsWith(PROFILES_PATH);
+}
+
+async function networkFirst(request) {
+    const cache = await caches.open(PAGES_CACHE);
+    try {
+        const response = await fetch(request);
+        if (response.ok && !response.redirected && isCacheablePage(new URL(request.url))) {
+            cache.put(request, response.clone());
+        }
+        return response;
+    } catch (e) {
+        const cached = await cache.match(request) || await cache.match(OFFLINE_PAGE);
+        if (cached) return cached;
+        return new Response('Brak połączenia z serwerem.', {
+            status: 503,
+            headers: {'Content-Type': 'text/plain; charset=utf-8'},
+        });
+    }
+}
+
+async function cacheFirst(request) {
+    const cached = await caches.match(request);
+    return cached || fetch(request);
+}
+
+// ----------------------------------------------------------------------
+// Lifecycle and events
+// ----------------------------------------------------------------------
+
+self.addEventListener('install', function(event) {
+    event.waitUntil(
+        caches.open(STATIC_CACHE)
+            .then(function(cache) { return cache.addAll(STATIC_ASSETS); })
+            .then(precachePages)
+            .then(function() { return self.skipWaiting(); })
+    );
+});
+
+self.addEventListener('activate', function(event) {
+    event.waitUntil(
+        caches.keys()
+            .then(function(names) {
+                return Promise.all(names
+                    .filter(function(name) { return name !== STATIC_CACHE && name !== PAGES_CACHE; })
+                    .map(function(name) { return caches.delete(name); }));
+            })
+            .then(function() { return self.clients.claim(); })
+    );
+});
+
+self.addEventListener('fetch', function(event) {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+
+    if (request.method === 'POST' && url.pathname === BATCH_PATH) {
+        event.respondWith(sendBatch(request));
+    } else if (request.method !== 'GET') {
+        return;
+    } else if (STATIC_ASSETS.includes(url.pathname)) {
+        event.respondWith(cacheFirst(request));
+    } else if (request.mode === 'navigate' && url.pathname === LOGOUT_PATH) {
+        // Don't leave the panel's pages readable offline after logging out
+        event.respondWith(caches.delete(PAGES_CACHE).then(function() { return fetch(request); }));
+    } else if (request.mode === 'navigate') {
+        event.respondWith(networkFirst(request));
+    }
+    // htmx partials and everything else go straight to the network
+});
+
+self.addEventListener('sync', function(event) {
+    if (event.tag === SYNC_TAG) {
+        event.waitUntil(replay().then(function(done) {
+            if (!done) throw new Error('queue not empty');  // the browser retries later
+        }));
+    }
+});
+
+self.addEventListener('message', function(event) {
+    const message = event.data || {};
+    if (message.csrfToken) csrfToken = message.csrfToken;
+
+    if (message.type === 'replay') {
+        event.waitUntil(replay());
+    } else if (message.type === 'pending') {
+        // Changes still queued for a page's selection, so it can show them
+        event.waitUntil(queue.all().then(function(entries) {
+            const ops = entries
+                .filter(function(entry) { return entry.url === message.url; })
+                .flatMap(function(entry) { return JSON.parse(entry.body).ops; });
+            event.source.postMessage({type: 'pending', url: message.url, ops: ops});
+        }));
+    }
+});